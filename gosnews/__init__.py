@@ -0,0 +1,7 @@
+# Приложение Celery загружается вместе с Django, чтобы @shared_task использовали его брокер
+try:
+    from .celery import app as celery_app
+except ImportError:  # Celery не установлен: очередь перевода разбирает поток процесса
+    celery_app = None
+
+__all__ = ('celery_app',)
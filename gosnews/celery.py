@@ -0,0 +1,14 @@
+"""
+Приложение Celery проекта (фоновый машинный перевод при MACHINE_TRANSLATION_CELERY=1).
+Воркер: celery -A gosnews worker. Настройки — из Django с префиксом CELERY_ (CELERY_BROKER_URL).
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gosnews.settings')
+
+app = Celery('gosnews')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -3,6 +3,7 @@ Django settings for gosnews project.
 """
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,7 +36,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news_app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Статика отдаётся до остальных middleware и без обращения к view
+    'news_app.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -138,9 +142,21 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# Media files - изменяем URL чтобы избежать конфликта
+# collectstatic: имена с хешем содержимого, заранее сжатые .gz и .br копии;
+# WhiteNoise отдаёт их с Cache-Control: max-age=315360000, immutable
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Media files — вне static/, чтобы collectstatic не копировал загрузки.
+# В продакшене /media/ отдаёт веб-сервер напрямую (deploy/nginx.conf), Django — только при DEBUG
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'static', 'media')  # файлы все равно будут в static/media/
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
 
 # Create media directories if they don't exist
 os.makedirs(MEDIA_ROOT, exist_ok=True)
@@ -149,7 +165,159 @@ os.makedirs(os.path.join(MEDIA_ROOT, 'leaders'), exist_ok=True)
 os.makedirs(os.path.join(MEDIA_ROOT, 'partners'), exist_ok=True)
 
 
+# Cache
+# Общий кэш воркеров — Redis (REDIS_URL); без него — память процесса (разработка, тесты)
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gosnews',
+        }
+    }
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# News listing
+# Общее число новостей на странице all_news кэшируется (секунды)
+NEWS_COUNT_CACHE_TIMEOUT = 300
+
+# Related news
+# Сколько похожих новостей хранить и показывать на странице новости
+RELATED_NEWS_COUNT = 6
+# Учитывать совпадение слов в заголовках при подборе похожих
+RELATED_NEWS_TITLE_OVERLAP = True
+
+# Homepage cache
+# HTML главной страницы кэшируется по языку и сбрасывается сигналами при изменении данных
+HOMEPAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# Секции главной собираются параллельно (async index); не успевшая за таймаут секция
+# берётся из последней удачной копии, а страница кэшируется ненадолго
+HOMEPAGE_SECTION_TIMEOUT = 2
+DEGRADED_CACHE_TIMEOUT = 30
+
+# Release
+# Версия выкладки (например, хэш коммита): входит в ETag страниц и ключ кэша главной,
+# чтобы новые шаблоны и статика не ждали изменения данных. Без неё — хэш манифеста collectstatic
+RELEASE = os.environ.get('RELEASE', '')
+
+# Responsive images
+# Ширины WebP/JPEG копий загруженных изображений и число потоков для их генерации
+IMAGE_VARIANT_WIDTHS = (320, 640, 1024, 1600)
+IMAGE_VARIANT_WORKERS = 2
+# Манифест созданных копий: записей в памяти воркера и срок кэширования «копий ещё нет» (секунды)
+IMAGE_VARIANT_MANIFEST_SIZE = 10000
+IMAGE_VARIANT_MISS_TIMEOUT = 60
+# Файл, сохранённый за последние N секунд, освобождается не сразу, а повторной попыткой через N секунд:
+# ссылающаяся на него запись другой транзакции может быть ещё не закоммичена
+IMAGE_RELEASE_GRACE = 60
+
+# Debt lookup
+# Кэш ответа по одному ИНН (секунды) и лимит запросов с одного IP в минуту
+DEBT_LOOKUP_CACHE_TIMEOUT = 60 * 60
+DEBT_LOOKUP_RATE_LIMIT = 30
+# Отклонённые строки импорта содержат персональные данные: каталог вне MEDIA_ROOT,
+# файлы отдаются только персоналу через админку
+DEBT_IMPORT_REJECTED_ROOT = os.environ.get('DEBT_IMPORT_REJECTED_ROOT', os.path.join(BASE_DIR, 'private', 'imports'))
+# Файлы больше N байт админка импортирует в фоне, по одному; выгрузки в сотни мегабайт — командой import_debts
+DEBT_IMPORT_BACKGROUND_SIZE = 2 * 1024 * 1024
+
+# Reverse proxy
+# Сколько своих прокси перед Django дописывают адрес в X-Forwarded-For (nginx из deploy/ — 1).
+# 0 — клиент берётся из REMOTE_ADDR; больше реального числа ставить нельзя: адрес можно подделать
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '0'))
+
+# Debt summary
+# Итоги реестра долгов (/api/debts/summary) — из DebtSummary; срок кэширования ответа браузером
+DEBT_SUMMARY_MAX_AGE = 60
+
+# Request metrics
+# Гистограммы по маршрутам и языкам на /metrics; сброс из памяти воркера в кэш раз в N секунд.
+# Адреса с доступом к /metrics сверяются с адресом клиента за прокси (TRUSTED_PROXY_COUNT)
+METRICS_FLUSH_INTERVAL = 10
+METRICS_ALLOWED_IPS = ('127.0.0.1',)
+# Доля запросов, для которых собираются тексты SQL; из них в лог попадают медленнее порога (мс)
+METRICS_SLOW_SAMPLE_RATE = 0.1
+METRICS_SLOW_REQUEST_MS = 500
+METRICS_SLOW_TOP_QUERIES = 5
+
+# Sitemaps and feeds
+# Статические файлы в MEDIA_ROOT/feeds (обновляются по сигналам, полностью — командой build_feeds)
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+SITEMAP_SHARD_SIZE = 10000
+FEED_ITEMS = 50
+
+# Static export
+# Каталог статической копии публичных страниц для nginx; если задан, сохранения
+# в админке перерисовывают затронутые страницы в фоне (полная выгрузка — export_site)
+STATIC_EXPORT_ROOT = os.environ.get('STATIC_EXPORT_ROOT') or None
+STATIC_EXPORT_WORKERS = 4
+
+# Reference data
+# Категории, гайды, руководство и партнёры: LRU в памяти воркера (версия перепроверяется
+# раз в REFERENCE_LOCAL_TTL секунд) поверх общего кэша с версионными ключами
+REFERENCE_CACHE_SIZE = 256
+REFERENCE_LOCAL_TTL = 5
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Leaders API
+# Карточек руководства на страницу (leaders и /api/leaders) и срок кэширования ответа API браузером
+LEADERS_PER_PAGE = 8
+LEADERS_API_MAX_AGE = 5 * 60
+
+# Title suggestions
+# Подсказки при наборе из индекса в памяти воркера; журнал изменений для других воркеров
+# проверяется раз в SUGGEST_CHECK_INTERVAL секунд, при пропусках в журнале индекс строится заново
+SUGGEST_LIMIT = 8
+SUGGEST_SCAN_LIMIT = 200
+SUGGEST_CHECK_INTERVAL = 5
+SUGGEST_MAX_CHANGES = 1000
+SUGGEST_CHANGE_TIMEOUT = 60 * 60
+SUGGEST_MAX_AGE = 60
+
+# News API
+# /api/news читает БД и отдаёт ответ пачками по N записей (память не зависит от объёма выгрузки)
+NEWS_API_CHUNK_SIZE = 500
+# ?since= отдаёт изменения с запасом (секунды): updated_at ставится при сохранении, а запись видна
+# только после коммита. Метки удалённых переводов хранятся N дней; более старый since — полная выгрузка
+NEWS_API_SYNC_LAG = 60 * 5
+NEWS_API_DELETION_DAYS = 90
+
+# Translation fallbacks
+# Язык -> языки, чей перевод показывается, если на нём самом перевода нет (по порядку).
+# uz и ru переводятся полностью — для них выборка идёт по индексу без подзапросов
+TRANSLATION_FALLBACKS = {
+    'kaa': ('uz', 'ru'),
+}
+
+# Machine translation
+# Фоновый перевод языков без перевода редактора; без MACHINE_TRANSLATION_BACKEND выключен.
+# Для разработки — news_app.machine_translation.StubBackend, для сервиса с API LibreTranslate —
+# news_app.machine_translation.HttpBackend. С MACHINE_TRANSLATION_CELERY=1 очередь разбирает воркер Celery
+# (gosnews/celery.py) через CELERY_BROKER_URL, по умолчанию — общий Redis
+MACHINE_TRANSLATION_BACKEND = os.environ.get('MACHINE_TRANSLATION_BACKEND') or None
+MACHINE_TRANSLATION_URL = os.environ.get('MACHINE_TRANSLATION_URL', 'http://localhost:5000')
+MACHINE_TRANSLATION_API_KEY = os.environ.get('MACHINE_TRANSLATION_API_KEY', '')
+MACHINE_TRANSLATION_CELERY = os.environ.get('MACHINE_TRANSLATION_CELERY') == '1'
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or REDIS_URL
+CELERY_TASK_IGNORE_RESULT = True
+if MACHINE_TRANSLATION_CELERY and not CELERY_BROKER_URL:
+    raise ImproperlyConfigured("MACHINE_TRANSLATION_CELERY=1: задайте CELERY_BROKER_URL или REDIS_URL")
+MACHINE_TRANSLATION_TIMEOUT = 30
+MACHINE_TRANSLATION_BATCH_SIZE = 100
+MACHINE_TRANSLATION_JOB_BATCH = 50
+MACHINE_TRANSLATION_JOB_TIMEOUT = 30 * 60
@@ -3,12 +3,18 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
+from news_app import views as news_views
 
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
+    # Без языкового префикса — для Prometheus
+    path('metrics', news_views.metrics, name='metrics'),
 ]
 
 urlpatterns += i18n_patterns(
     path('admin/', admin.site.urls),
     path('', include('news_app.urls')),
-) + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+)
+
+# Только для разработки (при DEBUG=False static() ничего не добавляет): в продакшене media отдаёт nginx
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
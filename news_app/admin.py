@@ -1,14 +1,42 @@
-from django.contrib import admin
+import os
+import re
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.http import FileResponse, Http404
+from django.shortcuts import redirect, render
+from django.urls import path, reverse
+from django.utils.html import format_html
+from . import debt_import
+from . import debts
+from . import machine_translation
 from .models import (
     News, NewsTranslation,
     Category, CategoryTranslation,
     Leaders,
     Debt,
     Guide, GuideTranslation,
-    Partners
+    Partners,
+    TranslationJob, TranslationMemory,
 )
 
 
+# ================== Translations ==================
+class ReviewedTranslationsMixin:
+    """Правка машинного перевода редактором делает его переводом редактора: фон его больше не перепишет"""
+
+    def save_formset(self, request, form, formset, change):
+        for inline_form in formset.forms:
+            if (
+                getattr(inline_form.instance, 'machine_translated', False)
+                and inline_form.has_changed()
+                and 'machine_translated' not in inline_form.changed_data
+            ):
+                inline_form.instance.machine_translated = False
+        super().save_formset(request, form, formset, change)
+
+
 # ================== News ==================
 class NewsTranslationInline(admin.StackedInline):
     model = NewsTranslation
@@ -16,8 +44,9 @@ class NewsTranslationInline(admin.StackedInline):
 
 
 @admin.register(News)
-class NewsAdmin(admin.ModelAdmin):
-    list_display = ("id", "created_at")
+class NewsAdmin(ReviewedTranslationsMixin, admin.ModelAdmin):
+    list_display = ("id", "created_at", "is_published")
+    list_filter = ("is_published",)
     inlines = [NewsTranslationInline]
     ordering = ["-created_at"]
 
@@ -54,11 +83,135 @@ class PartnersAdmin(admin.ModelAdmin):
 
 
 # ================== Debt ==================
+REJECTED_NAME_RE = re.compile(r"^rejected-\d{8}-\d{6}-[0-9a-f]{16}\.csv$")
+
+
+class DebtImportForm(forms.Form):
+    file = forms.FileField(label="Файл CSV или XLSX")
+
+
+class DebtStatusFilter(admin.SimpleListFilter):
+    """Статусы с числом долгов из DebtSummary"""
+    title = "Статус"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        return [
+            (row["status"], f'{row["status_display"]} ({row["count"]})')
+            for row in debts.summary()["by_status"]
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
+
+
+class DebtTypeFilter(admin.SimpleListFilter):
+    """Типы долгов из DebtSummary — без SELECT DISTINCT по всей таблице"""
+    title = "Тип долга"
+    parameter_name = "debt_type"
+
+    def lookups(self, request, model_admin):
+        return [
+            (row["debt_type"], f'{row["debt_type"]} ({row["count"]})')
+            for row in debts.summary()["by_type"]
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(debt_type=self.value())
+        return queryset
+
+
 @admin.register(Debt)
 class DebtAdmin(admin.ModelAdmin):
     list_display = ("inn", "full_name", "debt_amount", "status")
-    list_filter = ("status", "debt_type")
+    list_filter = (DebtStatusFilter, DebtTypeFilter)
     search_fields = ("inn", "full_name")
+    # Общее число записей есть в итогах над списком — без второго COUNT(*) по таблице
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), "debt_summary": debts.summary()}
+        return super().changelist_view(request, extra_context)
+
+    def get_urls(self):
+        urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="news_app_debt_import"),
+            path(
+                "import/rejected/<str:name>",
+                self.admin_site.admin_view(self.rejected_view),
+                name="news_app_debt_import_rejected",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def rejected_view(self, request, name):
+        """Отклонённые строки импорта (ИНН, ФИО, суммы) — только персоналу, не через /media/"""
+        if not self.has_change_permission(request) or not REJECTED_NAME_RE.match(name):
+            raise Http404
+        file_path = os.path.join(settings.DEBT_IMPORT_REJECTED_ROOT, name)
+        if not os.path.exists(file_path):
+            raise Http404
+        response = FileResponse(open(file_path, "rb"), as_attachment=True, filename=name, content_type="text/csv")
+        response["Cache-Control"] = "private, no-store"
+        return response
+
+    def import_view(self, request):
+        """
+        Загрузка выгрузки налоговой: потоковый upsert по ИНН и типу долга.
+        Файлы больше DEBT_IMPORT_BACKGROUND_SIZE импортируются в фоне, итоги — на этой же странице
+        """
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return redirect("admin:news_app_debt_changelist")
+
+        form = DebtImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            if upload.size > settings.DEBT_IMPORT_BACKGROUND_SIZE:
+                debt_import.start_background_import(upload)
+                self.message_user(
+                    request, "Файл большой — импорт запущен в фоне, итоги появятся в списке ниже", messages.INFO,
+                )
+                return redirect("admin:news_app_debt_import")
+
+            os.makedirs(settings.DEBT_IMPORT_REJECTED_ROOT, exist_ok=True)
+            rejected_name = debt_import.rejected_name(debt_import.new_job_id())
+            try:
+                stats = debt_import.run_import(
+                    upload.file, upload.name, os.path.join(settings.DEBT_IMPORT_REJECTED_ROOT, rejected_name),
+                )
+            except ValueError as e:
+                self.message_user(
+                    request,
+                    f"Импорт прерван: {e}. Строки до ошибки могли быть записаны — "
+                    "исправленный файл можно загрузить повторно",
+                    messages.ERROR,
+                )
+                return redirect("admin:news_app_debt_import")
+
+            self.message_user(request, f"Импорт завершён — {stats}", messages.SUCCESS)
+            if stats.rejected:
+                self.message_user(
+                    request,
+                    format_html(
+                        'Отклонённые строки: <a href="{}">{}</a>',
+                        reverse("admin:news_app_debt_import_rejected", args=[rejected_name]),
+                        rejected_name,
+                    ),
+                    messages.WARNING,
+                )
+            return redirect("admin:news_app_debt_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "jobs": debt_import.recent_jobs(),
+            "title": "Импорт долгов",
+        }
+        return render(request, "admin/news_app/debt/import.html", context)
 
 
 #=================== Guide ==================
@@ -70,9 +223,35 @@ class GuideTranslationInline(admin.StackedInline):
 
 
 @admin.register(Guide)
-class GuideAdmin(admin.ModelAdmin):
+class GuideAdmin(ReviewedTranslationsMixin, admin.ModelAdmin):
     list_display = ("id", "guide_type", "created_at", "link")
     list_filter = ("guide_type",)
     inlines = [GuideTranslationInline]
     ordering = ["-created_at"]
-    readonly_fields = ("created_at",)
\ No newline at end of file
+    readonly_fields = ("created_at",)
+
+
+# ================== Machine translation ==================
+@admin.register(TranslationJob)
+class TranslationJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "model", "object_id", "target_lang", "status", "updated_at")
+    list_filter = ("status", "model", "target_lang")
+    readonly_fields = ("model", "object_id", "target_lang", "status", "error", "created_at", "updated_at")
+    actions = ["retry"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Повторить")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=TranslationJob.RUNNING).update(status=TranslationJob.PENDING, error="")
+        if count:
+            machine_translation.kick()
+        self.message_user(request, f"Поставлено в очередь: {count}", messages.SUCCESS)
+
+
+@admin.register(TranslationMemory)
+class TranslationMemoryAdmin(admin.ModelAdmin):
+    list_display = ("source_lang", "target_lang", "source_text", "backend", "created_at")
+    list_filter = ("source_lang", "target_lang", "backend")
+    search_fields = ("source_text", "translated_text")
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+# ================== Versions ==================
+def _version_key(section):
+    return f'version:{section}'
+
+
+def get_versions(sections):
+    """Текущие версии секций одним запросом к кэшу"""
+    keys = [_version_key(s) for s in sections]
+    found = cache.get_many(keys)
+    versions = {}
+    for section, key in zip(sections, keys):
+        version = found.get(key)
+        if version is None:
+            # Начальное значение из времени: после вытеснения ключа
+            # версия не совпадёт со старыми записями
+            cache.add(key, int(time.time() * 1000), None)
+            version = cache.get(key)
+        versions[section] = version
+    return versions
+
+
+def bump_version(section):
+    """Инвалидирует все записи, собранные из данной секции; возвращает новую версию"""
+    key = _version_key(section)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+    cache.set(_modified_key(section), time.time(), None)
+    return version
+
+
+def _modified_key(section):
+    return f'modified:{section}'
+
+
+def get_last_modified(sections):
+    """Время последнего изменения любой из секций (для Last-Modified)"""
+    keys = [_modified_key(s) for s in sections]
+    found = cache.get_many(keys)
+    latest = 0
+    for key in keys:
+        value = found.get(key)
+        if value is None:
+            # Время неизвестно (ключ вытеснен) — считаем, что изменилось сейчас
+            cache.add(key, time.time(), None)
+            value = cache.get(key)
+        latest = max(latest, value)
+    return datetime.fromtimestamp(latest, timezone.utc)
+
+
+# ================== Release ==================
+STARTED_AT = time.time()
+
+
+@lru_cache(maxsize=None)
+def release():
+    """
+    Версия и время выкладки: (строка, datetime). Версия — settings.RELEASE или хэш манифеста
+    collectstatic; время — изменение манифеста (collectstatic пишет его при каждой выкладке).
+    Без манифеста (разработка) выкладкой считается запуск процесса.
+    """
+    version, released_at = settings.RELEASE, STARTED_AT
+    manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+    if manifest_name and staticfiles_storage.exists(manifest_name):
+        path = staticfiles_storage.path(manifest_name)
+        released_at = os.path.getmtime(path)
+        if not version:
+            with open(path, 'rb') as f:
+                version = hashlib.md5(f.read()).hexdigest()[:12]
+    return version or str(int(STARTED_AT)), datetime.fromtimestamp(released_at, timezone.utc)
+
+
+# ================== Stats ==================
+def _stats_key(name, event):
+    return f'cachestats:{name}:{event}'
+
+
+def incr(key, delta=1):
+    """Бессрочный счётчик в кэше; общий для воркеров, если кэш общий (Redis)"""
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def count(name, event):
+    """Счётчики попаданий/промахов"""
+    incr(_stats_key(name, event))
+
+
+def stats(names, events=('hit', 'miss', 'stale', 'degraded')):
+    keys = {_stats_key(n, e): (n, e) for n in names for e in events}
+    found = cache.get_many(list(keys))
+    result = {n: {e: 0 for e in events} for n in names}
+    for key, (name, event) in keys.items():
+        result[name][event] = found.get(key, 0)
+    return result
+
+
+# ================== Homepage ==================
+# Секции главной страницы и модели, от которых они зависят.
+# Долги на главной не выводятся, поэтому Debt страницу не инвалидирует.
+HOMEPAGE_SECTIONS = {
+    'news': ('News', 'NewsTranslation', 'Category', 'CategoryTranslation'),
+    'leaders': ('Leaders',),
+    'guides': ('Guide', 'GuideTranslation'),
+    'partners': ('Partners',),
+}
+
+
+# Справочные данные (news_app.reference) и модели, от которых они зависят
+REFERENCE_SECTIONS = {
+    'categories': ('Category', 'CategoryTranslation'),
+    'guides': ('Guide', 'GuideTranslation'),
+    'leaders': ('Leaders',),
+    'partners': ('Partners',),
+}
+
+
+def sections_by_model():
+    """Имя модели -> секции версий, которые её сохранение должно сбросить"""
+    result = {}
+    for sections in (HOMEPAGE_SECTIONS, REFERENCE_SECTIONS):
+        for section, model_names in sections.items():
+            for model_name in model_names:
+                result.setdefault(model_name, set()).add(section)
+    return result
+
+
+def _homepage_key(lang):
+    versions = get_versions(list(HOMEPAGE_SECTIONS))
+    version = '.'.join(str(versions[s]) for s in HOMEPAGE_SECTIONS)
+    # HTML из шаблонов прошлой выкладки не подходит, даже если данные не менялись
+    return f'homepage:{lang}:{release()[0]}:{version}'
+
+
+async def aget_homepage(lang, builder):
+    """HTML главной страницы для языка; ключ включает версии всех секций"""
+    key = await sync_to_async(_homepage_key)(lang)
+    return await aget_or_build(
+        'homepage', key, builder, settings.HOMEPAGE_CACHE_TIMEOUT,
+        stale_key=f'homepage:{lang}:stale',
+    )
+
+
+# ================== Async ==================
+async def aget_or_build(name, key, builder, timeout, stale_key=None):
+    """
+    Возвращает значение из кэша или строит его; ожидание чужой сборки не занимает поток.
+    Защита от «stampede»: строит только тот, кто взял блокировку,
+    остальные получают устаревшую копию (stale_key) или ждут готового значения.
+    builder — корутина, возвращающая (значение, полное ли оно). Неполное значение
+    (секция не успела) кэшируется на DEGRADED_CACHE_TIMEOUT и не заменяет устаревшую копию.
+    """
+    acount = sync_to_async(count)
+    value = await cache.aget(key)
+    if value is not None:
+        await acount(name, 'hit')
+        return value
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            await acount(name, 'miss')
+            value, complete = await builder()
+            if complete:
+                await cache.aset(key, value, timeout)
+                if stale_key:
+                    await cache.aset(stale_key, value, None)
+            else:
+                await acount(name, 'degraded')
+                await cache.aset(key, value, settings.DEGRADED_CACHE_TIMEOUT)
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    if stale_key:
+        value = await cache.aget(stale_key)
+        if value is not None:
+            await acount(name, 'stale')
+            return value
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = await cache.aget(key)
+        if value is not None:
+            await acount(name, 'hit')
+            return value
+
+    await acount(name, 'miss')
+    value, _ = await builder()
+    return value
+
+
+# ================== Rate limiting ==================
+def rate_limited(scope, client, limit, window):
+    """Фиксированное окно: True, если клиент превысил limit запросов за window секунд"""
+    key = f'ratelimit:{scope}:{client}:{int(time.time() // window)}'
+    if cache.add(key, 1, window):
+        return False
+    try:
+        return cache.incr(key) > limit
+    except ValueError:
+        return False
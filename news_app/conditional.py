@@ -0,0 +1,65 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.utils.translation import get_language, get_language_from_path
+from django.views.decorators.http import condition
+
+from . import caching
+
+
+def _etag_func(sections):
+    def etag(request, *args, **kwargs):
+        versions = caching.get_versions(sections)
+        parts = [
+            caching.release()[0],
+            request.path,
+            get_language(),
+            urlencode(sorted(request.GET.lists()), doseq=True),
+            *(str(versions[s]) for s in sections),
+        ]
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return etag
+
+
+def _last_modified_func(sections):
+    def last_modified(request, *args, **kwargs):
+        # Новые шаблоны меняют страницу и без изменения данных
+        return max(caching.get_last_modified(sections), caching.release()[1])
+    return last_modified
+
+
+def _finish(request, response, max_age):
+    # Без языкового префикса язык выбирается по cookie и Accept-Language
+    if get_language_from_path(request.path_info) is None:
+        patch_vary_headers(response, ('Accept-Language', 'Cookie'))
+    if max_age is None:
+        # Браузер каждый раз перепроверяет страницу, а не показывает её по эвристике Last-Modified
+        patch_cache_control(response, no_cache=True)
+    elif response.status_code in (200, 304):
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def conditional_page(sections, max_age=None):
+    """
+    ETag и Last-Modified из версий секций кэша и выкладки (без рендера и запросов к БД):
+    If-None-Match / If-Modified-Since получают 304 до выполнения view.
+    max_age — сколько секунд браузер и прокси используют ответ без перепроверки.
+    """
+    validators = condition(etag_func=_etag_func(sections), last_modified_func=_last_modified_func(sections))
+
+    def decorator(view):
+        conditional_view = validators(view)
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                return _finish(request, await conditional_view(request, *args, **kwargs), max_age)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                return _finish(request, conditional_view(request, *args, **kwargs), max_age)
+        return inner
+    return decorator
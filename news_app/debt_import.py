@@ -0,0 +1,353 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import secrets
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Debt
+from . import debts
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('inn', 'full_name', 'debt_amount', 'debt_type', 'status', 'description')
+REQUIRED = ('inn', 'full_name', 'debt_amount', 'debt_type', 'status')
+
+# Статус можно указать кодом или названием (как в админке)
+STATUS_ALIASES = {code: code for code, _ in Debt.STATUS_CHOICES}
+STATUS_ALIASES.update({label.lower(): code for code, label in Debt.STATUS_CHOICES})
+
+
+# ================== Readers ==================
+def iter_csv_rows(fileobj, encoding='utf-8-sig'):
+    """
+    Строки CSV как словари; файл читается потоком, построчно.
+    Ошибки кодировки и формата — ValueError с номером строки (как и ошибки XLSX)
+    """
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    try:
+        sample = fileobj.read(4096)
+    except UnicodeDecodeError:
+        raise ValueError(f"Файл не в кодировке {encoding}: сохраните его как CSV UTF-8")
+    fileobj.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(fileobj, dialect=dialect)
+    try:
+        for row in reader:
+            yield {(key or '').strip().lower(): value for key, value in row.items()}
+    except UnicodeDecodeError:
+        raise ValueError(f"Файл не в кодировке {encoding} (после строки {reader.line_num})")
+    except csv.Error as e:
+        raise ValueError(f"Ошибка формата CSV в строке {reader.line_num + 1}: {e}")
+
+
+def iter_xlsx_rows(fileobj):
+    """Строки первого листа XLSX; openpyxl в режиме read_only не держит файл в памяти"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Для импорта XLSX установите openpyxl")
+
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError):
+        raise ValueError("Файл не является книгой XLSX")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell or '').strip().lower() for cell in next(rows, [])]
+        for values in rows:
+            if not any(values):
+                continue
+            yield {
+                key: '' if value is None else str(value)
+                for key, value in zip(header, values)
+            }
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, name):
+    if name.lower().endswith(('.xlsx', '.xlsm')):
+        return iter_xlsx_rows(fileobj)
+    return iter_csv_rows(fileobj)
+
+
+# ================== Validation ==================
+def clean_row(row):
+    """Возвращает (данные для Debt, None) или (None, текст ошибки)"""
+    data = {field: (row.get(field) or '').strip() for field in FIELDS}
+
+    missing = [field for field in REQUIRED if not data[field]]
+    if missing:
+        return None, f"пустые поля: {', '.join(missing)}"
+    if not debts.INN_RE.match(data['inn']):
+        return None, "некорректный ИНН"
+    for field in ('full_name', 'debt_type'):
+        if len(data[field]) > Debt._meta.get_field(field).max_length:
+            return None, f"слишком длинное поле {field}"
+
+    try:
+        amount = Decimal(data['debt_amount'].replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        return None, "некорректная сумма"
+    if not amount.is_finite() or amount < 0 or amount >= Decimal('1e10'):
+        return None, "некорректная сумма"
+    data['debt_amount'] = amount.quantize(Decimal('0.01'))
+
+    status = STATUS_ALIASES.get(data['status'].lower())
+    if not status:
+        return None, f"неизвестный статус {data['status']}"
+    data['status'] = status
+    return data, None
+
+
+# ================== Import ==================
+class ImportStats:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return (
+            f"обработано: {self.processed}, создано: {self.created}, обновлено: {self.updated}, "
+            f"без изменений: {self.unchanged}, отклонено: {self.rejected}"
+        )
+
+
+class RejectedWriter:
+    """Отклонённые строки: номер строки, ошибка и исходные значения"""
+
+    def __init__(self, fileobj):
+        self.writer = csv.DictWriter(fileobj, fieldnames=('line', 'error') + FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, line, error, row):
+        self.writer.writerow({**row, 'line': line, 'error': error})
+
+
+def _fingerprint(key):
+    # 8 байт вместо строк: память на проверку повторов — десятки байт на строку файла
+    return int.from_bytes(hashlib.blake2b('\t'.join(key).encode(), digest_size=8).digest(), 'big')
+
+
+def _flush(batch, stats, rejected=None):
+    """Upsert пачки по (ИНН, тип долга): пишем только новые и реально изменившиеся строки"""
+    existing, ambiguous = {}, set()
+    for debt in Debt.objects.filter(inn__in={inn for inn, _ in batch}):
+        key = (debt.inn, debt.debt_type)
+        if key in existing:
+            ambiguous.add(key)
+        existing[key] = debt
+
+    to_create, to_update = [], []
+    deltas = {}  # изменения итогов DebtSummary: bulk-операции не вызывают сигналы
+    for key, (line, row, data) in batch.items():
+        if key in ambiguous:
+            # Какую из записей обновлять, не угадываем
+            stats.rejected += 1
+            if rejected:
+                rejected.write(line, "в реестре несколько долгов с этим ИНН и типом", row)
+            continue
+        debt = existing.get(key)
+        if debt is None:
+            to_create.append(Debt(**data))
+            debts.add_delta(deltas, (data['status'], data['debt_type']), 1, data['debt_amount'])
+            continue
+        old_key, old_amount = (debt.status, debt.debt_type), debt.debt_amount
+        changed = False
+        for field in FIELDS:
+            if getattr(debt, field) != data[field]:
+                setattr(debt, field, data[field])
+                changed = True
+        if changed:
+            to_update.append(debt)
+            debts.add_delta(deltas, old_key, -1, -old_amount)
+            debts.add_delta(deltas, (debt.status, debt.debt_type), 1, debt.debt_amount)
+        else:
+            stats.unchanged += 1
+
+    with transaction.atomic():
+        Debt.objects.bulk_create(to_create)
+        Debt.objects.bulk_update(to_update, FIELDS[1:])
+        debts.apply_summary(deltas)
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+
+    changed_inns = [d.inn for d in to_create] + [d.inn for d in to_update]
+    if changed_inns:
+        # bulk-операции не вызывают сигналы — сбрасываем кэш поиска по ИНН сами
+        transaction.on_commit(lambda: debts.invalidate(*changed_inns))
+
+
+def import_debts(rows, batch_size=1000, rejected=None, progress=None, dry_run=False):
+    """
+    Потоковый импорт: читает строки, валидирует и делает upsert по (ИНН, тип долга) пачками.
+    У одного ИНН может быть несколько долгов разных типов; повтор пары в файле отклоняется.
+    Повторный импорт того же файла ничего не пишет (idempotent).
+    dry_run — только проверка строк, без записи в БД.
+    """
+    stats = ImportStats()
+    batch = {}
+    seen = set()
+
+    def reject(line, error, row):
+        stats.rejected += 1
+        if rejected:
+            rejected.write(line, error, row)
+
+    def flush():
+        if not dry_run:
+            _flush(batch, stats, rejected)
+        batch.clear()
+        if progress:
+            progress(stats)
+
+    # Строка 1 — заголовок
+    for line, row in enumerate(rows, start=2):
+        stats.processed += 1
+        data, error = clean_row(row)
+        if error:
+            reject(line, error, row)
+            continue
+        key = (data['inn'], data['debt_type'])
+        fingerprint = _fingerprint(key)
+        if fingerprint in seen:
+            reject(line, "повтор ИНН и типа долга в файле", row)
+            continue
+        seen.add(fingerprint)
+        batch[key] = (line, row, data)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return stats
+
+
+def run_import(fileobj, name, rejected_path):
+    """
+    Импорт загруженного файла; отклонённые строки — в rejected_path (файл удаляется, если их нет).
+    Ошибка чтения файла — ValueError; пачки до неё уже записаны, повторный импорт безопасен
+    """
+    try:
+        with open(rejected_path, 'w', newline='', encoding='utf-8') as rejected_file:
+            stats = import_debts(iter_rows(fileobj, name), rejected=RejectedWriter(rejected_file))
+    except Exception:
+        os.remove(rejected_path)
+        raise
+    if not stats.rejected:
+        os.remove(rejected_path)
+    return stats
+
+
+# ================== Background ==================
+# Файлы фонового импорта в DEBT_IMPORT_REJECTED_ROOT (общем для воркеров):
+#   upload-<job>       — загруженный файл, удаляется после импорта
+#   import-<job>.json  — состояние и итоги для страницы импорта в админке
+#   rejected-<job>.csv — отклонённые строки
+JOB_RE = re.compile(r'^import-(\d{8}-\d{6}-[0-9a-f]{16})\.json$')
+RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Один поток: импорты идут по очереди и не пересчитывают итоги одних и тех же ИНН наперегонки
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='debt-import')
+    return _executor
+
+
+def new_job_id():
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(8)}"
+
+
+def rejected_name(job_id):
+    return f"rejected-{job_id}.csv"
+
+
+def _path(name):
+    return os.path.join(settings.DEBT_IMPORT_REJECTED_ROOT, name)
+
+
+def _write_status(job_id, status):
+    path = _path(f"import-{job_id}.json")
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def _run_job(job_id, source_path, status):
+    close_old_connections()
+    try:
+        with open(source_path, 'rb') as source:
+            stats = run_import(source, status['file'], _path(rejected_name(job_id)))
+        status.update(state=DONE, stats=stats.as_dict())
+    except ValueError as e:
+        status.update(state=FAILED, error=str(e))
+    except Exception:
+        logger.exception("Фоновый импорт долгов %s", job_id)
+        status.update(state=FAILED, error="внутренняя ошибка, подробности в логе сервера")
+    finally:
+        os.remove(source_path)
+        _write_status(job_id, status)
+        close_old_connections()
+
+
+def start_background_import(upload):
+    """
+    Сохраняет загруженный файл в закрытый каталог и импортирует его в фоне, не занимая запрос.
+    Возвращает Future; если воркер перезапустится посреди импорта, файл можно загрузить снова
+    """
+    os.makedirs(settings.DEBT_IMPORT_REJECTED_ROOT, exist_ok=True)
+    job_id = new_job_id()
+    source_path = _path(f"upload-{job_id}")
+    with open(source_path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+    status = {'job': job_id, 'file': upload.name, 'state': RUNNING}
+    _write_status(job_id, status)
+    return _get_executor().submit(_run_job, job_id, source_path, status)
+
+
+def recent_jobs(limit=10):
+    """Последние фоновые импорты, новые первыми; stats — ImportStats"""
+    try:
+        names = os.listdir(settings.DEBT_IMPORT_REJECTED_ROOT)
+    except FileNotFoundError:
+        return []
+    jobs = []
+    for name in sorted((n for n in names if JOB_RE.match(n)), reverse=True)[:limit]:
+        try:
+            with open(_path(name), encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if 'stats' in job:
+            stats = ImportStats()
+            vars(stats).update(job['stats'])
+            job['stats'] = stats
+        job['rejected_name'] = rejected_name(job['job'])
+        jobs.append(job)
+    return jobs
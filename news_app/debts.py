@@ -0,0 +1,185 @@
+import re
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum
+
+from .models import Debt, DebtSummary
+from . import caching
+from . import reference
+
+INN_RE = re.compile(r'^[0-9A-Za-z]{1,50}$')
+MAX_BATCH = 20
+
+
+def _cache_key(inn):
+    return f'debt:inn:{inn}'
+
+
+def parse_inns(values):
+    """ИНН из ?inn=1&inn=2 или ?inn=1,2; возвращает (корректные, ошибочные)"""
+    inns, invalid = [], []
+    for value in values:
+        for inn in value.split(','):
+            inn = inn.strip()
+            if not inn:
+                continue
+            if INN_RE.match(inn):
+                if inn not in inns:
+                    inns.append(inn)
+            else:
+                invalid.append(inn)
+    return inns, invalid
+
+
+def serialize(debt):
+    return {
+        'inn': debt.inn,
+        'full_name': debt.full_name,
+        'debt_amount': str(debt.debt_amount),
+        'debt_type': debt.debt_type,
+        'status': debt.status,
+        'status_display': debt.get_status_display(),
+        'description': debt.description,
+    }
+
+
+def lookup(inns):
+    """
+    Долги по списку ИНН: {inn: [долги]}.
+    Ответ для каждого ИНН кэшируется, в том числе пустой — случайные ИНН не доходят до БД.
+    """
+    found = cache.get_many([_cache_key(inn) for inn in inns])
+    result = {inn: found[_cache_key(inn)] for inn in inns if _cache_key(inn) in found}
+
+    missing = [inn for inn in inns if inn not in result]
+    if missing:
+        fetched = {inn: [] for inn in missing}
+        for debt in Debt.objects.filter(inn__in=missing).order_by('inn', 'id'):
+            fetched[debt.inn].append(serialize(debt))
+        cache.set_many({_cache_key(inn): debts for inn, debts in fetched.items()},
+                       settings.DEBT_LOOKUP_CACHE_TIMEOUT)
+        result.update(fetched)
+    return result
+
+
+def invalidate(*inns):
+    cache.delete_many([_cache_key(inn) for inn in inns if inn])
+
+
+# ================== Summary ==================
+# Итоги по (статус, тип) в DebtSummary: сохранение, удаление и импорт прибавляют к строкам
+# изменения в своей транзакции, поэтому итоги не расходятся с Debt при откате.
+# Читатели получают готовый словарь из reference.cached (секция версий SUMMARY_SECTION).
+SUMMARY_SECTION = 'debt_summary'
+CENT = Decimal('0.01')
+
+
+def add_delta(deltas, key, count, amount):
+    """Копит изменение итогов группы key = (статус, тип)"""
+    entry = deltas.setdefault(key, [0, Decimal(0)])
+    entry[0] += count
+    entry[1] += Decimal(str(amount)).quantize(CENT)
+
+
+def _bump_summary():
+    caching.bump_version(SUMMARY_SECTION)
+    reference.forget(SUMMARY_SECTION)
+
+
+def apply_summary(deltas):
+    """Прибавляет изменения к DebtSummary: F-выражения, строки по порядку — без гонок и взаимных блокировок"""
+    changed = sorted((key, count, amount) for key, (count, amount) in deltas.items() if count or amount)
+    if not changed:
+        return
+    with transaction.atomic():
+        for (status, debt_type), count, amount in changed:
+            rows = DebtSummary.objects.filter(status=status, debt_type=debt_type)
+            increment = {'count': F('count') + count, 'total_amount': F('total_amount') + amount}
+            if rows.update(**increment):
+                continue
+            try:
+                with transaction.atomic():
+                    DebtSummary.objects.create(status=status, debt_type=debt_type, count=count, total_amount=amount)
+            except IntegrityError:
+                # Строку группы только что создал параллельный запрос
+                rows.update(**increment)
+        # Опустевшие группы не показываются в фильтрах и виджетах
+        for (status, debt_type), count, _ in changed:
+            if count < 0:
+                DebtSummary.objects.filter(status=status, debt_type=debt_type, count__lte=0).delete()
+        transaction.on_commit(_bump_summary)
+
+
+def _build_summary():
+    labels = dict(Debt.STATUS_CHOICES)
+    by_status, by_type = {}, {}
+    for status, debt_type, count, amount in DebtSummary.objects.filter(count__gt=0).values_list(
+        'status', 'debt_type', 'count', 'total_amount'
+    ):
+        for groups, key in ((by_status, status), (by_type, debt_type)):
+            entry = groups.setdefault(key, [0, Decimal(0)])
+            entry[0] += count
+            entry[1] += amount.quantize(CENT)
+    return {
+        'count': sum(count for count, _ in by_status.values()),
+        'amount': str(sum((amount for _, amount in by_status.values()), Decimal('0.00'))),
+        'by_status': [
+            {'status': code, 'status_display': labels[code], 'count': by_status[code][0],
+             'amount': str(by_status[code][1])}
+            for code, _ in Debt.STATUS_CHOICES if code in by_status
+        ],
+        'by_type': [
+            {'debt_type': debt_type, 'count': count, 'amount': str(amount)}
+            for debt_type, (count, amount) in sorted(by_type.items(), key=lambda item: (-item[1][0], item[0]))
+        ],
+    }
+
+
+def summary():
+    """Итоги для виджетов и админки: всего, по статусам и по типам (без агрегатов по Debt)"""
+    return reference.cached(SUMMARY_SECTION, 'all', _build_summary)
+
+
+def rebuild_summary(batch_size=100000, dry_run=False, progress=None):
+    """
+    Пересчитывает итоги по Debt диапазонами id (агрегат по каждому — чтение по первичному ключу)
+    и заменяет DebtSummary. Возвращает расхождения {(статус, тип): ((было), (стало))}.
+    Изменения Debt во время пересчёта могут потеряться — запускать, когда импорт не идёт.
+    """
+    totals = {}
+    bounds = Debt.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is not None:
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            rows = (
+                Debt.objects.filter(id__gte=start, id__lt=start + batch_size).order_by()
+                .values('status', 'debt_type').annotate(count=Count('id'), amount=Sum('debt_amount'))
+            )
+            for row in rows:
+                add_delta(totals, (row['status'], row['debt_type']), row['count'], row['amount'])
+            if progress:
+                progress(min(start + batch_size - 1, bounds['high']), bounds['high'])
+
+    with transaction.atomic():
+        current = {
+            (status, debt_type): (count, amount)
+            for status, debt_type, count, amount in DebtSummary.objects.select_for_update().values_list(
+                'status', 'debt_type', 'count', 'total_amount'
+            )
+        }
+        expected = {key: (count, amount) for key, (count, amount) in totals.items() if count}
+        drift = {
+            key: (current.get(key), expected.get(key))
+            for key in current.keys() | expected.keys()
+            if current.get(key) != expected.get(key)
+        }
+        if not dry_run and drift:
+            DebtSummary.objects.all().delete()
+            DebtSummary.objects.bulk_create([
+                DebtSummary(status=status, debt_type=debt_type, count=count, total_amount=amount)
+                for (status, debt_type), (count, amount) in expected.items()
+            ])
+            transaction.on_commit(_bump_summary)
+    return drift
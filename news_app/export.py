@@ -0,0 +1,246 @@
+import logging
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.test import Client
+
+from .languages import fallback_chain
+from .models import NewsTranslation, GuideTranslation, RelatedNews
+
+logger = logging.getLogger(__name__)
+
+# Статическая копия публичных страниц для nginx (deploy/nginx.conf):
+#   /uz/              -> uz/index.html
+#   /uz/leaders       -> uz/leaders.html
+#   /uz/news/5        -> uz/news/5.html
+#   /uz/news?page=3   -> uz/news/page-3.html
+# Остальные URL (поиск, фильтр по категории, курсоры) обслуживает Django.
+LANGS = [code for code, _ in NewsTranslation.LANG_CHOICES]
+NEWS_PER_PAGE = 12
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.STATIC_EXPORT_WORKERS,
+            thread_name_prefix='static-export',
+        )
+    return _executor
+
+
+def output_path(root, url):
+    parts = urlsplit(url)
+    path = parts.path.strip('/')
+    if parts.query.startswith('page='):
+        return os.path.join(root, path, f"page-{parts.query[len('page='):]}.html")
+    if parts.path.endswith('/'):
+        return os.path.join(root, path, 'index.html')
+    return os.path.join(root, f'{path}.html')
+
+
+# ================== URLs ==================
+def _published(lang):
+    """Новости страниц языка: с переводами по цепочке TRANSLATION_FALLBACKS"""
+    return NewsTranslation.objects.in_language(lang).filter(is_published=True)
+
+
+def _showing_langs(lang):
+    """Языки, на страницах которых может стоять перевод на lang (сам язык и те, где он запасной)"""
+    return [code for code in LANGS if lang in fallback_chain(code)]
+
+
+def list_pages(lang):
+    return max(1, math.ceil(_published(lang).count() / NEWS_PER_PAGE))
+
+
+def list_urls(lang, first_page=1):
+    """Страницы all_news с first_page до последней (первая — ещё и без ?page)"""
+    urls = {f'/{lang}/news?page={page}' for page in range(first_page, list_pages(lang) + 1)}
+    if first_page == 1:
+        urls.add(f'/{lang}/news')
+    return urls
+
+
+def all_urls(langs=None):
+    urls = set()
+    for lang in langs or LANGS:
+        urls |= {f'/{lang}/', f'/{lang}/leaders'}
+        urls |= {
+            f'/{lang}/guide/{guide_type}'
+            for guide_type in GuideTranslation.objects.in_language(lang).values_list('guide__guide_type', flat=True)
+        }
+        urls |= {f'/{lang}/news/{news_id}' for news_id in _published(lang).values_list('news_id', flat=True)}
+        urls |= list_urls(lang)
+    return urls
+
+
+def _news_page(translation, lang):
+    """Номер страницы all_news языка, на которой стоит (или стоял бы) перевод"""
+    if translation.created_at is None:
+        return 1
+    newer = _published(lang).filter(created_at__gt=translation.created_at).count()
+    return newer // NEWS_PER_PAGE + 1
+
+
+def _news_translation_urls(translation, structural):
+    """
+    Страница новости, главная, страницы, где она в «похожих», и страницы списка:
+    при правке — только своя, при появлении/удалении — она и все следующие (сдвиг).
+    Для каждого языка, где перевод может подставляться вместо отсутствующего.
+    """
+    urls = set()
+    sources = list(RelatedNews.objects.filter(related=translation).values_list('source__news_id', flat=True))
+    for lang in _showing_langs(translation.lang):
+        page = _news_page(translation, lang)
+        urls |= {f'/{lang}/', f'/{lang}/news/{translation.news_id}'}
+        urls |= list_urls(lang, page) if structural else {f'/{lang}/news?page={page}'}
+        if page == 1:
+            urls.add(f'/{lang}/news')
+        urls |= {f'/{lang}/news/{news_id}' for news_id in sources}
+    return urls
+
+
+def _all_news_urls(instance, structural):
+    urls = set()
+    for lang in LANGS:
+        urls |= {f'/{lang}/'} | list_urls(lang)
+        urls |= {f'/{lang}/news/{news_id}' for news_id in _published(lang).values_list('news_id', flat=True)}
+    return urls
+
+
+def _news_urls(news, structural):
+    # Публикация и дата новости сдвигают весь список
+    urls = set()
+    for translation in news.translations.all():
+        urls |= _news_translation_urls(translation, structural=True)
+        urls |= list_urls(translation.lang)
+    return urls
+
+
+def _guide_translation_urls(translation, structural):
+    return {
+        url
+        for lang in _showing_langs(translation.lang)
+        for url in (f'/{lang}/', f'/{lang}/guide/{translation.guide.guide_type}')
+    }
+
+
+def _guide_urls(guide, structural):
+    return {url for lang in LANGS for url in (f'/{lang}/', f'/{lang}/guide/{guide.guide_type}')}
+
+
+def _leaders_urls(instance, structural):
+    return {url for lang in LANGS for url in (f'/{lang}/', f'/{lang}/leaders')}
+
+
+def _homepage_urls(instance, structural):
+    return {f'/{lang}/' for lang in LANGS}
+
+
+# Модель -> функция (экземпляр, structural) -> затронутые URL
+DEPENDENCIES = {
+    'News': _news_urls,
+    'NewsTranslation': _news_translation_urls,
+    'Category': _all_news_urls,
+    'CategoryTranslation': _all_news_urls,
+    'Guide': _guide_urls,
+    'GuideTranslation': _guide_translation_urls,
+    'Leaders': _leaders_urls,
+    'Partners': _homepage_urls,
+}
+
+
+def affected_urls(instance, structural=False):
+    return DEPENDENCIES[type(instance).__name__](instance, structural)
+
+
+# ================== Rendering ==================
+def _write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.export-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def _render_one(root, url):
+    """Рендер через полный стек middleware; не-200 (например, снятая новость) удаляет файл"""
+    close_old_connections()
+    try:
+        host = urlsplit(settings.SITE_URL).hostname or 'localhost'
+        response = Client(HTTP_HOST=host).get(url)
+        path = output_path(root, url)
+        if response.status_code == 200:
+            _write_file(path, response.content)
+            return True
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    finally:
+        close_old_connections()
+
+
+def _prune_list_pages(root, langs):
+    """Удаляет страницы списка за последней (после удаления/снятия новостей)"""
+    for lang in langs:
+        directory = os.path.join(root, lang, 'news')
+        if not os.path.isdir(directory):
+            continue
+        last = list_pages(lang)
+        for name in os.listdir(directory):
+            if name.startswith('page-') and name.endswith('.html'):
+                number = name[len('page-'):-len('.html')]
+                if number.isdigit() and int(number) > last:
+                    os.remove(os.path.join(directory, name))
+
+
+def render(urls, root=None, workers=None):
+    """Параллельный рендер URL в root; возвращает (записано, удалено)"""
+    root = root or settings.STATIC_EXPORT_ROOT
+    urls = sorted(urls)
+    with ThreadPoolExecutor(max_workers=workers or settings.STATIC_EXPORT_WORKERS) as executor:
+        results = list(executor.map(lambda url: _render_one(root, url), urls))
+    _prune_list_pages(root, {urlsplit(url).path.split('/')[1] for url in urls if urlsplit(url).path.endswith('/news')})
+    written = sum(results)
+    return written, len(results) - written
+
+
+# ================== Signals ==================
+_pending = threading.local()
+
+
+def schedule(instance, structural=False):
+    """
+    Собирает затронутые URL за транзакцию и после коммита перерисовывает их в фоне.
+    Ничего не делает, если STATIC_EXPORT_ROOT не задан.
+    """
+    if not settings.STATIC_EXPORT_ROOT:
+        return
+    urls = _pending.__dict__.setdefault('urls', set())
+    urls |= affected_urls(instance, structural)
+
+    def run():
+        if not urls:
+            return
+        batch = set(urls)
+        urls.clear()
+        _get_executor().submit(_render_batch, batch)
+    transaction.on_commit(run)
+
+
+def _render_batch(urls):
+    try:
+        written, removed = render(urls)
+        logger.info("Static export: %d pages written, %d removed", written, removed)
+    except Exception:
+        logger.exception("Static export failed")
@@ -0,0 +1,226 @@
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import feedgenerator, translation
+from django.utils.translation import gettext
+
+from .models import NewsTranslation, GuideTranslation
+
+# Карты сайта и RSS/Atom пишутся статическими файлами в MEDIA_ROOT/feeds и отдаются веб-сервером.
+# Новости разбиты на шарды по news_id: сохранение новости переписывает только её шард.
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+LANGS = [code for code, _ in NewsTranslation.LANG_CHOICES]
+
+# msgid названия сайта из шаблонов
+SITE_TITLE = "Kambag'allikni qisqartirish"
+
+# Подставляется вместо id при однократном reverse на язык
+_ID_PLACEHOLDER = 987654321
+
+
+def feeds_root():
+    return os.path.join(settings.MEDIA_ROOT, 'feeds')
+
+
+def feeds_url(name):
+    return f"{settings.MEDIA_URL}feeds/{name}"
+
+
+def _absolute(path):
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def _write(name, content):
+    """Атомарная запись: читатель видит либо старый, либо новый файл целиком"""
+    root = feeds_root()
+    os.makedirs(root, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=f'.{name}.')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, os.path.join(root, name))
+
+
+def _remove(name):
+    try:
+        os.remove(os.path.join(feeds_root(), name))
+    except FileNotFoundError:
+        pass
+
+
+def _news_path(lang):
+    """Шаблон пути страницы новости для языка: '/uz/news/{}'"""
+    with translation.override(lang):
+        return reverse('news_detail', kwargs={'news_id': _ID_PLACEHOLDER}).replace(str(_ID_PLACEHOLDER), '{}')
+
+
+def _guide_path(lang, guide_type):
+    with translation.override(lang):
+        return reverse('guide', kwargs={'guide_type': guide_type})
+
+
+# ================== Sitemaps ==================
+def _urlset(entries):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<urlset xmlns="{SITEMAP_NS}">']
+    for location, lastmod in entries:
+        lastmod = f'<lastmod>{lastmod.date().isoformat()}</lastmod>' if lastmod else ''
+        lines.append(f'<url><loc>{escape(location)}</loc>{lastmod}</url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+def news_shard(news_id):
+    return news_id // settings.SITEMAP_SHARD_SIZE
+
+
+def _news_shard_name(lang, shard):
+    return f'sitemap-news-{lang}-{shard}.xml'
+
+
+def write_news_shard(lang, shard):
+    """Переписывает один шард карты новостей (пустой шард удаляется)"""
+    size = settings.SITEMAP_SHARD_SIZE
+    rows = (
+        NewsTranslation.objects
+        .filter(lang=lang, is_published=True, news_id__gte=shard * size, news_id__lt=(shard + 1) * size)
+        .order_by('news_id')
+        .values_list('news_id', 'created_at')
+    )
+    path = _news_path(lang)
+    entries = [(_absolute(path.format(news_id)), created_at) for news_id, created_at in rows]
+    name = _news_shard_name(lang, shard)
+    if not entries:
+        _remove(name)
+        return None
+    _write(name, _urlset(entries))
+    return name
+
+
+def write_guides_sitemap(lang):
+    guide_types = (
+        GuideTranslation.objects.filter(lang=lang)
+        .order_by('guide__guide_type').values_list('guide__guide_type', flat=True).distinct()
+    )
+    entries = [(_absolute(_guide_path(lang, guide_type)), None) for guide_type in guide_types]
+    name = f'sitemap-guides-{lang}.xml'
+    if not entries:
+        _remove(name)
+        return None
+    _write(name, _urlset(entries))
+    return name
+
+
+def write_sitemap_index():
+    """Индекс по файлам шардов на диске (дата изменения файла — lastmod)"""
+    root = feeds_root()
+    names = sorted(n for n in os.listdir(root) if n.startswith('sitemap-') and n.endswith('.xml'))
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{SITEMAP_NS}">']
+    for name in names:
+        modified = os.path.getmtime(os.path.join(root, name))
+        lastmod = feedgenerator.rfc3339_date(datetime.fromtimestamp(modified, timezone.utc))
+        lines.append(
+            f'<sitemap><loc>{escape(_absolute(feeds_url(name)))}</loc><lastmod>{lastmod}</lastmod></sitemap>'
+        )
+    lines.append('</sitemapindex>')
+    _write('sitemap.xml', '\n'.join(lines) + '\n')
+
+
+# ================== RSS / Atom ==================
+def _write_feeds(prefix, lang, title, link, items):
+    """items — (заголовок, путь, описание, дата)"""
+    for extension, feed_class in (('rss', feedgenerator.Rss201rev2Feed), ('atom', feedgenerator.Atom1Feed)):
+        feed = feed_class(
+            title=title,
+            link=_absolute(link),
+            description=title,
+            language=lang,
+            feed_url=_absolute(feeds_url(f'{prefix}-{lang}.{extension}')),
+        )
+        for item_title, path, description, pubdate in items:
+            url = _absolute(path)
+            feed.add_item(title=item_title, link=url, description=description, pubdate=pubdate, unique_id=url)
+        _write(f'{prefix}-{lang}.{extension}', feed.writeString('utf-8'))
+
+
+def write_news_feeds(lang):
+    """Последние FEED_ITEMS опубликованных новостей языка (индекс lang, -created_at)"""
+    news = (
+        NewsTranslation.objects.filter(lang=lang, is_published=True)
+        .order_by('-created_at', '-id')
+        .only('news_id', 'title', 'short_description', 'created_at')[:settings.FEED_ITEMS]
+    )
+    path = _news_path(lang)
+    with translation.override(lang):
+        title = f"{gettext('Yangiliklar')} - {gettext(SITE_TITLE)}"
+        link = reverse('all_news')
+    items = [(n.title, path.format(n.news_id), n.short_description, n.created_at) for n in news]
+    _write_feeds('news', lang, title, link, items)
+
+
+def write_guide_feeds(lang):
+    guides = GuideTranslation.objects.filter(lang=lang).select_related('guide').order_by('-guide_id')
+    with translation.override(lang):
+        title = f"{gettext('Dasturlari bilan tanishing')} - {gettext(SITE_TITLE)}"
+        link = reverse('home')
+    items = [
+        (g.title, _guide_path(lang, g.guide.guide_type), g.short_description or g.description, None)
+        for g in guides
+    ]
+    _write_feeds('guides', lang, title, link, items)
+
+
+# ================== Updates ==================
+def update_news(lang, news_id):
+    write_news_shard(lang, news_shard(news_id))
+    write_news_feeds(lang)
+    write_sitemap_index()
+
+
+def update_guides(lang):
+    write_guides_sitemap(lang)
+    write_guide_feeds(lang)
+    write_sitemap_index()
+
+
+def rebuild_all():
+    """Полная пересборка (после массовой загрузки в обход сигналов); возвращает число шардов"""
+    os.makedirs(feeds_root(), exist_ok=True)
+    written = set()
+    for lang in LANGS:
+        news_ids = NewsTranslation.objects.filter(lang=lang, is_published=True).values_list('news_id', flat=True)
+        for shard in sorted({news_shard(news_id) for news_id in news_ids.iterator(chunk_size=10000)}):
+            written.add(write_news_shard(lang, shard))
+        written.add(write_guides_sitemap(lang))
+        write_news_feeds(lang)
+        write_guide_feeds(lang)
+    # Устаревшие шарды удаляем после записи новых, чтобы индекс не ссылался на пустоту
+    for name in os.listdir(feeds_root()):
+        if name.startswith('sitemap-') and name not in written:
+            _remove(name)
+    write_sitemap_index()
+    return len(written - {None})
+
+
+_pending = threading.local()
+
+
+def schedule(job, *args):
+    """
+    Выполняет job(*args) после коммита, один раз на транзакцию:
+    повторные сохранения (новость и её переводы) переписывают файлы один раз.
+    """
+    key = (job, *args)
+    pending = _pending.__dict__.setdefault('jobs', set())
+    pending.add(key)
+
+    def run():
+        if key in pending:
+            pending.discard(key)
+            job(*args)
+    transaction.on_commit(run)
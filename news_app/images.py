@@ -0,0 +1,231 @@
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .storage import content_storage
+
+logger = logging.getLogger(__name__)
+
+# Модель -> поле с изображением, для которого строятся уменьшенные копии
+IMAGE_FIELDS = {
+    'NewsTranslation': 'image',
+    'Leaders': 'leader_image',
+    'Partners': 'image',
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+# Задачи в работе по имени файла: переводы с общим файлом не генерируют копии параллельно
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            thread_name_prefix='image-variants',
+        )
+    return _executor
+
+
+def variant_name(name, width, fmt):
+    """news/photo.jpg -> variants/news/photo-640.webp"""
+    stem = posixpath.splitext(name)[0]
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    return f"variants/{stem}-{width}.{extension}"
+
+
+# ================== Manifest ==================
+# Какие копии есть, записывается при генерации (ImageVariants) — шаблоны не опрашивают хранилище.
+# Найденные записи запоминаются в памяти воркера (копии файла с тем же именем не меняются),
+# отсутствие записи — в общем кэше на IMAGE_VARIANT_MISS_TIMEOUT, пока копии не созданы
+_manifest = {}
+
+
+def _manifest_key(name):
+    return f'image_variants:{name}'
+
+
+def variant_widths(name):
+    """Ширины созданных копий по манифесту; пустой кортеж — копий нет или они ещё не созданы"""
+    widths = _manifest.get(name)
+    if widths is not None:
+        return widths
+    cached = cache.get(_manifest_key(name))
+    if cached is None:
+        row = apps.get_model('news_app', 'ImageVariants').objects.filter(name=name).values_list(
+            'widths', flat=True
+        ).first()
+        if row is None:
+            cache.set(_manifest_key(name), False, settings.IMAGE_VARIANT_MISS_TIMEOUT)
+            return ()
+        cached = tuple(row)
+        cache.set(_manifest_key(name), cached, None)
+    if cached is False:
+        return ()
+    if len(_manifest) >= settings.IMAGE_VARIANT_MANIFEST_SIZE:
+        _manifest.clear()
+    _manifest[name] = cached
+    return cached
+
+
+def existing_variants(name, fmt):
+    """Список (ширина, имя файла) созданных копий"""
+    return [(width, variant_name(name, width, fmt)) for width in variant_widths(name)]
+
+
+def _record_variants(name, widths):
+    widths = sorted(widths)
+    apps.get_model('news_app', 'ImageVariants').objects.update_or_create(name=name, defaults={'widths': widths})
+    cache.set(_manifest_key(name), tuple(widths), None)
+    _manifest.pop(name, None)
+
+
+def _forget_variants(name):
+    apps.get_model('news_app', 'ImageVariants').objects.filter(name=name).delete()
+    cache.delete(_manifest_key(name))
+    _manifest.pop(name, None)
+
+
+def generate_variants(name, force=False):
+    """Создаёт копии изображения на всех ширинах и форматах; возвращает число новых файлов"""
+    from PIL import Image, ImageOps
+
+    # Имя файла уникально для загрузки: если манифест уже есть, картинка не менялась
+    if not force and apps.get_model('news_app', 'ImageVariants').objects.filter(name=name).exists():
+        return 0
+
+    created = 0
+    widths = []
+    with default_storage.open(name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        # Не увеличиваем: ширины больше оригинала пропускаем
+        if width >= original.width:
+            continue
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        widths.append(width)
+
+        for fmt, (pil_format, options) in FORMATS.items():
+            target = variant_name(name, width, fmt)
+            if not force and default_storage.exists(target):
+                continue
+            image = resized
+            if pil_format == 'JPEG' and image.mode != 'RGB':
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+                image = background
+            buffer = BytesIO()
+            image.save(buffer, pil_format, **options)
+            if force and default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+            created += 1
+    _record_variants(name, widths)
+    return created
+
+
+def _generate_safely(name):
+    try:
+        return generate_variants(name)
+    except Exception:
+        logger.exception("Не удалось создать копии изображения %s", name)
+        return 0
+
+
+def schedule_variants(name):
+    """Ставит генерацию копий в пул потоков, чтобы не задерживать сохранение"""
+    if not name:
+        return None
+    with _in_flight_lock:
+        future = _in_flight.get(name)
+        if future is None or future.done():
+            future = _get_executor().submit(_generate_safely, name)
+            _in_flight[name] = future
+            future.add_done_callback(lambda done: _forget(name, done))
+        return future
+
+
+def _forget(name, future):
+    with _in_flight_lock:
+        if _in_flight.get(name) is future:
+            del _in_flight[name]
+
+
+def delete_variants(name):
+    _forget_variants(name)
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        for fmt in FORMATS:
+            target = variant_name(name, width, fmt)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+
+
+# ================== References ==================
+def references(name):
+    """Сколько записей ссылается на файл (после дедупликации файл общий для переводов)"""
+    return sum(
+        apps.get_model('news_app', model_name).objects.filter(**{field_name: name}).count()
+        for model_name, field_name in IMAGE_FIELDS.items()
+    )
+
+
+def _recently_saved(name):
+    try:
+        modified = content_storage.get_modified_time(name)
+    except FileNotFoundError:
+        return False
+    return modified > timezone.now() - timedelta(seconds=settings.IMAGE_RELEASE_GRACE)
+
+
+def _release_later(name):
+    close_old_connections()
+    try:
+        release(name)
+    except Exception:
+        logger.exception("Не удалось освободить %s", name)
+    finally:
+        close_old_connections()
+
+
+def release(name):
+    """
+    Удаляет файл и его копии, если на него больше никто не ссылается.
+    Проверка и удаление идут под той же блокировкой, что и content_storage.save(), который
+    обновляет время изменения уже существующего файла. Недавно сохранённый файл проверяется
+    повторно через IMAGE_RELEASE_GRACE: запись, которая на него сошлётся, может быть ещё не закоммичена.
+    """
+    if not name:
+        return False
+    with content_storage.lock(name):
+        if references(name):
+            return False
+        if _recently_saved(name):
+            timer = threading.Timer(settings.IMAGE_RELEASE_GRACE, _release_later, (name,))
+            timer.daemon = True
+            timer.start()
+            return False
+        delete_variants(name)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+    return True
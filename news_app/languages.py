@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation.trans_real import LANG_INFO
 
@@ -7,4 +8,9 @@ LANG_INFO['kaa'] = {
     'code': 'kaa',
     'name': 'Karakalpak',
     'name_local': 'Qaraqalpaqsha',
-}
\ No newline at end of file
+}
+
+
+def fallback_chain(lang):
+    """Язык и его запасные языки по порядку: kaa -> ['kaa', 'uz', 'ru']"""
+    return list(dict.fromkeys([lang, *settings.TRANSLATION_FALLBACKS.get(lang, ())]))
@@ -0,0 +1,299 @@
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from socketserver import ThreadingMixIn
+from urllib.parse import quote, urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from .models import Category, Debt, Guide, Leaders, NewsTranslation
+from .profiling import percentile
+
+# Нагрузочный прогон всего стека (middleware, LocaleMiddleware, БД, кэш) через настоящий HTTP.
+# Смесь запросов приближена к реальному трафику: в основном главная и новости, немного поиска.
+
+# Доля языков в трафике (остальные языки из LANGUAGES получают вес 1)
+LANG_WEIGHTS = {'uz': 6, 'ru': 3, 'kaa': 1}
+
+# Эндпоинт -> вес в смеси
+MIX = {
+    'home': 25,
+    'news_detail': 30,
+    'all_news': 12,
+    'all_news_page': 5,
+    'all_news_search': 5,
+    'all_news_category': 5,
+    'suggest': 8,
+    'guide': 5,
+    'leaders': 4,
+    'leaders_api': 4,
+    'debt_lookup': 2,
+    'debt_summary_api': 2,
+    # Без языкового префикса: LocaleMiddleware выбирает язык и отвечает редиректом
+    'root_redirect': 3,
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+# ================== Traffic mix ==================
+class TrafficMix:
+    """Генератор (эндпоинт, URL, заголовки) по данным текущей базы"""
+
+    def __init__(self, langs, sample=500):
+        self.langs = list(langs)
+        self.lang_weights = [LANG_WEIGHTS.get(lang, 1) for lang in self.langs]
+        self.endpoints = list(MIX)
+        self.endpoint_weights = list(MIX.values())
+        self.news_ids = {
+            lang: list(
+                NewsTranslation.objects.filter(lang=lang, is_published=True)
+                .order_by('?').values_list('news_id', flat=True)[:sample]
+            )
+            for lang in self.langs
+        }
+        self.words = {
+            lang: [
+                title.split()[0]
+                for title in NewsTranslation.objects.filter(lang=lang).values_list('title', flat=True)[:50]
+                if title.split()
+            ] or ['news']
+            for lang in self.langs
+        }
+        self.pages = {
+            lang: max(1, NewsTranslation.objects.filter(lang=lang, is_published=True).count() // 12)
+            for lang in self.langs
+        }
+        self.categories = list(Category.objects.values_list('slug', flat=True)[:50])
+        self.guide_types = list(Guide.objects.values_list('guide_type', flat=True).distinct()) or ['loan']
+        self.inns = list(Debt.objects.order_by('?').values_list('inn', flat=True)[:sample]) or ['000000000']
+        self.regions = [code for code, _ in Leaders.REGION_CHOICES]
+
+    def pick(self, rnd):
+        lang = rnd.choices(self.langs, self.lang_weights)[0]
+        endpoint = rnd.choices(self.endpoints, self.endpoint_weights)[0]
+        news_ids = self.news_ids[lang]
+        if endpoint == 'news_detail' and not news_ids:
+            endpoint = 'home'
+
+        headers = {'Accept-Language': lang}
+        if endpoint == 'home':
+            url = f'/{lang}/'
+        elif endpoint == 'news_detail':
+            url = f'/{lang}/news/{rnd.choice(news_ids)}'
+        elif endpoint == 'all_news':
+            url = f'/{lang}/news'
+        elif endpoint == 'all_news_page':
+            url = f'/{lang}/news?page={rnd.randint(1, self.pages[lang])}'
+        elif endpoint == 'all_news_search':
+            url = f'/{lang}/news?search={quote(rnd.choice(self.words[lang]))}'
+        elif endpoint == 'all_news_category':
+            category = rnd.choice(self.categories) if self.categories else ''
+            url = f'/{lang}/news?category={category}'
+        elif endpoint == 'suggest':
+            word = rnd.choice(self.words[lang])
+            url = f'/{lang}/news/suggest?q={quote(word[:rnd.randint(1, len(word))])}'
+        elif endpoint == 'guide':
+            url = f'/{lang}/guide/{rnd.choice(self.guide_types)}'
+        elif endpoint == 'leaders':
+            url = f'/{lang}/leaders'
+        elif endpoint == 'leaders_api':
+            url = f'/{lang}/api/leaders?region={quote(rnd.choice(self.regions))}'
+        elif endpoint == 'debt_lookup':
+            url = f'/{lang}/debts/lookup?inn={rnd.choice(self.inns)}'
+        elif endpoint == 'debt_summary_api':
+            url = f'/{lang}/api/debts/summary'
+        else:
+            url = '/'
+        return endpoint, url, headers
+
+
+# ================== Servers ==================
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    # Очередь соединений под большую конкурентность
+    request_queue_size = 1024
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервер завершился с кодом {process.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер не поднялся на порту {port} за {timeout} с")
+
+
+class LocalServer:
+    """
+    Локальный сервер на свободном порту:
+      wsgiref  — в этом процессе, поток на запрос (без внешних зависимостей);
+      gunicorn — gosnews.wsgi в отдельном процессе с workers воркерами;
+      uvicorn  — gosnews.asgi в отдельном процессе с workers воркерами.
+    """
+
+    KINDS = ('wsgiref', 'gunicorn', 'uvicorn')
+
+    def __init__(self, kind='wsgiref', workers=1):
+        self.kind = kind
+        self.workers = workers
+        self.port = _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._server = None
+        self._process = None
+
+    def _command(self):
+        if self.kind == 'gunicorn':
+            return [
+                'gunicorn', 'gosnews.wsgi:application', '--bind', f'127.0.0.1:{self.port}',
+                '--workers', str(self.workers), '--log-level', 'warning',
+            ]
+        return [
+            'uvicorn', 'gosnews.asgi:application', '--host', '127.0.0.1', '--port', str(self.port),
+            '--workers', str(self.workers), '--log-level', 'warning', '--no-access-log',
+        ]
+
+    def __enter__(self):
+        if self.kind == 'wsgiref':
+            self._server = make_server(
+                '127.0.0.1', self.port, get_wsgi_application(),
+                server_class=_ThreadingWSGIServer, handler_class=_QuietHandler,
+            )
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            return self
+
+        command = self._command()
+        if shutil.which(command[0]) is None:
+            raise RuntimeError(f"{command[0]} не установлен (requirements.txt)")
+        self._process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=sys.stderr,
+        )
+        try:
+            _wait_for_port(self.port, self._process)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+
+# ================== Load ==================
+class _Client:
+    """HTTP-клиент одного виртуального пользователя (keep-alive, если сервер его держит)"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host, self.port, self.timeout = parts.hostname, parts.port or 80, timeout
+        self.connection = None
+
+    def get(self, url, headers):
+        if self.connection is None:
+            self.connection = HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.connection.request('GET', url, headers=headers)
+            response = self.connection.getresponse()
+            body = response.read()
+        except Exception:
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        return response.status, len(body)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_stage(base_url, mix, concurrency, duration, seed=0, timeout=30):
+    """
+    concurrency пользователей шлют запросы без пауз duration секунд.
+    Возвращает (замеры, фактическая длительность); замер — (эндпоинт, статус или 0, мс, байты).
+    """
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(number):
+        rnd = random.Random(seed * 100003 + number)
+        client = _Client(base_url, timeout)
+        local = []
+        while time.perf_counter() < deadline:
+            endpoint, url, headers = mix.pick(rnd)
+            started = time.perf_counter()
+            try:
+                status, size = client.get(url, headers)
+            except Exception:
+                status, size = 0, 0
+            local.append((endpoint, status, (time.perf_counter() - started) * 1000, size))
+        client.close()
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def _summary(samples, elapsed):
+    latencies = sorted(ms for _, _, ms, _ in samples)
+    # Ошибки — 5xx и сбои соединения; 4xx (например, 429 лимита поиска долгов) считаются отдельно
+    errors = sum(1 for _, status, _, _ in samples if status == 0 or status >= 500)
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        **{f'p{p}_ms': round(percentile(latencies, p), 3) for p in PERCENTILES},
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'client_errors': sum(1 for _, status, _, _ in samples if 400 <= status < 500),
+        'bytes': sum(size for _, _, _, size in samples),
+    }
+
+
+def summarize(samples, elapsed):
+    """Итог ступени: всего и по эндпоинтам"""
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+    return {
+        'total': _summary(samples, elapsed),
+        'endpoints': {name: _summary(items, elapsed) for name, items in sorted(by_endpoint.items())},
+    }
@@ -0,0 +1,391 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .languages import fallback_chain
+from .models import NewsTranslation, TranslationJob, TranslationMemory
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+# Фоновый перевод недостающих языков новостей и гайдов.
+# Сохранение перевода редактором ставит в очередь (TranslationJob) языки, на которых у объекта
+# нет перевода редактора; очередь разбирается пачками: тексты режутся на сегменты (абзацы HTML),
+# сегменты ищутся в памяти переводов (TranslationMemory), остальные уходят переводчику
+# одним запросом на пару языков. Перевод сохраняется с machine_translated=True.
+# Очередь разбирает поток этого процесса или, при MACHINE_TRANSLATION_CELERY, воркер Celery.
+LANGS = [code for code, _ in NewsTranslation.LANG_CHOICES]
+
+# Модель перевода -> переводимые поля
+FIELDS = {
+    'NewsTranslation': ('title', 'short_title', 'short_description', 'description'),
+    'GuideTranslation': ('title', 'short_title', 'short_description', 'description'),
+}
+# Поля, которые копируются из исходного перевода как есть
+COPIED = {
+    'NewsTranslation': ('image', 'category'),
+    'GuideTranslation': (),
+}
+
+# Границы блоков HTML и переводы строк: текст между ними — отдельный сегмент,
+# так повторяющиеся абзацы (подписи, контакты) находятся в памяти переводов
+BOUNDARY_RE = re.compile(
+    r'(<(?:/?(?:p|div|li|ul|ol|h[1-6]|blockquote|table|thead|tbody|tr|td|th|figure|figcaption)\b[^>]*'
+    r'|br\s*/?)>|\n+)',
+    re.IGNORECASE,
+)
+TEXT_RE = re.compile(r'\w')
+
+
+# ================== Backends ==================
+class StubBackend:
+    """Локальный переводчик для разработки и тестов: помечает текст языком, без сети"""
+    name = 'stub'
+
+    def translate(self, texts, source_lang, target_lang):
+        return [f'[{target_lang}] {text}' for text in texts]
+
+
+class HttpBackend:
+    """
+    Сервис с API LibreTranslate: POST {url}/translate, q — список сегментов, format=html.
+    Адрес и ключ — MACHINE_TRANSLATION_URL и MACHINE_TRANSLATION_API_KEY.
+    """
+    name = 'http'
+
+    def __init__(self):
+        import requests
+        self.session = requests.Session()
+        self.url = settings.MACHINE_TRANSLATION_URL.rstrip('/') + '/translate'
+
+    def translate(self, texts, source_lang, target_lang):
+        payload = {'q': texts, 'source': source_lang, 'target': target_lang, 'format': 'html'}
+        if settings.MACHINE_TRANSLATION_API_KEY:
+            payload['api_key'] = settings.MACHINE_TRANSLATION_API_KEY
+        response = self.session.post(self.url, json=payload, timeout=settings.MACHINE_TRANSLATION_TIMEOUT)
+        response.raise_for_status()
+        translated = response.json()['translatedText']
+        if len(translated) != len(texts):
+            raise ValueError(f"Переводчик вернул {len(translated)} сегментов вместо {len(texts)}")
+        return translated
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """Переводчик из MACHINE_TRANSLATION_BACKEND; None — фоновый перевод выключен"""
+    if not settings.MACHINE_TRANSLATION_BACKEND:
+        return None
+    return import_string(settings.MACHINE_TRANSLATION_BACKEND)()
+
+
+# ================== Segments ==================
+def split_segments(text):
+    """Части текста: (сегмент для перевода или None, исходный кусок) — разметка и пробелы не переводятся"""
+    parts = []
+    for piece in BOUNDARY_RE.split(text or ''):
+        if not piece:
+            continue
+        stripped = piece.strip()
+        if BOUNDARY_RE.fullmatch(piece) or not TEXT_RE.search(stripped):
+            parts.append((None, piece))
+        else:
+            parts.append((stripped, piece))
+    return parts
+
+
+def join_segments(parts, translations):
+    return ''.join(
+        piece if segment is None else piece.replace(segment, translations[segment], 1)
+        for segment, piece in parts
+    )
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def translate_segments(backend, source_lang, target_lang, segments, stats):
+    """Сегмент -> перевод: сначала память переводов, недостающее — переводчику пачками"""
+    hashes = {source_hash(segment): segment for segment in segments}
+    found = {}
+    hash_list = list(hashes)
+    for start in range(0, len(hash_list), 500):
+        found.update(
+            TranslationMemory.objects.filter(
+                source_lang=source_lang, target_lang=target_lang, source_hash__in=hash_list[start:start + 500],
+            ).values_list('source_hash', 'translated_text')
+        )
+    result = {hashes[digest]: text for digest, text in found.items()}
+    stats['memory_hits'] += len(result)
+
+    missing = [segment for digest, segment in hashes.items() if digest not in found]
+    batch_size = settings.MACHINE_TRANSLATION_BATCH_SIZE
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        translated = backend.translate(batch, source_lang, target_lang)
+        TranslationMemory.objects.bulk_create([
+            TranslationMemory(
+                source_lang=source_lang, target_lang=target_lang, source_hash=source_hash(segment),
+                source_text=segment, translated_text=text, backend=backend.name,
+            )
+            for segment, text in zip(batch, translated)
+        ], ignore_conflicts=True)
+        result.update(zip(batch, translated))
+        stats['backend_segments'] += len(batch)
+        stats['backend_requests'] += 1
+    return result
+
+
+# ================== Queue ==================
+def enqueue(model_name, parent_ids, refresh=True):
+    """
+    Ставит в очередь языки объектов без перевода редактора; с refresh — и языки с машинным
+    переводом (исходный текст изменился). Возвращает число поставленных задач.
+    """
+    model = apps.get_model('news_app', model_name)
+    parent = f'{model.TRANSLATION_PARENT}_id'
+    existing = {
+        (pk, lang): machine
+        for pk, lang, machine in model.objects.filter(**{f'{parent}__in': parent_ids})
+        .values_list(parent, 'lang', 'machine_translated')
+    }
+    sources = sorted({pk for (pk, _), machine in existing.items() if not machine})
+    wanted = [
+        (pk, lang) for pk in sources for lang in LANGS
+        if (pk, lang) not in existing or (refresh and existing[(pk, lang)])
+    ]
+    if not wanted:
+        return 0
+
+    TranslationJob.objects.bulk_create([
+        TranslationJob(model=model_name, object_id=pk, target_lang=lang) for pk, lang in wanted
+    ], ignore_conflicts=True)
+    wanted_set = set(wanted)
+    done = [
+        pk for pk, object_id, lang in TranslationJob.objects.filter(model=model_name, object_id__in=sources)
+        .exclude(status=TranslationJob.PENDING).values_list('id', 'object_id', 'target_lang')
+        if (object_id, lang) in wanted_set
+    ]
+    if done:
+        TranslationJob.objects.filter(pk__in=done).update(
+            status=TranslationJob.PENDING, error='', updated_at=timezone.now(),
+        )
+    return len(wanted)
+
+
+def _claim(limit):
+    """Забирает до limit задач из очереди; задачу, взятую другим процессом, пропускает"""
+    claimed = []
+    for job in TranslationJob.objects.filter(status=TranslationJob.PENDING).order_by('id')[:limit]:
+        taken = TranslationJob.objects.filter(pk=job.pk, status=TranslationJob.PENDING).update(
+            status=TranslationJob.RUNNING, updated_at=timezone.now(),
+        )
+        if taken:
+            claimed.append(job)
+    return claimed
+
+
+def _requeue_stale():
+    # Задачи процесса, завершившегося посреди работы
+    stale = timezone.now() - timedelta(seconds=settings.MACHINE_TRANSLATION_JOB_TIMEOUT)
+    TranslationJob.objects.filter(status=TranslationJob.RUNNING, updated_at__lt=stale).update(
+        status=TranslationJob.PENDING, updated_at=timezone.now(),
+    )
+
+
+def _finish(job, status, error=''):
+    TranslationJob.objects.filter(pk=job.pk).update(status=status, error=error, updated_at=timezone.now())
+
+
+def _source(translations, target_lang):
+    """Перевод редактора, с которого переводить: сначала запасные языки цели (kaa <- uz), затем остальные"""
+    for lang in [*fallback_chain(target_lang)[1:], *LANGS]:
+        translation = translations.get(lang)
+        if translation is not None and not translation.machine_translated:
+            return translation
+    return None
+
+
+def _run_jobs(backend, model_name, jobs, stats):
+    model = apps.get_model('news_app', model_name)
+    parent = f'{model.TRANSLATION_PARENT}_id'
+    translations = {}
+    for translation in model.objects.filter(**{f'{parent}__in': {job.object_id for job in jobs}}):
+        translations.setdefault(getattr(translation, parent), {})[translation.lang] = translation
+
+    # (исходный язык, язык перевода) -> [(задача, исходный перевод, части полей)]
+    plans = {}
+    for job in jobs:
+        existing = translations.get(job.object_id, {})
+        current = existing.get(job.target_lang)
+        if current is not None and not current.machine_translated:
+            # Пока задача ждала, редактор сам добавил перевод
+            _finish(job, TranslationJob.DONE)
+            continue
+        source = _source(existing, job.target_lang)
+        if source is None:
+            _finish(job, TranslationJob.FAILED, "Нет перевода редактора, с которого можно перевести")
+            stats['failed'] += 1
+            continue
+        parts = {field: split_segments(getattr(source, field)) for field in FIELDS[model_name]}
+        plans.setdefault((source.lang, job.target_lang), []).append((job, source, parts))
+
+    for (source_lang, target_lang), planned in plans.items():
+        segments = {segment for _, _, parts in planned for field_parts in parts.values()
+                    for segment, _ in field_parts if segment is not None}
+        try:
+            translated = translate_segments(backend, source_lang, target_lang, segments, stats)
+        except Exception as e:
+            logger.exception("Машинный перевод %s -> %s не удался", source_lang, target_lang)
+            for job, _, _ in planned:
+                _finish(job, TranslationJob.FAILED, f"{type(e).__name__}: {e}")
+            stats['failed'] += len(planned)
+            continue
+
+        for job, source, parts in planned:
+            try:
+                _save_translation(model, job, source, parts, translated)
+            except Exception as e:
+                logger.exception("Не удалось сохранить машинный перевод %s", job)
+                _finish(job, TranslationJob.FAILED, f"{type(e).__name__}: {e}")
+                stats['failed'] += 1
+                continue
+            _finish(job, TranslationJob.DONE)
+            stats['translated'] += 1
+
+
+def _save_translation(model, job, source, parts, translated):
+    parent = model.TRANSLATION_PARENT
+    values = {}
+    for field, field_parts in parts.items():
+        text = join_segments(field_parts, translated)
+        max_length = model._meta.get_field(field).max_length
+        values[field] = text[:max_length] if max_length else text
+    for field in COPIED[model.__name__]:
+        values[field] = getattr(source, field)
+
+    with transaction.atomic():
+        # Под блокировкой: редактор мог сохранить свой перевод, пока шёл запрос к переводчику
+        current = model.objects.select_for_update().filter(
+            **{f'{parent}_id': job.object_id}, lang=job.target_lang,
+        ).first()
+        if current is not None and not current.machine_translated:
+            return
+        translation = current or model(**{f'{parent}_id': job.object_id}, lang=job.target_lang)
+        for field, value in values.items():
+            setattr(translation, field, value)
+        translation.machine_translated = True
+        translation.save()
+
+
+def process_pending(limit=None):
+    """Разбирает очередь пачками по MACHINE_TRANSLATION_JOB_BATCH задач, пока она не опустеет"""
+    stats = Counter(translated=0, failed=0, memory_hits=0, backend_segments=0, backend_requests=0)
+    backend = get_backend()
+    if backend is None:
+        return stats
+    _requeue_stale()
+    processed = 0
+    while limit is None or processed < limit:
+        batch = settings.MACHINE_TRANSLATION_JOB_BATCH
+        jobs = _claim(batch if limit is None else min(batch, limit - processed))
+        if not jobs:
+            break
+        processed += len(jobs)
+        by_model = {}
+        for job in jobs:
+            by_model.setdefault(job.model, []).append(job)
+        for model_name, model_jobs in by_model.items():
+            _run_jobs(backend, model_name, model_jobs, stats)
+    return stats
+
+
+# ================== Dispatch ==================
+_executor = None
+_lock = threading.Lock()
+_state = {'requested': False, 'running': False}
+_pending = threading.local()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='machine-translation')
+    return _executor
+
+
+def _drain():
+    """Разбирает очередь, пока после прошлого прохода появлялись новые задачи"""
+    while True:
+        with _lock:
+            if not _state['requested']:
+                _state['running'] = False
+                return
+            _state['requested'] = False
+        close_old_connections()
+        try:
+            stats = process_pending()
+            logger.info("Машинный перевод: %s", dict(stats))
+        except Exception:
+            logger.exception("Машинный перевод: очередь не разобрана")
+        finally:
+            close_old_connections()
+
+
+if shared_task is not None:
+    @shared_task(name='news_app.machine_translation.process_pending')
+    def process_pending_task():
+        return dict(process_pending())
+else:
+    process_pending_task = None
+
+
+def kick():
+    """Запускает разбор очереди в фоне: задачей Celery или потоком этого процесса"""
+    if settings.MACHINE_TRANSLATION_CELERY and process_pending_task is not None:
+        process_pending_task.delay()
+        return
+    with _lock:
+        _state['requested'] = True
+        if _state['running']:
+            return
+        _state['running'] = True
+    _get_executor().submit(_drain)
+
+
+def schedule(model_name, parent_id):
+    """
+    После коммита ставит недостающие языки объекта в очередь и запускает её разбор;
+    сохранение в админке не ждёт переводчика. Ничего не делает без MACHINE_TRANSLATION_BACKEND.
+    """
+    if not settings.MACHINE_TRANSLATION_BACKEND:
+        return
+    keys = _pending.__dict__.setdefault('keys', set())
+    keys.add((model_name, parent_id))
+
+    def run():
+        if not keys:
+            return
+        batch = set(keys)
+        keys.clear()
+        by_model = {}
+        for name, pk in batch:
+            by_model.setdefault(name, []).append(pk)
+        if sum(enqueue(name, pks) for name, pks in by_model.items()):
+            kick()
+    transaction.on_commit(run)
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Now
+
+from news_app.models import News, NewsTranslation
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет денормализованные created_at и is_published у переводов новостей пачками. "
+        "Запускать после добавления колонок (makemigrations/migrate)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--all', action='store_true',
+                            help="Пересинхронизировать все переводы, а не только пустые")
+
+    def handle(self, *args, **options):
+        news = News.objects.filter(pk=OuterRef('news_id'))
+        queryset = NewsTranslation.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(created_at__isnull=True)
+
+        last_pk = 0
+        total = 0
+        while True:
+            # Keyset по pk: каждая пачка — отдельная короткая транзакция
+            ids = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                NewsTranslation.objects.filter(pk__in=ids).update(
+                    created_at=Subquery(news.values('created_at')[:1]),
+                    is_published=Subquery(news.values('is_published')[:1]),
+                    updated_at=Now(),
+                )
+            last_pk = ids[-1]
+            total += len(ids)
+            self.stdout.write(f"\rОбновлено: {total}", ending='')
+            self.stdout.flush()
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"Готово, обновлено переводов: {total}"))
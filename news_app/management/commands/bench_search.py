@@ -0,0 +1,97 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news_app.models import News, NewsTranslation
+from news_app import search
+
+SYLLABLES = ['ka', 'ra', 'qal', 'paq', 'oz', 'bek', 'yan', 'gi', 'lik', 'dav', 'lat',
+             'tum', 'an', 'vi', 'lo', 'yat', 'xo', 'kim', 'sha', 'har', 'mah', 'al', 'la']
+
+# Сколько переводов разделяют одно «редкое» слово (имя, топоним, номер постановления)
+RARE_WORD_SPREAD = 5
+
+
+def rare_word(number):
+    """Детерминированное редкое слово фиксированной длины: словарь растёт вместе с архивом"""
+    return f"pq{number:07d}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск по индексу с title__icontains на синтетических данных. "
+        "Запросы избирательные (как реальный поиск по именам и названиям): "
+        "число совпадений не растёт с архивом, а полный просмотр таблицы — растёт. "
+        "Данные создаются внутри транзакции и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help="Размеры архива (число переводов)")
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--lang', default='uz')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+            for _ in range(2000)
+        ]
+        lang = options['lang']
+
+        with transaction.atomic():
+            created = 0
+            for size in sorted(options['sizes']):
+                self._seed(rnd, vocabulary, lang, created, size - created)
+                created = size
+
+                queries = [
+                    rare_word(rnd.randrange(size // RARE_WORD_SPREAD))
+                    for _ in range(options['queries'])
+                ]
+                base = NewsTranslation.objects.filter(lang=lang, is_published=True).order_by('-created_at')
+                indexed = self._measure(lambda q: search.search(base, lang, q), queries)
+                icontains = self._measure(lambda q: base.filter(title__icontains=q), queries)
+
+                self.stdout.write(
+                    f"{size:>8} строк | индекс: median {indexed[0]:.2f} ms, p95 {indexed[1]:.2f} ms"
+                    f" | icontains: median {icontains[0]:.2f} ms, p95 {icontains[1]:.2f} ms"
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, rnd, vocabulary, lang, offset, count, batch_size=1000):
+        while count > 0:
+            step = min(batch_size, count)
+            news = News.objects.bulk_create([News() for _ in range(step)])
+            translations = NewsTranslation.objects.bulk_create([
+                NewsTranslation(
+                    news=item,
+                    lang=lang,
+                    created_at=item.created_at,
+                    image='news/bench.jpg',
+                    title=' '.join(rnd.choices(vocabulary, k=7) + [rare_word((offset + i) // RARE_WORD_SPREAD)]),
+                    short_title=' '.join(rnd.choices(vocabulary, k=3)),
+                    description=' '.join(rnd.choices(vocabulary, k=80)),
+                    short_description=' '.join(rnd.choices(vocabulary, k=15)),
+                )
+                for i, item in enumerate(news)
+            ])
+            search.rebuild_index(
+                NewsTranslation.objects.filter(pk__in=[t.pk for t in translations]),
+                batch_size=batch_size,
+            )
+            offset += step
+            count -= step
+
+    def _measure(self, make_queryset, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            list(make_queryset(query)[:12])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
@@ -0,0 +1,208 @@
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from news_app import synthetic, urls as news_urls
+from news_app.models import News, NewsTranslation, Debt, Guide, Leaders
+from news_app.profiling import percentile, profile
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def summarize(samples):
+    """samples — список словарей замеров одного сценария"""
+    result = {'requests': len(samples)}
+    for metric in ('wall_ms', 'sql_ms', 'template_ms', 'queries', 'bytes'):
+        values = sorted(s[metric] for s in samples)
+        result[metric] = {
+            'mean': round(statistics.fmean(values), 3),
+            'min': round(values[0], 3),
+            'max': round(values[-1], 3),
+            **{f'p{p}': round(percentile(values, p), 3) for p in PERCENTILES},
+        }
+    result['errors'] = sum(1 for s in samples if s['status'] >= 400)
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк всех публичных страниц news_app по языкам: перцентили задержки, число и время SQL, "
+        "время рендера шаблонов. Может предварительно заполнить БД синтетическими данными "
+        "(используйте отдельную базу)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-scale', help="Создать N новостей × 3 языка перед замером (1k, 100k, 1m)")
+        parser.add_argument('--debts', help="Сколько долгов создать (по умолчанию = числу новостей)")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--force', action='store_true', help="Заполнять даже непустую базу")
+        parser.add_argument('--no-search-index', action='store_true', help="Не строить поисковый индекс при заполнении")
+        parser.add_argument('--iterations', type=int, default=30, help="Запросов на сценарий и язык")
+        parser.add_argument('--langs', nargs='+', default=[code for code, _ in settings.LANGUAGES])
+        parser.add_argument('--cold', action='store_true', help="Очищать кэш перед каждым запросом")
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--compare', help="JSON предыдущего прогона для сравнения")
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help="Допустимый рост p95 в процентах при --compare")
+
+    def handle(self, *args, **options):
+        if options['seed_scale']:
+            self._seed(options)
+
+        if not NewsTranslation.objects.exists():
+            raise CommandError("В базе нет новостей — запустите с --seed-scale")
+
+        rnd = random.Random(options['seed'])
+        results = {}
+        for lang in options['langs']:
+            results[lang] = {}
+            for name, make_url in self._scenarios(lang, rnd).items():
+                samples = [self._request(make_url(), options['cold'], i) for i in range(options['iterations'])]
+                results[lang][name] = summarize(samples)
+                wall = results[lang][name]['wall_ms']
+                self.stdout.write(
+                    f"{lang:>4} {name:<24} p50 {wall['p50']:>8.2f} ms  p95 {wall['p95']:>8.2f} ms  "
+                    f"SQL {results[lang][name]['queries']['p50']:>4.0f}  "
+                    f"render {results[lang][name]['template_ms']['p50']:>7.2f} ms"
+                )
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'news': News.objects.count(),
+                'translations': NewsTranslation.objects.count(),
+                'debts': Debt.objects.count(),
+                'iterations': options['iterations'],
+                'cold_cache': options['cold'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
+
+        if options['compare']:
+            self._compare(options['compare'], report, options['threshold'])
+
+    # ================== Seeding ==================
+    def _seed(self, options):
+        if News.objects.exists() and not options['force']:
+            raise CommandError("База не пуста. Используйте отдельную базу или --force")
+        scale = synthetic.parse_scale(options['seed_scale'])
+        debts = synthetic.parse_scale(options['debts']) if options['debts'] else None
+        generator = synthetic.Generator(
+            seed=options['seed'],
+            log=lambda message: self.stdout.write(f"\r{message}", ending=''),
+        )
+        started = time.perf_counter()
+        generator.seed(scale, debts=debts, index=not options['no_search_index'])
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"Данные созданы за {time.perf_counter() - started:.1f} с"))
+
+    # ================== Scenarios ==================
+    def _scenarios(self, lang, rnd):
+        """Сценарий на каждый маршрут news_app/urls.py (несколько — для all_news)"""
+        news_ids = list(
+            NewsTranslation.objects.filter(lang=lang, is_published=True)
+            .order_by('?').values_list('news_id', flat=True)[:200]
+        )
+        guide_types = list(Guide.objects.values_list('guide_type', flat=True).distinct()) or ['loan']
+        inns = list(Debt.objects.order_by('?').values_list('inn', flat=True)[:200]) or ['000000000']
+        title = NewsTranslation.objects.filter(lang=lang).values_list('title', flat=True).first() or ''
+        word = title.split()[0] if title else 'news'
+        region_codes = [code for code, _ in Leaders.REGION_CHOICES]
+        # Инкрементальная синхронизация: изменения за последний день данных
+        latest = (
+            NewsTranslation.objects.filter(lang=lang)
+            .order_by('-updated_at').values_list('updated_at', flat=True).first()
+        )
+        since = quote((latest - timedelta(days=1)).isoformat()) if latest else ''
+        deep_page = max(1, NewsTranslation.objects.filter(lang=lang).count() // 12 // 2)
+
+        # имя сценария -> (маршрут из news_app/urls.py, генератор URL)
+        scenarios = {
+            'home': ('home', lambda: f'/{lang}/'),
+            'guide': ('guide', lambda: f'/{lang}/guide/{rnd.choice(guide_types)}'),
+            'leaders': ('leaders', lambda: f'/{lang}/leaders'),
+            'leaders_api': ('leaders_api', lambda: f'/{lang}/api/leaders?region={rnd.choice(region_codes)}'),
+            'news_detail': ('news_detail', lambda: f'/{lang}/news/{rnd.choice(news_ids)}'),
+            'all_news': ('all_news', lambda: f'/{lang}/news'),
+            'all_news_offset_deep': ('all_news', lambda: f'/{lang}/news?page={deep_page}'),
+            'all_news_search': ('all_news', lambda: f'/{lang}/news?search={word}'),
+            'all_news_category': ('all_news', lambda: f'/{lang}/news?category=bench-{rnd.randrange(8)}'),
+            'suggest': ('suggest', lambda: f'/{lang}/news/suggest?q={quote(word[:3])}'),
+            'news_api_since': ('news_api', lambda: f'/{lang}/api/news?fields=id,title,url,updated_at&since={since}'),
+            'debt_lookup': ('debt_lookup', lambda: f'/{lang}/debts/lookup?inn={rnd.choice(inns)}'),
+            'debt_summary_api': ('debt_summary_api', lambda: f'/{lang}/api/debts/summary'),
+        }
+
+        covered = {route for route, _ in scenarios.values()} | {'cache_stats'}
+        for pattern in news_urls.urlpatterns:
+            if pattern.name not in covered:
+                self.stderr.write(f"Нет сценария для маршрута {pattern.name}")
+        return {name: make_url for name, (_, make_url) in scenarios.items()}
+
+    def _request(self, url, cold, number):
+        if cold:
+            cache.clear()
+        client = Client(
+            HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost',
+            # Разные адреса, чтобы не упираться в лимит запросов поиска долгов
+            REMOTE_ADDR=f'10.{number // 65536 % 256}.{number // 256 % 256}.{number % 256}',
+        )
+        with profile() as measured:
+            started = time.perf_counter()
+            response = client.get(url)
+            # Потоковый ответ (/api/news) читает БД при отдаче — дочитываем внутри замера
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            wall = time.perf_counter() - started
+        return {
+            'status': response.status_code,
+            'wall_ms': wall * 1000,
+            'sql_ms': measured.sql_time * 1000,
+            'template_ms': measured.template_time * 1000,
+            'queries': measured.sql_count,
+            'bytes': size,
+        }
+
+    # ================== Compare ==================
+    def _compare(self, path, report, threshold):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+        regressions = 0
+        for lang, scenarios in report['results'].items():
+            for name, current in scenarios.items():
+                previous = baseline.get(lang, {}).get(name)
+                if not previous:
+                    continue
+                before, after = previous['wall_ms']['p95'], current['wall_ms']['p95']
+                change = (after - before) / before * 100 if before else 0.0
+                queries_before, queries_after = previous['queries']['p50'], current['queries']['p50']
+                flag = change > threshold or queries_after > queries_before
+                regressions += flag
+                line = (
+                    f"{lang:>4} {name:<24} p95 {before:>8.2f} -> {after:>8.2f} ms ({change:+.1f}%)  "
+                    f"SQL {queries_before:.0f} -> {queries_after:.0f}"
+                )
+                self.stdout.write(self.style.ERROR(line) if flag else line)
+
+        if regressions:
+            raise CommandError(f"Регрессий: {regressions}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news_app import feeds
+
+
+class Command(BaseCommand):
+    help = "Полностью пересобирает карты сайта и RSS/Atom ленты в MEDIA_ROOT/feeds"
+
+    def handle(self, *args, **options):
+        total = feeds.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Шардов карты сайта: {total}, каталог: {feeds.feeds_root()}"))
@@ -0,0 +1,81 @@
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from news_app import caching, images
+from news_app.storage import content_name, content_storage, file_digest, is_content_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Переводит загруженные изображения на имена по хешу содержимого: одинаковые файлы "
+        "(одно фото для трёх языков) сливаются в один, записи переключаются на него"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать экономию")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        names = set()
+        for model_name, field_name in images.IMAGE_FIELDS.items():
+            model = apps.get_model('news_app', model_name)
+            names.update(n for n in model.objects.values_list(field_name, flat=True).distinct() if n)
+
+        moved = merged = missing = saved = 0
+        targets = set()
+        for name in sorted(names):
+            if is_content_name(name):
+                continue
+            if not content_storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Нет файла: {name}")
+                continue
+
+            with content_storage.open(name, 'rb') as f:
+                target = content_name(name, file_digest(File(f)))
+
+            if target in targets or content_storage.exists(target):
+                merged += 1
+                saved += content_storage.size(name)
+            else:
+                moved += 1
+            targets.add(target)
+            if dry_run:
+                continue
+
+            if not content_storage.exists(target):
+                self._move(name, target)
+            for model_name, field_name in images.IMAGE_FIELDS.items():
+                model = apps.get_model('news_app', model_name)
+                # updated_at переводов — чтобы клиенты /api/news?since= получили новый URL
+                extra = {'updated_at': timezone.now()} if model_name == 'NewsTranslation' else {}
+                model.objects.filter(**{field_name: name}).update(**{field_name: target}, **extra)
+            # Дубликат (и его копии) больше ни на что не ссылается
+            images.release(name)
+
+        if not dry_run:
+            # update() обходит сигналы: HTML главной и ETag страниц ссылаются на старые имена
+            for section in caching.HOMEPAGE_SECTIONS:
+                caching.bump_version(section)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry-run] ' if dry_run else ''}Переименовано: {moved}, слито дубликатов: {merged}, "
+            f"нет файла: {missing}, освобождено: {saved / 1024 / 1024:.1f} МБ"
+        ))
+
+    def _move(self, name, target):
+        """Переносит файл и его готовые копии без перекодирования"""
+        pairs = [(name, target)] + [
+            (images.variant_name(name, width, fmt), images.variant_name(target, width, fmt))
+            for width in settings.IMAGE_VARIANT_WIDTHS
+            for fmt in images.FORMATS
+        ]
+        for source, destination in pairs:
+            if content_storage.exists(source) and not content_storage.exists(destination):
+                os.makedirs(os.path.dirname(content_storage.path(destination)), exist_ok=True)
+                os.replace(content_storage.path(source), content_storage.path(destination))
@@ -0,0 +1,45 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news_app import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Рендерит публичные страницы (главная, руководство, гайды, новости, страницы списка) "
+        "для всех языков в каталог для nginx. С --changed — только страницы, затронутые объектами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.STATIC_EXPORT_ROOT,
+                            help="Каталог выгрузки (по умолчанию STATIC_EXPORT_ROOT)")
+        parser.add_argument('--workers', type=int, default=settings.STATIC_EXPORT_WORKERS)
+        parser.add_argument('--lang', nargs='+', choices=export.LANGS)
+        parser.add_argument('--changed', nargs='+', metavar='MODEL:PK',
+                            help="Например NewsTranslation:15 Leaders:3")
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError("Укажите --output или STATIC_EXPORT_ROOT")
+
+        if options['changed']:
+            urls = set()
+            for item in options['changed']:
+                model_name, _, pk = item.partition(':')
+                if model_name not in export.DEPENDENCIES:
+                    raise CommandError(f"Нет зависимостей для модели {model_name}")
+                instance = apps.get_model('news_app', model_name).objects.filter(pk=pk).first()
+                if instance is None:
+                    raise CommandError(f"{model_name} с pk={pk} не найден")
+                urls |= export.affected_urls(instance, structural=True)
+        else:
+            urls = export.all_urls(options['lang'])
+
+        started = time.perf_counter()
+        written, removed = export.render(urls, root=options['output'], workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Страниц записано: {written}, удалено: {removed} за {time.perf_counter() - started:.1f} с"
+        ))
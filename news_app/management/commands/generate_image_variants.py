@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news_app import images
+
+
+class Command(BaseCommand):
+    help = "Создаёт WebP/JPEG копии для уже загруженных изображений"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Пересоздать существующие копии")
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_VARIANT_WORKERS)
+
+    def handle(self, *args, **options):
+        names = set()
+        for model_name, field_name in images.IMAGE_FIELDS.items():
+            model = apps.get_model('news_app', model_name)
+            names.update(
+                name for name in model.objects.values_list(field_name, flat=True).iterator() if name
+            )
+
+        created = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {name: pool.submit(images.generate_variants, name, options['force']) for name in sorted(names)}
+            for name, future in futures.items():
+                try:
+                    created += future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{name}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Изображений: {len(names)}, создано копий: {created}, ошибок: {failed}"
+        ))
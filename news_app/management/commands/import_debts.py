@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news_app import debt_import
+
+
+class Command(BaseCommand):
+    help = "Потоковый импорт долгов из CSV/XLSX с upsert по ИНН и типу долга"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл CSV или XLSX")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rejected', help="Куда записать отклонённые строки (CSV)")
+        parser.add_argument('--dry-run', action='store_true', help="Только проверить строки")
+
+    def handle(self, *args, **options):
+        rejected_file = open(options['rejected'], 'w', newline='', encoding='utf-8') if options['rejected'] else None
+        rejected = debt_import.RejectedWriter(rejected_file) if rejected_file else None
+
+        def progress(stats):
+            self.stdout.write(f"\r{stats}", ending='')
+            self.stdout.flush()
+
+        try:
+            with open(options['path'], 'rb') as source:
+                rows = debt_import.iter_rows(source, options['path'])
+                stats = debt_import.import_debts(
+                    rows,
+                    batch_size=options['batch_size'],
+                    rejected=rejected,
+                    progress=progress,
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if rejected_file:
+                rejected_file.close()
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"Готово — {stats}"))
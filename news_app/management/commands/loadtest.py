@@ -0,0 +1,133 @@
+import json
+import platform
+from contextlib import nullcontext
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from news_app import loadtest
+from news_app.models import NewsTranslation
+
+# Рост доли ошибок (абсолютный), который при --compare считается регрессией
+ERROR_RATE_TOLERANCE = 0.01
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест всего стека по HTTP: смесь запросов по языкам и страницам, "
+        "ступени конкурентности, пропускная способность, p50/p95/p99 и доля ошибок по эндпоинтам. "
+        "Поднимает локальный сервер (wsgiref, gunicorn или uvicorn) или бьёт в --url; "
+        "URL берутся из базы текущих настроек."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Адрес уже запущенного сервера (иначе поднимается локальный)")
+        parser.add_argument('--server', choices=loadtest.LocalServer.KINDS, default='wsgiref')
+        parser.add_argument('--workers', type=int, default=1, help="Воркеров gunicorn/uvicorn")
+        parser.add_argument('--stages', type=int, nargs='+', default=[1, 4, 16, 32],
+                            help="Число одновременных пользователей на ступенях")
+        parser.add_argument('--duration', type=float, default=10.0, help="Секунд на ступень")
+        parser.add_argument('--warmup', type=float, default=2.0, help="Секунд прогрева (не учитывается)")
+        parser.add_argument('--langs', nargs='+', default=[code for code, _ in settings.LANGUAGES])
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--timeout', type=float, default=30.0, help="Таймаут одного запроса")
+        parser.add_argument('--output', default='loadtest.json')
+        parser.add_argument('--compare', help="JSON предыдущего прогона для сравнения")
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help="Допустимые рост p95 и падение пропускной способности в процентах при --compare")
+
+    def handle(self, *args, **options):
+        if not NewsTranslation.objects.exists():
+            raise CommandError("В базе нет новостей — заполните её: benchmark --seed-scale 1k")
+
+        mix = loadtest.TrafficMix(options['langs'])
+        server = nullcontext() if options['url'] else loadtest.LocalServer(options['server'], options['workers'])
+        try:
+            with server:
+                base_url = options['url'] or server.url
+                self.stdout.write(f"Цель: {base_url}")
+                if options['warmup']:
+                    loadtest.run_stage(base_url, mix, 1, options['warmup'], options['seed'], options['timeout'])
+                stages = {}
+                for number, concurrency in enumerate(options['stages']):
+                    samples, elapsed = loadtest.run_stage(
+                        base_url, mix, concurrency, options['duration'], options['seed'] + number + 1,
+                        options['timeout'],
+                    )
+                    stages[str(concurrency)] = loadtest.summarize(samples, elapsed)
+                    self._print_stage(concurrency, stages[str(concurrency)])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'target': options['url'] or f"{options['server']} x{options['workers']}",
+                'translations': NewsTranslation.objects.count(),
+                'duration': options['duration'],
+                'langs': options['langs'],
+                'mix': loadtest.MIX,
+            },
+            'stages': stages,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
+
+        if options['compare']:
+            self._compare(options['compare'], report, options['threshold'])
+
+    def _print_stage(self, concurrency, stage):
+        total = stage['total']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"c={concurrency:<4} {total['rps']:>8.1f} rps  p50 {total['p50_ms']:>8.2f}  "
+            f"p95 {total['p95_ms']:>8.2f}  p99 {total['p99_ms']:>8.2f} ms  "
+            f"ошибки {total['errors']}/{total['requests']}"
+        ))
+        for name, result in stage['endpoints'].items():
+            self.stdout.write(
+                f"       {name:<20} {result['rps']:>8.1f} rps  p50 {result['p50_ms']:>8.2f}  "
+                f"p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  "
+                f"ошибки {result['error_rate'] * 100:.1f}%  4xx {result['client_errors']}"
+            )
+
+    # ================== Compare ==================
+    def _compare(self, path, report, threshold):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)['stages']
+
+        regressions = 0
+        for concurrency, stage in report['stages'].items():
+            previous_stage = baseline.get(concurrency)
+            if not previous_stage:
+                continue
+            rows = [('total', stage['total'], previous_stage['total'])] + [
+                (name, current, previous_stage['endpoints'][name])
+                for name, current in stage['endpoints'].items()
+                if name in previous_stage['endpoints']
+            ]
+            for name, current, previous in rows:
+                before, after = previous['p95_ms'], current['p95_ms']
+                change = (after - before) / before * 100 if before else 0.0
+                rps_change = (current['rps'] - previous['rps']) / previous['rps'] * 100 if previous['rps'] else 0.0
+                flag = (
+                    change > threshold
+                    or (name == 'total' and rps_change < -threshold)
+                    or current['error_rate'] > previous['error_rate'] + ERROR_RATE_TOLERANCE
+                )
+                regressions += flag
+                line = (
+                    f"c={concurrency:<4} {name:<20} p95 {before:>8.2f} -> {after:>8.2f} ms ({change:+.1f}%)  "
+                    f"rps {previous['rps']:.1f} -> {current['rps']:.1f} ({rps_change:+.1f}%)  "
+                    f"ошибки {previous['error_rate'] * 100:.1f}% -> {current['error_rate'] * 100:.1f}%"
+                )
+                self.stdout.write(self.style.ERROR(line) if flag else line)
+
+        if regressions:
+            raise CommandError(f"Регрессий: {regressions}")
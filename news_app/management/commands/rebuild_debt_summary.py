@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from news_app import debts
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет итоги DebtSummary с реестром долгов (пересчёт диапазонами id) и заменяет их. "
+        "Запускать, когда импорт не идёт: изменения во время пересчёта могут потеряться."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100000, help="Записей Debt на один агрегат")
+        parser.add_argument('--dry-run', action='store_true', help="Только показать расхождения")
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f"\rid {done} из {total}", ending='')
+            self.stdout.flush()
+
+        drift = debts.rebuild_summary(options['batch_size'], dry_run=options['dry_run'], progress=progress)
+        self.stdout.write('')
+        for (status, debt_type), (before, after) in sorted(drift.items()):
+            before = f"{before[0]} / {before[1]}" if before else "—"
+            after = f"{after[0]} / {after[1]}" if after else "—"
+            self.stdout.write(f"{status:<10} {debt_type:<30} {before} -> {after}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Итоги совпадают с реестром"))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Расхождений: {len(drift)} (не исправлено, --dry-run)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Исправлено расхождений: {len(drift)}"))
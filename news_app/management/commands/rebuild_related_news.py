@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from news_app.models import NewsTranslation
+from news_app import related
+
+
+class Command(BaseCommand):
+    help = "Полностью пересчитывает таблицу похожих новостей"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lang', choices=[code for code, _ in NewsTranslation.LANG_CHOICES],
+                            help="Пересчитать только один язык")
+
+    def handle(self, *args, **options):
+        queryset = NewsTranslation.objects.all()
+        if options['lang']:
+            queryset = queryset.filter(lang=options['lang'])
+
+        total = related.rebuild_related(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано переводов: {total}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from news_app.models import NewsTranslation
+from news_app import search
+
+
+class Command(BaseCommand):
+    help = "Перестраивает поисковый индекс переводов новостей"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lang', choices=[code for code, _ in NewsTranslation.LANG_CHOICES],
+                            help="Перестроить только один язык")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = NewsTranslation.objects.all()
+        if options['lang']:
+            queryset = queryset.filter(lang=options['lang'])
+
+        total = search.rebuild_index(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано переводов: {total}"))
@@ -0,0 +1,56 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news_app import machine_translation
+from news_app.models import TranslationJob
+
+MODELS = {'news': 'NewsTranslation', 'guide': 'GuideTranslation'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Ставит в очередь машинного перевода все недостающие языки новостей и гайдов "
+        "и разбирает очередь в этом процессе (сегменты из памяти переводов не переводятся повторно)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=list(MODELS), help="Только новости или только гайды")
+        parser.add_argument('--refresh', action='store_true',
+                            help="Заново перевести и машинные переводы (например, после смены переводчика)")
+        parser.add_argument('--retry-failed', action='store_true', help="Повторить задачи с ошибкой")
+        parser.add_argument('--enqueue-only', action='store_true',
+                            help="Только поставить в очередь (разберёт фоновый воркер)")
+        parser.add_argument('--limit', type=int, help="Обработать не больше N задач")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not settings.MACHINE_TRANSLATION_BACKEND:
+            raise CommandError("MACHINE_TRANSLATION_BACKEND не задан")
+
+        queued = 0
+        for model_name in [MODELS[options['model']]] if options['model'] else MODELS.values():
+            model = apps.get_model('news_app', model_name)
+            parent_ids = list(
+                model.objects.filter(machine_translated=False)
+                .order_by().values_list(f'{model.TRANSLATION_PARENT}_id', flat=True).distinct()
+            )
+            for start in range(0, len(parent_ids), options['chunk_size']):
+                queued += machine_translation.enqueue(
+                    model_name, parent_ids[start:start + options['chunk_size']], refresh=options['refresh'],
+                )
+
+        if options['retry_failed']:
+            queued += TranslationJob.objects.filter(status=TranslationJob.FAILED).update(
+                status=TranslationJob.PENDING, error='',
+            )
+        self.stdout.write(f"В очереди: {queued}")
+        if options['enqueue_only']:
+            return
+
+        stats = machine_translation.process_pending(options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Переведено: {stats['translated']}, ошибок: {stats['failed']}, "
+            f"сегментов из памяти: {stats['memory_hits']}, отправлено переводчику: {stats['backend_segments']} "
+            f"({stats['backend_requests']} запросов)"
+        ))
@@ -0,0 +1,190 @@
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caching
+from . import profiling
+
+logger = logging.getLogger('news_app.slow_requests')
+
+# Имена маршрутов news_app/urls.py, остальные запросы (админка, статика) пишутся как 'other'
+VIEWS = (
+    'home', 'guide', 'leaders', 'leaders_api', 'news_detail', 'all_news', 'suggest', 'news_api',
+    'debt_lookup', 'debt_summary_api', 'cache_stats', 'other',
+)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# имя метрики -> (описание, границы корзин, множитель для целочисленной суммы в кэше)
+METRICS = {
+    'request_duration_seconds': ("Время обработки запроса", SECONDS_BUCKETS, 10 ** 6),
+    'request_sql_queries': ("Число SQL-запросов", (1, 2, 5, 10, 20, 50, 100, 200, 500), 1),
+    'request_sql_duration_seconds': ("Суммарное время SQL", SECONDS_BUCKETS, 10 ** 6),
+    'request_template_duration_seconds': ("Время рендера шаблонов", SECONDS_BUCKETS, 10 ** 6),
+    'response_size_bytes': (
+        "Размер ответа", (1024, 5 * 1024, 10 * 1024, 50 * 1024, 100 * 1024, 500 * 1024, 1024 * 1024), 1,
+    ),
+}
+PREFIX = 'gosnews_'
+
+
+# ================== Aggregation ==================
+# Гистограммы копятся в памяти процесса и раз в METRICS_FLUSH_INTERVAL секунд
+# прибавляются к счётчикам в кэше. С общим кэшем (Redis) /metrics отдаёт сумму по всем воркерам.
+_pending = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _key(metric, view, lang, part):
+    return f'metrics:{metric}:{view}:{lang}:{part}'
+
+
+def observe(metric, view, lang, value):
+    _, buckets, scale = METRICS[metric]
+    index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+    deltas = (
+        (_key(metric, view, lang, index), 1),
+        (_key(metric, view, lang, 'sum'), int(value * scale)),
+        (_key(metric, view, lang, 'count'), 1),
+    )
+    with _lock:
+        for key, delta in deltas:
+            _pending[key] = _pending.get(key, 0) + delta
+
+
+def flush(force=False):
+    """Переносит накопленные значения в кэш"""
+    global _last_flush
+    with _lock:
+        if not force and time.monotonic() - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    for key, delta in pending.items():
+        if delta:
+            caching.incr(key, delta)
+
+
+def flush_due():
+    return time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL
+
+
+def observe_request(view, lang, measured, wall, size):
+    observe('request_duration_seconds', view, lang, wall)
+    observe('request_sql_queries', view, lang, measured.sql_count)
+    observe('request_sql_duration_seconds', view, lang, measured.sql_time)
+    observe('request_template_duration_seconds', view, lang, measured.template_time)
+    observe('response_size_bytes', view, lang, size)
+
+
+# ================== Exposition ==================
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Все гистограммы в текстовом формате Prometheus"""
+    flush(force=True)
+    langs = [code for code, _ in settings.LANGUAGES] + ['']
+    keys = [
+        _key(metric, view, lang, part)
+        for metric, (_, buckets, _) in METRICS.items()
+        for view in VIEWS
+        for lang in langs
+        for part in [*range(len(buckets) + 1), 'sum', 'count']
+    ]
+    found = cache.get_many(keys)
+
+    lines = []
+    for metric, (description, buckets, scale) in METRICS.items():
+        name = PREFIX + metric
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for view in VIEWS:
+            for lang in langs:
+                total = found.get(_key(metric, view, lang, 'count'), 0)
+                if not total:
+                    continue
+                labels = f'view="{view}",lang="{lang}"'
+                cumulative = 0
+                for index, bound in enumerate(buckets):
+                    cumulative += found.get(_key(metric, view, lang, index), 0)
+                    lines.append(f'{name}_bucket{{{labels},le="{_format(bound)}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+                value = found.get(_key(metric, view, lang, 'sum'), 0) / scale
+                lines.append(f'{name}_sum{{{labels}}} {_format(value) if scale > 1 else int(value)}')
+                lines.append(f'{name}_count{{{labels}}} {total}')
+    return '\n'.join(lines) + '\n'
+
+
+# ================== Middleware ==================
+class MetricsMiddleware:
+    """
+    Замеры каждого запроса по маршруту и языку: время, SQL, рендер шаблонов, размер ответа.
+    Медленные запросы выборочно пишутся в лог news_app.slow_requests вместе с самыми долгими SQL.
+    Работает в обоих режимах: под ASGI цепочка middleware остаётся асинхронной (async index).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        profiling.install()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # Тексты SQL собираем только для запросов, попавших в выборку медленного лога
+        sampled = random.random() < settings.METRICS_SLOW_SAMPLE_RATE
+        with profiling.profile(keep_sql=sampled) as measured:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            wall = time.perf_counter() - started
+        if self._observe(request, response, measured, wall, sampled):
+            flush()
+        return response
+
+    async def __acall__(self, request):
+        sampled = random.random() < settings.METRICS_SLOW_SAMPLE_RATE
+        with profiling.profile(keep_sql=sampled) as measured:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            wall = time.perf_counter() - started
+        # Перенос в кэш (сеть) — раз в METRICS_FLUSH_INTERVAL и не в цикле событий
+        if self._observe(request, response, measured, wall, sampled) and flush_due():
+            await sync_to_async(flush, thread_sensitive=False)()
+        return response
+
+    def _observe(self, request, response, measured, wall, sampled):
+        """Записывает замеры в гистограммы процесса; False — запрос не учитывается (/metrics)"""
+        match = request.resolver_match
+        name = match.url_name if match else None
+        if name == 'metrics':
+            return False
+        view = name if name in VIEWS else 'other'
+        lang = getattr(request, 'LANGUAGE_CODE', '') or ''
+        if lang not in dict(settings.LANGUAGES):
+            lang = ''
+        size = 0 if response.streaming else len(response.content)
+        observe_request(view, lang, measured, wall, size)
+
+        if sampled and wall * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            worst = sorted(measured.queries, key=lambda q: q[0], reverse=True)[:settings.METRICS_SLOW_TOP_QUERIES]
+            logger.warning(
+                "Slow request %s %s (%s, %s): %.1f ms, SQL %d/%.1f ms, templates %.1f ms\n%s",
+                # Без строки запроса: в ней бывают персональные данные (ИНН в /debts/lookup)
+                request.method, request.path, view, lang or '-', wall * 1000,
+                measured.sql_count, measured.sql_time * 1000, measured.template_time * 1000,
+                '\n'.join(f'  {elapsed * 1000:8.2f} ms  {sql}' for elapsed, sql in worst),
+            )
+        return True
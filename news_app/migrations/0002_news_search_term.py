@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lang', models.CharField(choices=[('uz', "O'zbek"), ('ru', 'Русский'), ('kaa', 'Karakalpak')], max_length=5, verbose_name='Язык')),
+                ('term', models.CharField(max_length=64, verbose_name='Термин')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Вес')),
+                ('translation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='news_app.newstranslation')),
+            ],
+            options={
+                'verbose_name': 'Поисковый термин',
+                'verbose_name_plural': 'Поисковые термины',
+                'indexes': [models.Index(fields=['lang', 'term'], name='news_search_lang_term_idx')],
+                'unique_together': {('translation', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0002_news_search_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedNews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news_app.newstranslation')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='news_app.newstranslation')),
+            ],
+            options={
+                'verbose_name': 'Похожая новость',
+                'verbose_name_plural': 'Похожие новости',
+                'indexes': [models.Index(fields=['source', '-score'], name='related_news_source_idx')],
+                'unique_together': {('source', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0004_debt_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='is_published',
+            field=models.BooleanField(default=True, verbose_name='Опубликовано'),
+        ),
+        migrations.AddField(
+            model_name='newstranslation',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата создания'),
+        ),
+        migrations.AddField(
+            model_name='newstranslation',
+            name='is_published',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Опубликовано'),
+        ),
+        migrations.AddIndex(
+            model_name='newstranslation',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['lang', '-created_at', '-id'], name='news_tr_lang_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newstranslation',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['lang', 'category', '-created_at', '-id'], name='news_tr_lang_cat_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+import news_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0005_news_translation_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leaders',
+            name='leader_image',
+            field=models.ImageField(storage=news_app.storage.ContentAddressedStorage(), upload_to='leaders/', verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='newstranslation',
+            name='image',
+            field=models.ImageField(db_index=True, storage=news_app.storage.ContentAddressedStorage(), upload_to='news/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='partners',
+            name='image',
+            field=models.ImageField(storage=news_app.storage.ContentAddressedStorage(), upload_to='partners/', verbose_name='Изображение'),
+        ),
+    ]
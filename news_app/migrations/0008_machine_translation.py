@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0007_news_translation_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guidetranslation',
+            name='machine_translated',
+            field=models.BooleanField(default=False, verbose_name='Машинный перевод'),
+        ),
+        migrations.AddField(
+            model_name='newstranslation',
+            name='machine_translated',
+            field=models.BooleanField(default=False, verbose_name='Машинный перевод'),
+        ),
+        migrations.CreateModel(
+            name='TranslationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('NewsTranslation', 'Новость'), ('GuideTranslation', 'Гайд')], max_length=30, verbose_name='Модель перевода')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID новости или гайда')),
+                ('target_lang', models.CharField(choices=[('uz', "O'zbek"), ('ru', 'Русский'), ('kaa', 'Karakalpak')], max_length=5, verbose_name='Язык')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Задача машинного перевода',
+                'verbose_name_plural': 'Задачи машинного перевода',
+                'indexes': [models.Index(fields=['status', 'id'], name='translation_job_status_idx')],
+                'unique_together': {('model', 'object_id', 'target_lang')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_lang', models.CharField(max_length=5, verbose_name='Исходный язык')),
+                ('target_lang', models.CharField(max_length=5, verbose_name='Язык перевода')),
+                ('source_hash', models.CharField(max_length=64, verbose_name='SHA-256 исходного текста')),
+                ('source_text', models.TextField(verbose_name='Исходный текст')),
+                ('translated_text', models.TextField(verbose_name='Перевод')),
+                ('backend', models.CharField(max_length=100, verbose_name='Переводчик')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Сегмент памяти переводов',
+                'verbose_name_plural': 'Память переводов',
+                'unique_together': {('source_lang', 'target_lang', 'source_hash')},
+            },
+        ),
+    ]
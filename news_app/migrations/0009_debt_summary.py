@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0008_machine_translation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DebtSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('active', 'Активный'), ('closed', 'Закрыт'), ('pending', 'В ожидании')], max_length=50, verbose_name='Статус')),
+                ('debt_type', models.CharField(max_length=50, verbose_name='Тип долга')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Сумма')),
+            ],
+            options={
+                'verbose_name': 'Итог по долгам',
+                'verbose_name_plural': 'Итоги по долгам',
+                'unique_together': {('status', 'debt_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_app', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('translation_id', models.PositiveIntegerField(verbose_name='ID перевода')),
+                ('news_id', models.PositiveIntegerField(verbose_name='ID новости')),
+                ('lang', models.CharField(choices=[('uz', "O'zbek"), ('ru', 'Русский'), ('kaa', 'Karakalpak')], max_length=5, verbose_name='Язык')),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удалённый перевод новости',
+                'verbose_name_plural': 'Удалённые переводы новостей',
+            },
+        ),
+    ]
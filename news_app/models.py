@@ -1,8 +1,36 @@
-from django.db import models
+from django.db import models, transaction
 from urllib.parse import urlparse, parse_qs
 from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .languages import fallback_chain
+from .storage import content_storage
+
+
+# ================== Translations ==================
+class TranslationQuerySet(models.QuerySet):
+    """Переводы с выбором языка по цепочке settings.TRANSLATION_FALLBACKS"""
+
+    def in_language(self, lang):
+        """
+        Один перевод на объект — первый имеющийся по цепочке языков (kaa -> uz -> ru).
+        Один запрос: перевод на язык цепочки берётся, только если нет перевода на язык левее
+        (NOT EXISTS по (объект, lang) — индекс unique_together); фильтры, поиск и пагинация
+        поверх работают как с обычным filter(lang=...).
+        """
+        chain = fallback_chain(lang)
+        parent = self.model.TRANSLATION_PARENT
+        condition = models.Q()
+        for position, code in enumerate(chain):
+            if position == 0:
+                condition |= models.Q(lang=code)
+                continue
+            better = self.model.objects.filter(**{parent: models.OuterRef(parent)}, lang__in=chain[:position])
+            condition |= models.Q(lang=code) & ~models.Exists(better)
+        return self.filter(condition)
+
 
 # ================== Category ==================
 class Category(models.Model):
@@ -28,11 +56,15 @@ class CategoryTranslation(models.Model):
         ('ru', "Русский"),
         ('kaa', "Karakalpak"),
     ]
+    # Поле объекта, переводом которого является запись (TranslationQuerySet.in_language)
+    TRANSLATION_PARENT = 'category'
 
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="translations")
     lang = models.CharField(max_length=5, choices=LANG_CHOICES, verbose_name="Язык")
     name = models.CharField(max_length=50, verbose_name="Название")
 
+    objects = TranslationQuerySet.as_manager()
+
     class Meta:
         unique_together = ('category', 'lang')
         verbose_name = "Перевод категории"
@@ -45,12 +77,22 @@ class CategoryTranslation(models.Model):
 # ================== News ==================
 class News(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    is_published = models.BooleanField(default=True, verbose_name="Опубликовано")
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Новость"
         verbose_name_plural = "Новости"
 
+    def save(self, *args, **kwargs):
+        # Одна транзакция: обработчики on_commit (карты сайта, кэш) видят уже обновлённые переводы
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Денормализованные поля переводов держим в синхроне с новостью
+            self.translations.exclude(
+                created_at=self.created_at, is_published=self.is_published
+            ).update(created_at=self.created_at, is_published=self.is_published, updated_at=timezone.now())
+
     def __str__(self):
         return f"News {self.id}"
 
@@ -61,21 +103,43 @@ class NewsTranslation(models.Model):
         ('ru', "Русский"),
         ('kaa', "Karakalpak"),
     ]
+    TRANSLATION_PARENT = 'news'
 
     news = models.ForeignKey(News, on_delete=models.CASCADE, related_name="translations")
     lang = models.CharField(max_length=5, choices=LANG_CHOICES, verbose_name="Язык")
-    image = models.ImageField(upload_to='news/', verbose_name="Изображение")
+    image = models.ImageField(upload_to='news/', storage=content_storage, db_index=True, verbose_name="Изображение")
     title = models.CharField(max_length=255, verbose_name="Заголовок")
     short_title = models.CharField(max_length=100, verbose_name="Короткий заголовок")
     description = models.TextField(verbose_name="Описание")
     short_description = models.TextField(verbose_name="Короткое описание")
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, verbose_name="Категория")
+    # Копии полей News для сортировки списков по индексу без JOIN (заполняются в save)
+    created_at = models.DateTimeField(null=True, editable=False, verbose_name="Дата создания")
+    is_published = models.BooleanField(default=True, editable=False, verbose_name="Опубликовано")
+    # Для инкрементальной синхронизации (/api/news?since=); update() в обход save() ставит его сам
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+    # Заполнен фоновым переводчиком (machine_translation); правка в админке снимает флаг
+    machine_translated = models.BooleanField(default=False, verbose_name="Машинный перевод")
+
+    objects = TranslationQuerySet.as_manager()
 
     class Meta:
         unique_together = ('news', 'lang')
+        indexes = [
+            models.Index(fields=['lang', '-created_at', '-id'], condition=models.Q(is_published=True),
+                         name='news_tr_lang_created_idx'),
+            models.Index(fields=['lang', 'category', '-created_at', '-id'], condition=models.Q(is_published=True),
+                         name='news_tr_lang_cat_created_idx'),
+            models.Index(fields=['lang', 'updated_at', 'id'], name='news_tr_lang_updated_idx'),
+        ]
         verbose_name = "Перевод новости"
         verbose_name_plural = "Переводы новостей"
 
+    def save(self, *args, **kwargs):
+        self.created_at = self.news.created_at
+        self.is_published = self.news.is_published
+        super().save(*args, **kwargs)
+
     def clean_image(self):
         image = self.cleaned_data.get('image')
         # Если нет картинки — запрещаем сохранение
@@ -87,6 +151,58 @@ class NewsTranslation(models.Model):
         return f"{self.lang} — {self.title}"
 
 
+class NewsSearchTerm(models.Model):
+    """Запись инвертированного индекса: термин -> перевод новости с весом"""
+    translation = models.ForeignKey(NewsTranslation, on_delete=models.CASCADE, related_name="search_terms")
+    lang = models.CharField(max_length=5, choices=NewsTranslation.LANG_CHOICES, verbose_name="Язык")
+    term = models.CharField(max_length=64, verbose_name="Термин")
+    weight = models.PositiveIntegerField(default=1, verbose_name="Вес")
+
+    class Meta:
+        unique_together = ('translation', 'term')
+        indexes = [
+            models.Index(fields=['lang', 'term'], name='news_search_lang_term_idx'),
+        ]
+        verbose_name = "Поисковый термин"
+        verbose_name_plural = "Поисковые термины"
+
+    def __str__(self):
+        return f"{self.lang} — {self.term}"
+
+
+class RelatedNews(models.Model):
+    """Предрассчитанные похожие новости (top-K для каждого перевода)"""
+    source = models.ForeignKey(NewsTranslation, on_delete=models.CASCADE, related_name="related_entries")
+    related = models.ForeignKey(NewsTranslation, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField(verbose_name="Оценка")
+
+    class Meta:
+        unique_together = ('source', 'related')
+        indexes = [
+            models.Index(fields=['source', '-score'], name='related_news_source_idx'),
+        ]
+        verbose_name = "Похожая новость"
+        verbose_name_plural = "Похожие новости"
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class NewsDeletion(models.Model):
+    """Метка удалённого перевода: /api/news?since= сообщает о нём клиентам (строки в выгрузке уже нет)"""
+    translation_id = models.PositiveIntegerField(verbose_name="ID перевода")
+    news_id = models.PositiveIntegerField(verbose_name="ID новости")
+    lang = models.CharField(max_length=5, choices=NewsTranslation.LANG_CHOICES, verbose_name="Язык")
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Дата удаления")
+
+    class Meta:
+        verbose_name = "Удалённый перевод новости"
+        verbose_name_plural = "Удалённые переводы новостей"
+
+    def __str__(self):
+        return f"{self.lang} — {self.translation_id}"
+
+
 # ================== Leaders ==================
 class Leaders(models.Model):
     REGION_CHOICES = [
@@ -108,7 +224,7 @@ class Leaders(models.Model):
 
     leader_name = models.CharField(max_length=50, verbose_name="ФИО")
     leader_position = models.CharField(max_length=50, verbose_name="Должность")
-    leader_image = models.ImageField(upload_to='leaders/', verbose_name="Фото")
+    leader_image = models.ImageField(upload_to='leaders/', storage=content_storage, verbose_name="Фото")
     leader_mail = models.EmailField(blank=True, verbose_name="Email")
     leader_phone = models.CharField(max_length=50, blank=True, verbose_name="Телефон")
     region = models.CharField(max_length=50, choices=REGION_CHOICES, blank=True, verbose_name="Регион")
@@ -168,7 +284,7 @@ class Leaders(models.Model):
             return None
         return None
 
-    @property
+    @cached_property
     def region_embed(self):
         embed = self._to_yandex_embed()
         return embed or (self.region_link or None)
@@ -193,6 +309,10 @@ class Debt(models.Model):
     description = models.TextField(verbose_name="Описание")
 
     class Meta:
+        indexes = [
+            models.Index(fields=['inn', 'status'], name='debt_inn_status_idx'),
+            models.Index(fields=['status', 'debt_type'], name='debt_status_type_idx'),
+        ]
         verbose_name = "Долг"
         verbose_name_plural = "Долги"
 
@@ -200,6 +320,25 @@ class Debt(models.Model):
         return f"{self.inn} - {self.full_name}"
 
 
+class DebtSummary(models.Model):
+    """
+    Число и сумма долгов по (статус, тип): меняется вместе с Debt (сигналы, импорт),
+    сверяется командой rebuild_debt_summary. Виджеты и админка читают её вместо агрегатов по Debt.
+    """
+    status = models.CharField(max_length=50, choices=Debt.STATUS_CHOICES, verbose_name="Статус")
+    debt_type = models.CharField(max_length=50, verbose_name="Тип долга")
+    count = models.BigIntegerField(default=0, verbose_name="Количество")
+    total_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Сумма")
+
+    class Meta:
+        unique_together = ('status', 'debt_type')
+        verbose_name = "Итог по долгам"
+        verbose_name_plural = "Итоги по долгам"
+
+    def __str__(self):
+        return f"{self.status} / {self.debt_type}: {self.count}"
+
+
 # =================== Guide ==================
 class Guide(models.Model):
     GUIDE_TYPE_CHOICES = [
@@ -255,6 +394,7 @@ class GuideTranslation(models.Model):
         ('ru', "Русский"),
         ('kaa', "Karakalpak"),
     ]
+    TRANSLATION_PARENT = 'guide'
 
     guide = models.ForeignKey(Guide, on_delete=models.CASCADE, related_name="translations")
     lang = models.CharField(max_length=5, choices=LANG_CHOICES, verbose_name="Язык")
@@ -262,6 +402,9 @@ class GuideTranslation(models.Model):
     short_title = models.CharField(max_length=100, verbose_name="Короткий заголовок", blank=True)
     description = models.TextField(verbose_name="Описание")
     short_description = models.TextField(verbose_name="Короткое описание", blank=True)
+    machine_translated = models.BooleanField(default=False, verbose_name="Машинный перевод")
+
+    objects = TranslationQuerySet.as_manager()
 
     class Meta:
         unique_together = ('guide', 'lang')
@@ -272,10 +415,79 @@ class GuideTranslation(models.Model):
         return f"{self.lang} — {self.title}"
     
     
+# ================== Image variants ==================
+class ImageVariants(models.Model):
+    """Манифест копий изображения: какие ширины созданы (пустой список — оригинал уже узкий)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Файл")
+    widths = models.JSONField(default=list, verbose_name="Ширины копий")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Копии изображения"
+        verbose_name_plural = "Копии изображений"
+
+    def __str__(self):
+        return self.name
+
+
+# ================== Machine translation ==================
+class TranslationMemory(models.Model):
+    """Переведённые сегменты: повторяющийся текст не отправляется переводчику второй раз"""
+    source_lang = models.CharField(max_length=5, verbose_name="Исходный язык")
+    target_lang = models.CharField(max_length=5, verbose_name="Язык перевода")
+    source_hash = models.CharField(max_length=64, verbose_name="SHA-256 исходного текста")
+    source_text = models.TextField(verbose_name="Исходный текст")
+    translated_text = models.TextField(verbose_name="Перевод")
+    backend = models.CharField(max_length=100, verbose_name="Переводчик")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        unique_together = ('source_lang', 'target_lang', 'source_hash')
+        verbose_name = "Сегмент памяти переводов"
+        verbose_name_plural = "Память переводов"
+
+    def __str__(self):
+        return f"{self.source_lang} -> {self.target_lang}: {self.source_text[:50]}"
+
+
+class TranslationJob(models.Model):
+    """Недостающий перевод объекта (новости или гайда) на язык — очередь фонового переводчика"""
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    ]
+    MODEL_CHOICES = [
+        ('NewsTranslation', "Новость"),
+        ('GuideTranslation', "Гайд"),
+    ]
+
+    model = models.CharField(max_length=30, choices=MODEL_CHOICES, verbose_name="Модель перевода")
+    object_id = models.PositiveIntegerField(verbose_name="ID новости или гайда")
+    target_lang = models.CharField(max_length=5, choices=NewsTranslation.LANG_CHOICES, verbose_name="Язык")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Статус")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+
+    class Meta:
+        unique_together = ('model', 'object_id', 'target_lang')
+        indexes = [
+            models.Index(fields=['status', 'id'], name='translation_job_status_idx'),
+        ]
+        verbose_name = "Задача машинного перевода"
+        verbose_name_plural = "Задачи машинного перевода"
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} -> {self.target_lang} ({self.status})"
+
+
 # ================== Partners ==================
 class Partners(models.Model):
     name = models.CharField(max_length=50, verbose_name="Название")
-    image = models.ImageField(upload_to='partners/', verbose_name="Изображение")
+    image = models.ImageField(upload_to='partners/', storage=content_storage, verbose_name="Изображение")
     link = models.URLField(verbose_name="Ссылка")
 
     class Meta:
@@ -0,0 +1,221 @@
+import json
+from collections import deque
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+from django.utils import timezone, translation
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from .models import NewsDeletion, NewsTranslation
+from .storage import content_storage
+
+# Выгрузка переводов новостей для мобильного приложения и партнёров (вместо разбора HTML).
+# Ответ формируется потоком: values() + iterator() читают БД пачками, память не растёт с объёмом.
+# Под ASGI поток отдаётся асинхронным итератором (синхронный Django собрал бы в список целиком).
+LANGS = [code for code, _ in NewsTranslation.LANG_CHOICES]
+FORMATS = ('ndjson', 'json')
+
+# Подставляется вместо id при однократном reverse на язык
+_ID_PLACEHOLDER = 987654321
+
+# поле ответа -> колонки values(), из которых оно собирается
+FIELDS = {
+    'id': ('id',),
+    'news_id': ('news_id',),
+    'lang': ('lang',),
+    'title': ('title',),
+    'short_title': ('short_title',),
+    'short_description': ('short_description',),
+    'description': ('description',),
+    'category': ('category__slug',),
+    'image': ('image',),
+    'url': ('lang', 'news_id'),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+    'is_published': ('is_published',),
+}
+
+
+class InvalidParameter(ValueError):
+    def __init__(self, error, **details):
+        super().__init__(error)
+        self.error = error
+        self.details = details
+
+
+def parse_params(params, default_lang):
+    """GET-параметры -> (языки, категория, since, поля, формат); ошибка -> InvalidParameter"""
+    langs = [lang for value in params.getlist('lang') for lang in value.split(',') if lang] or [default_lang]
+    if 'all' in langs:
+        langs = LANGS
+    if any(lang not in LANGS for lang in langs):
+        raise InvalidParameter('invalid_lang', allowed=LANGS)
+
+    fields = [field for field in params.get('fields', '').split(',') if field] or list(FIELDS)
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise InvalidParameter('invalid_fields', invalid=unknown, allowed=list(FIELDS))
+
+    since = None
+    if params.get('since'):
+        try:
+            since = parse_datetime(params['since'])
+        except ValueError:
+            since = None
+        if since is None:
+            raise InvalidParameter('invalid_since', expected='ISO 8601')
+        if is_naive(since):
+            since = make_aware(since)
+        if since < deletions_kept_since():
+            # Метки удалений за это время уже удалены — клиенту нужна полная выгрузка
+            raise InvalidParameter('since_expired', max_age_days=settings.NEWS_API_DELETION_DAYS)
+
+    output = params.get('format', 'ndjson')
+    if output not in FORMATS:
+        raise InvalidParameter('invalid_format', allowed=list(FORMATS))
+    return list(dict.fromkeys(langs)), params.get('category') or None, since, list(dict.fromkeys(fields)), output
+
+
+def next_since():
+    """
+    since для следующей синхронизации: начало выгрузки минус NEWS_API_SYNC_LAG.
+    updated_at ставится при save(), а не при коммите: запись, закоммиченная позже начала выгрузки,
+    может иметь более раннее updated_at. Поэтому следующая синхронизация повторяет окно NEWS_API_SYNC_LAG
+    (since включительно); повторы клиент обновляет по id.
+    """
+    return timezone.now() - timedelta(seconds=settings.NEWS_API_SYNC_LAG)
+
+
+def deletions_kept_since():
+    return timezone.now() - timedelta(days=settings.NEWS_API_DELETION_DAYS)
+
+
+def purge_deletions():
+    NewsDeletion.objects.filter(deleted_at__lt=deletions_kept_since()).delete()
+
+
+def queryset(langs, category, since, fields):
+    """
+    Без since — опубликованные переводы; с since — все изменённые с этого момента, включая снятые
+    с публикации (is_published: false), чтобы клиент мог их убрать. Порядок — по времени изменения.
+    """
+    news = NewsTranslation.objects.filter(lang__in=langs)
+    if since is None:
+        news = news.filter(is_published=True)
+    else:
+        news = news.filter(updated_at__gte=since)
+    if category:
+        news = news.filter(category__slug=category)
+    columns = {'updated_at', 'id'} | {column for field in fields for column in FIELDS[field]}
+    return news.order_by('updated_at', 'id').values(*columns)
+
+
+def deletions(langs, since):
+    """Удалённые с since переводы (без фильтра по категории: у удалённой записи её уже не узнать)"""
+    if since is None:
+        return []
+    return list(
+        NewsDeletion.objects.filter(lang__in=langs, deleted_at__gte=since)
+        .order_by('deleted_at', 'id').values('translation_id', 'news_id', 'lang', 'deleted_at')
+    )
+
+
+def _news_paths(langs):
+    paths = {}
+    for lang in langs:
+        with translation.override(lang):
+            paths[lang] = reverse('news_detail', kwargs={'news_id': _ID_PLACEHOLDER}).replace(
+                str(_ID_PLACEHOLDER), '{}'
+            )
+    return paths
+
+
+def _serializer(fields, langs):
+    paths = _news_paths(langs)
+    site = settings.SITE_URL.rstrip('/')
+
+    def value(row, field):
+        if field == 'url':
+            return site + paths[row['lang']].format(row['news_id'])
+        if field == 'image':
+            return site + content_storage.url(row['image']) if row['image'] else None
+        if field == 'category':
+            return row['category__slug']
+        return row[field]
+
+    def serialize(row):
+        return json.dumps({field: value(row, field) for field in fields}, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return serialize
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows.iterator(chunk_size=settings.NEWS_API_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) >= settings.NEWS_API_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _tombstone(deletion):
+    return json.dumps({
+        'id': deletion['translation_id'],
+        'news_id': deletion['news_id'],
+        'lang': deletion['lang'],
+        'updated_at': deletion['deleted_at'],
+        'deleted': True,
+    }, cls=DjangoJSONEncoder)
+
+
+def _items(rows, fields, langs, removed):
+    """Пачки сериализованных записей; метки удаления встают между строками по времени изменения"""
+    serialize = _serializer(fields, langs)
+    pending = deque(removed)
+    for chunk in _chunks(rows):
+        items = []
+        for row in chunk:
+            while pending and pending[0]['deleted_at'] <= row['updated_at']:
+                items.append(_tombstone(pending.popleft()))
+            items.append(serialize(row))
+        yield items
+    if pending:
+        yield [_tombstone(deletion) for deletion in pending]
+
+
+def stream(rows, fields, langs, output, removed=(), since_next=None):
+    """
+    Части ответа по NEWS_API_CHUNK_SIZE записей: строки NDJSON или один JSON-объект.
+    Удалённые переводы приходят как {"id", "news_id", "lang", "updated_at", "deleted": true}.
+    """
+    if output == 'ndjson':
+        for items in _items(rows, fields, langs, removed):
+            yield ''.join(item + '\n' for item in items)
+        return
+
+    yield '{"results":['
+    count = 0
+    for items in _items(rows, fields, langs, removed):
+        yield (',' if count else '') + ','.join(items)
+        count += len(items)
+    # next_since — значение since для следующей синхронизации (то же, что в заголовке X-Next-Since)
+    yield '],' + json.dumps({'count': count, 'next_since': since_next}, cls=DjangoJSONEncoder)[1:]
+
+
+async def aiterate(chunks):
+    """
+    Асинхронная обёртка над stream() для ASGI: каждая часть читается sync_to_async в потоке
+    для синхронного кода (там же, где закрывается подключение к БД после ответа).
+    """
+    pull = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await pull(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
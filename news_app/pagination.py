@@ -0,0 +1,155 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# ================== Cursor (keyset) pagination ==================
+def encode_cursor(values):
+    """Кодирует значения ключей сортировки в строку для URL"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """
+    Декодирует курсор в значения типов types (datetime, int, float — по ключам сортировки);
+    при любой ошибке или несовпадении числа и типов значений возвращает None (как PageNotAnInteger)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(types):
+        return None
+    decoded = []
+    for value, expected in zip(values, types):
+        if expected is datetime:
+            if not isinstance(value, str):
+                return None
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        elif isinstance(value, bool) or not isinstance(value, (int, float) if expected is float else int):
+            return None
+        decoded.append(value)
+    return decoded
+
+
+def _key_type(queryset, key):
+    """Тип значения ключа сортировки: поле модели, pk или аннотация (score поиска)"""
+    if key == 'pk':
+        field = queryset.model._meta.pk
+    elif key in queryset.query.annotations:
+        field = queryset.query.annotations[key].output_field
+    else:
+        field = queryset.model._meta.get_field(key)
+    internal_type = field.get_internal_type()
+    if internal_type in ('DateTimeField', 'DateField'):
+        return datetime
+    if internal_type in ('FloatField', 'DecimalField'):
+        return float
+    return int
+
+
+def _key_value(obj, key):
+    for attr in key.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _keyset_condition(keys, values, lookup):
+    """(k1 < v1) OR (k1 = v1 AND k2 < v2) OR ... — условие «после курсора»"""
+    condition = Q()
+    for i, key in enumerate(keys):
+        clause = Q(**{f'{key}__{lookup}': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            clause &= Q(**{prev_key: prev_value})
+        condition |= clause
+    return condition
+
+
+class CursorPage:
+    """Страница курсорной пагинации; стоимость не зависит от номера страницы"""
+
+    def __init__(self, object_list, keys, has_next, has_previous):
+        self.object_list = object_list
+        # Курсор за концом списка даёт пустую страницу — ссылок с неё нет
+        self.has_next = has_next and bool(object_list)
+        self.has_previous = has_previous and bool(object_list)
+        self.next_cursor = encode_cursor([_key_value(object_list[-1], k) for k in keys]) if self.has_next else None
+        self.previous_cursor = encode_cursor([_key_value(object_list[0], k) for k in keys]) if self.has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def paginate_by_cursor(queryset, keys, after=None, before=None, per_page=12):
+    """
+    Курсорная пагинация по убыванию ключей (например, дата создания + id).
+    after — курсор последнего элемента предыдущей страницы,
+    before — курсор первого элемента следующей страницы (листание назад).
+    Последний ключ должен быть уникальным (pk).
+    """
+    types = [_key_type(queryset, key) for key in keys] if after or before else None
+    after_values = decode_cursor(after, types) if after else None
+    before_values = decode_cursor(before, types) if before and not after_values else None
+
+    if after_values:
+        queryset = queryset.filter(_keyset_condition(keys, after_values, 'lt'))
+    elif before_values:
+        queryset = queryset.filter(_keyset_condition(keys, before_values, 'gt'))
+        items = list(queryset.order_by(*keys)[:per_page + 1])
+        has_more = len(items) > per_page
+        items = items[:per_page][::-1]
+        return CursorPage(items, keys, has_next=bool(items), has_previous=has_more)
+    else:
+        after_values = None
+
+    items = list(queryset.order_by(*[f'-{key}' for key in keys])[:per_page + 1])
+    has_next = len(items) > per_page
+    return CursorPage(items[:per_page], keys, has_next=has_next, has_previous=bool(after_values))
+
+
+# ================== Cached count ==================
+def cached_count(queryset, key_parts, timeout=None):
+    """
+    Приблизительное число объектов: COUNT(*) выполняется не чаще раза в timeout секунд
+    для одной комбинации фильтров (язык, категория, поиск).
+    """
+    if timeout is None:
+        timeout = settings.NEWS_COUNT_CACHE_TIMEOUT
+    digest = hashlib.md5('|'.join(str(p) for p in key_parts).encode()).hexdigest()
+    cache_key = f'news_count:{digest}'
+
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт общее число объектов из кэша"""
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        self.count_key = count_key
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list, self.count_key)
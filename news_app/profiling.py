@@ -0,0 +1,103 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as DjangoTemplate
+
+# Активные замеры (вложенные profile() — например, бенчмарк поверх middleware — видят рендер все)
+_current = ContextVar('news_app_profile', default=())
+_original_render = DjangoTemplate.render
+
+
+class Profile:
+    """Замеры одного запроса: SQL (число, время, сами запросы) и рендер шаблонов"""
+
+    def __init__(self, keep_sql=False):
+        self.keep_sql = keep_sql
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.queries = []
+        self._template_depth = 0
+        self._lock = threading.Lock()
+
+    def add_sql(self, elapsed, sql):
+        # SQL может идти из нескольких потоков (секции главной, sync_to_async)
+        with self._lock:
+            self.sql_count += 1
+            self.sql_time += elapsed
+            if self.keep_sql:
+                self.queries.append((elapsed, sql))
+
+
+def _timed_execute(execute, sql, params, many, context):
+    profiles = _current.get()
+    if not profiles:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for profile in profiles:
+            profile.add_sql(elapsed, sql)
+
+
+def _attach(connection, **kwargs):
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+def _timed_render(self, context=None, request=None):
+    profiles = _current.get()
+    if not profiles:
+        return _original_render(self, context, request)
+    # Вложенные render_to_string считаем один раз — по внешнему вызову
+    for profile in profiles:
+        profile._template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        elapsed = time.perf_counter() - started
+        for profile in profiles:
+            profile._template_depth -= 1
+            if not profile._template_depth:
+                profile.template_time += elapsed
+
+
+def install():
+    """
+    Подменяет render шаблонов Django и подключает замер SQL ко всем соединениям один раз на процесс.
+    Замеры берутся из ContextVar — их видит код запроса в любом потоке (sync_to_async копирует контекст);
+    без активного Profile — без накладных расходов.
+    """
+    if DjangoTemplate.render is not _timed_render:
+        DjangoTemplate.render = _timed_render
+        connection_created.connect(_attach, dispatch_uid='news_app_profiling')
+    # Соединения, открытые в этом потоке до подключения сигнала
+    for connection in connections.all(initialized_only=True):
+        _attach(connection)
+
+
+@contextmanager
+def profile(keep_sql=False):
+    """Собирает замеры для кода внутри блока (все подключения к БД, все потоки запроса)"""
+    install()
+    current = Profile(keep_sql=keep_sql)
+    token = _current.set(_current.get() + (current,))
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def percentile(sorted_values, p):
+    """p-й процентиль (ближайший ранг) уже отсортированного списка замеров"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
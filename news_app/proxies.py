@@ -0,0 +1,18 @@
+from django.conf import settings
+
+# Адрес клиента за обратным прокси (deploy/nginx.conf). REMOTE_ADDR за nginx — всегда 127.0.0.1,
+# поэтому лимиты и списки доступа смотрят в X-Forwarded-For, но доверяют только адресам,
+# которые дописали свои прокси (TRUSTED_PROXY_COUNT) — начало заголовка присылает клиент.
+
+
+def client_ip(request):
+    remote = request.META.get('REMOTE_ADDR', '')
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if not proxies:
+        return remote
+    forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    forwarded = [part for part in forwarded if part]
+    if len(forwarded) < proxies:
+        # Запрос пришёл мимо прокси (например, с самого сервера)
+        return remote
+    return forwarded[-proxies]
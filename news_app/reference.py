@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, CategoryTranslation, Guide, GuideTranslation, Leaders, Partners
+from . import caching
+from .languages import fallback_chain
+
+# Справочные данные (категории, гайды, руководство, партнёры) меняются раз в месяц,
+# а нужны почти на каждой странице. Два уровня:
+#   1) LRU в памяти воркера — без сети и БД; версия секции перепроверяется раз в REFERENCE_LOCAL_TTL;
+#   2) общий кэш (Redis) под ключом с версией секции — один воркер строит, остальные читают.
+# Сохранение модели поднимает версию секции (сигналы) — это видят все воркеры.
+# Значения общие для потоков: вызывающий код их только читает.
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def _remember(key, version, value):
+    with _lock:
+        _local[key] = (version, time.monotonic(), value)
+        _local.move_to_end(key)
+        while len(_local) > settings.REFERENCE_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def cached(section, name, builder):
+    """Значение builder() для секции версий caching; builder должен возвращать списки/словари, не querysets"""
+    key = f'{section}:{name}'
+    with _lock:
+        entry = _local.get(key)
+        if entry is not None:
+            _local.move_to_end(key)
+
+    if entry is not None and time.monotonic() - entry[1] < settings.REFERENCE_LOCAL_TTL:
+        return entry[2]
+
+    version = caching.get_versions([section])[section]
+    if entry is not None and entry[0] == version:
+        _remember(key, version, entry[2])
+        return entry[2]
+
+    shared_key = f'reference:{key}:{version}'
+    value = cache.get(shared_key)
+    if value is None:
+        value = builder()
+        cache.set(shared_key, value, settings.REFERENCE_CACHE_TIMEOUT)
+    _remember(key, version, value)
+    return value
+
+
+def forget(section):
+    """Сбрасывает локальный уровень секции (в воркере, где было сохранение, — сразу)"""
+    prefix = f'{section}:'
+    with _lock:
+        for key in [k for k in _local if k.startswith(prefix)]:
+            del _local[key]
+
+
+# ================== Datasets ==================
+def categories(lang):
+    """Переводы категорий языка вместе с категорией (slug для ссылок фильтра)"""
+    return cached('categories', f'translations:{lang}', lambda: list(
+        CategoryTranslation.objects.in_language(lang).select_related('category').order_by('category_id')
+    ))
+
+
+def category_ids():
+    """slug -> id категории"""
+    return cached('categories', 'ids', lambda: dict(Category.objects.values_list('slug', 'id')))
+
+
+def guide_translations(lang):
+    """Перевод каждого гайда на язык или по цепочке TRANSLATION_FALLBACKS"""
+    return cached('guides', f'translations:{lang}', lambda: list(
+        GuideTranslation.objects.in_language(lang).select_related('guide').order_by('guide_id')
+    ))
+
+
+def guides(lang):
+    """Гайды, у которых есть перевод на язык или его запасные языки (с предзагруженными переводами)"""
+    return cached('guides', f'guides:{lang}', lambda: list(
+        Guide.objects.prefetch_related('translations')
+        .filter(translations__lang__in=fallback_chain(lang)).distinct().order_by('id')
+    ))
+
+
+def leaders():
+    return cached('leaders', 'all', lambda: list(Leaders.objects.order_by('id')))
+
+
+def partners():
+    return cached('partners', 'all', lambda: list(Partners.objects.order_by('id')))
@@ -0,0 +1,50 @@
+from .models import Leaders
+from . import reference
+from .templatetags.images import variant_url
+
+# Материализованный список «регион -> представитель» (двухуровневый кэш reference, секция leaders)
+
+REGION_ORDER = {code: position for position, (code, _) in enumerate(Leaders.REGION_CHOICES)}
+
+
+def _build():
+    region_map = {}
+    for leader in reference.leaders():
+        if leader.region and leader.region_link is not None:
+            region_map.setdefault(leader.region, leader)
+
+    leaders = sorted(
+        (leader for region, leader in region_map.items() if region in REGION_ORDER),
+        key=lambda leader: REGION_ORDER[leader.region],
+    )
+    # Разбор ссылки Яндекс.Карт — один раз при построении, а не на каждом рендере
+    for leader in leaders:
+        leader.region_embed
+    return leaders
+
+
+def get_region_leaders():
+    """Упорядоченный по REGION_CHOICES список (не более одного лидера на регион)"""
+    return reference.cached('leaders', 'regions', _build)
+
+
+def region_leaders(region=None):
+    """Все лидеры региона (или все, если регион не задан) в порядке id"""
+    leaders = reference.leaders()
+    if region is None:
+        return leaders
+    return [leader for leader in leaders if leader.region == region]
+
+
+def serialize(leader):
+    """Компактное представление для /api/leaders"""
+    return {
+        'id': leader.id,
+        'name': leader.leader_name,
+        'position': leader.leader_position,
+        'image': variant_url(leader.leader_image, 640),
+        'mail': leader.leader_mail,
+        'phone': leader.leader_phone,
+        'region': leader.region,
+        'region_embed': leader.region_embed or '',
+    }
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import NewsTranslation, RelatedNews
+from .search import tokenize
+
+# Сколько кандидатов брать с каждой стороны по времени (в категории и во всём языке)
+CANDIDATES_PER_SIDE = 30
+
+CATEGORY_WEIGHT = 2.0
+RECENCY_WEIGHT = 1.0
+RECENCY_HALF_LIFE_DAYS = 30
+TITLE_OVERLAP_WEIGHT = 3.0
+
+
+def _title_terms(translation):
+    return set(tokenize(translation.title))
+
+
+def score(a, b):
+    """Симметричная оценка похожести двух переводов одного языка"""
+    value = 0.0
+    if a.category_id and a.category_id == b.category_id:
+        value += CATEGORY_WEIGHT
+
+    days = abs((a.created_at - b.created_at).total_seconds()) / 86400
+    value += RECENCY_WEIGHT * RECENCY_HALF_LIFE_DAYS / (RECENCY_HALF_LIFE_DAYS + days)
+
+    if settings.RELATED_NEWS_TITLE_OVERLAP:
+        terms_a, terms_b = _title_terms(a), _title_terms(b)
+        if terms_a and terms_b:
+            value += TITLE_OVERLAP_WEIGHT * len(terms_a & terms_b) / len(terms_a | terms_b)
+    return value
+
+
+def _candidates(translation):
+    """Ограниченный набор кандидатов: ближайшие по времени в категории и во всём языке"""
+    created_at = translation.created_at
+    base = (
+        NewsTranslation.objects
+        .filter(lang=translation.lang, is_published=True)
+        .exclude(pk=translation.pk)
+        .only('id', 'title', 'lang', 'category_id', 'created_at')
+    )
+    scopes = [base]
+    if translation.category_id:
+        scopes.append(base.filter(category_id=translation.category_id))
+
+    candidates = {}
+    for scope in scopes:
+        older = scope.filter(created_at__lte=created_at).order_by('-created_at')
+        newer = scope.filter(created_at__gt=created_at).order_by('created_at')
+        for qs in (older, newer):
+            for item in qs[:CANDIDATES_PER_SIDE]:
+                candidates[item.pk] = item
+    return list(candidates.values())
+
+
+def _top(translation, candidates, k):
+    scored = sorted(((score(translation, c), c.pk) for c in candidates), reverse=True)
+    return scored[:k]
+
+
+def refresh_related(translation, k=None):
+    """
+    Пересчитывает top-K похожих для перевода и точечно обновляет списки
+    кандидатов, в которые этот перевод теперь должен попасть.
+    """
+    k = k or settings.RELATED_NEWS_COUNT
+    candidates = _candidates(translation)
+    top = _top(translation, candidates, k)
+
+    with transaction.atomic():
+        RelatedNews.objects.filter(source=translation).delete()
+        RelatedNews.objects.bulk_create([
+            RelatedNews(source=translation, related_id=pk, score=value) for value, pk in top
+        ])
+
+        # Обратные связи: оценка симметрична, поэтому сравниваем с худшим элементом списка кандидата
+        entries = {}
+        for entry in RelatedNews.objects.filter(source__in=candidates).only('id', 'source_id', 'related_id', 'score'):
+            entries.setdefault(entry.source_id, []).append(entry)
+
+        for candidate in candidates:
+            value = score(translation, candidate)
+            current = entries.get(candidate.pk, [])
+            own = next((e for e in current if e.related_id == translation.pk), None)
+            if own:
+                if own.score != value:
+                    RelatedNews.objects.filter(pk=own.pk).update(score=value)
+                continue
+            if len(current) < k:
+                RelatedNews.objects.create(source=candidate, related=translation, score=value)
+                continue
+            worst = min(current, key=lambda e: e.score)
+            if value > worst.score:
+                worst.delete()
+                RelatedNews.objects.create(source=candidate, related=translation, score=value)
+
+
+def rebuild_related(queryset=None, k=None):
+    """Полный пересчёт без обратных обновлений; возвращает число переводов"""
+    k = k or settings.RELATED_NEWS_COUNT
+    if queryset is None:
+        queryset = NewsTranslation.objects.all()
+
+    total = 0
+    for translation in queryset.filter(created_at__isnull=False).iterator(chunk_size=500):
+        top = _top(translation, _candidates(translation), k)
+        with transaction.atomic():
+            RelatedNews.objects.filter(source=translation).delete()
+            RelatedNews.objects.bulk_create([
+                RelatedNews(source=translation, related_id=pk, score=value) for value, pk in top
+            ])
+        total += 1
+    return total
+
+
+def get_related(translation, k=None):
+    """Похожие новости для страницы: одно чтение по индексу (source, -score)"""
+    k = k or settings.RELATED_NEWS_COUNT
+    entries = (
+        RelatedNews.objects.filter(source=translation, related__is_published=True)
+        .select_related('related__category')
+        .order_by('-score')[:k]
+    )
+    return [entry.related for entry in entries]
@@ -0,0 +1,129 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils.html import strip_tags
+
+from .languages import fallback_chain
+from .models import NewsTranslation, NewsSearchTerm
+
+# Веса полей при ранжировании
+FIELD_WEIGHTS = (
+    ('title', 5),
+    ('short_title', 4),
+    ('short_description', 2),
+    ('description', 1),
+)
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+# Кириллица (узбекская, каракалпакская, русская) -> латиница.
+# Апострофы (o', g') отбрасываются при нормализации, поэтому ў -> o, ғ -> g.
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'j', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '',
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+    'ә': 'a', 'ө': 'o', 'ү': 'u', 'ң': 'n', 'ұ': 'u', 'і': 'i',
+    'ı': 'i',
+}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+APOSTROPHE_RE = re.compile(r"['`ʻʼ‘’]")
+
+
+def normalize(text):
+    """Приводит текст к единой латинской форме без апострофов и диакритики"""
+    text = (text or '').lower()
+    text = ''.join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in text)
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Разбивает текст на нормализованные термины"""
+    # Апострофы внутри слов (o'zbek, g'alla) склеиваем, а не разрываем
+    text = APOSTROPHE_RE.sub('', normalize(text))
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text)
+        if len(token) >= MIN_TERM_LENGTH
+    ]
+
+
+def build_terms(translation):
+    """Подсчитывает взвешенные термины одного перевода новости"""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        value = strip_tags(getattr(translation, field) or '')
+        for token in tokenize(value):
+            weights[token] += weight
+    return weights
+
+
+def _term_objects(translation):
+    return [
+        NewsSearchTerm(translation=translation, lang=translation.lang, term=term, weight=weight)
+        for term, weight in build_terms(translation).items()
+    ]
+
+
+def index_translation(translation):
+    """Переиндексирует один перевод (вызывается из сигнала post_save)"""
+    with transaction.atomic():
+        NewsSearchTerm.objects.filter(translation=translation).delete()
+        NewsSearchTerm.objects.bulk_create(_term_objects(translation))
+
+
+def rebuild_index(queryset=None, batch_size=500):
+    """Полностью перестраивает индекс пачками, возвращает число переводов"""
+    if queryset is None:
+        queryset = NewsTranslation.objects.all()
+    NewsSearchTerm.objects.filter(translation__in=queryset).delete()
+
+    total = 0
+    batch = []
+    for translation in queryset.only(*[f for f, _ in FIELD_WEIGHTS], 'lang').iterator(chunk_size=batch_size):
+        batch.extend(_term_objects(translation))
+        total += 1
+        if len(batch) >= batch_size * 20:
+            NewsSearchTerm.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    if batch:
+        NewsSearchTerm.objects.bulk_create(batch, batch_size=batch_size)
+    return total
+
+
+def _prefix_condition(term):
+    # Диапазон вместо LIKE: работает по B-tree индексу (lang, term) на любой СУБД.
+    # Термины состоят только из [a-z0-9], а '{' идёт в ASCII сразу после 'z'.
+    return Q(search_terms__term__gte=term, search_terms__term__lt=term + '{')
+
+
+def search(queryset, lang, query):
+    """
+    Фильтрует queryset переводов по поисковому запросу через инвертированный индекс.
+    Каждое слово запроса ищется по префиксу (учитывает окончания: yangilik -> yangiliklar).
+    Результат отсортирован по релевантности, затем по дате.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset.none()
+
+    condition = Q()
+    for term in terms:
+        condition |= _prefix_condition(term)
+
+    # filter() до annotate(): сумма весов считается только по совпавшим терминам.
+    # Языки цепочки — для переводов, подставленных вместо отсутствующих (in_language)
+    return (
+        queryset.filter(condition, search_terms__lang__in=fallback_chain(lang))
+        .annotate(score=Sum('search_terms__weight'))
+        .order_by('-score', '-created_at')
+    )
@@ -0,0 +1,284 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import News, NewsTranslation, NewsDeletion, Guide, GuideTranslation, RelatedNews, Debt
+from . import caching
+from . import debts
+from . import export
+from . import reference
+from . import feeds
+from . import images
+from . import machine_translation
+from . import news_api
+from . import search
+from . import suggest
+from . import related
+
+
+# ================== Search ==================
+@receiver(post_save, sender=NewsTranslation)
+def reindex_news_translation(sender, instance, raw=False, **kwargs):
+    """Обновляет поисковый индекс перевода (удаление — через CASCADE)"""
+    if raw:
+        return
+    search.index_translation(instance)
+
+
+# ================== Related news ==================
+@receiver(post_save, sender=NewsTranslation)
+def refresh_related_news(sender, instance, raw=False, **kwargs):
+    """Пересчитывает похожие новости для перевода и его соседей"""
+    if raw:
+        return
+    related.refresh_related(instance)
+
+
+@receiver(pre_delete, sender=NewsTranslation)
+def remember_related_sources(sender, instance, **kwargs):
+    # Списки, где был удаляемый перевод, станут короче — запоминаем их до CASCADE
+    instance._related_sources = list(
+        RelatedNews.objects.filter(related=instance).values_list('source_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=NewsTranslation)
+def refill_related_news(sender, instance, **kwargs):
+    sources = getattr(instance, '_related_sources', None)
+    if sources:
+        related.rebuild_related(NewsTranslation.objects.filter(pk__in=sources))
+
+
+# ================== Suggestions ==================
+def _record_suggestions(kind, pks):
+    pks = list(pks)
+
+    def record():
+        for pk in pks:
+            suggest.record(kind, pk)
+    transaction.on_commit(record)
+
+
+@receiver([post_save, post_delete], sender=NewsTranslation)
+def update_news_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _record_suggestions(suggest.NEWS, [instance.pk])
+
+
+@receiver(post_save, sender=News)
+def update_news_suggestions_for_news(sender, instance, raw=False, **kwargs):
+    # Публикация меняется на News и копируется в переводы через update() — без их сигналов
+    if raw:
+        return
+    _record_suggestions(suggest.NEWS, instance.translations.values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=GuideTranslation)
+def update_guide_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _record_suggestions(suggest.GUIDE, [instance.pk])
+
+
+@receiver(post_save, sender=Guide)
+def update_guide_suggestions_for_guide(sender, instance, raw=False, **kwargs):
+    # guide_type входит в URL подсказки
+    if raw:
+        return
+    _record_suggestions(suggest.GUIDE, instance.translations.values_list('pk', flat=True))
+
+
+# ================== Cache sections ==================
+def _section_invalidator(sections):
+    def invalidate(sender, raw=False, **kwargs):
+        if raw:
+            return
+
+        # После коммита: иначе параллельный запрос может закэшировать старые данные под новой версией
+        def bump():
+            for section in sections:
+                caching.bump_version(section)
+                reference.forget(section)
+        transaction.on_commit(bump)
+    return invalidate
+
+
+for _model_name, _sections in caching.sections_by_model().items():
+    _handler = _section_invalidator(sorted(_sections))
+    _model = apps.get_model('news_app', _model_name)
+    post_save.connect(_handler, sender=_model, weak=False,
+                      dispatch_uid=f'cache_sections_{_model_name}_save')
+    post_delete.connect(_handler, sender=_model, weak=False,
+                        dispatch_uid=f'cache_sections_{_model_name}_delete')
+
+
+# ================== Image variants ==================
+def _image_variants_scheduler(model_name, field_name):
+    # Закэшированная главная должна получить srcset, когда копии будут готовы
+    section = next((s for s, names in caching.HOMEPAGE_SECTIONS.items() if model_name in names), None)
+
+    def on_done(future):
+        if section and not future.cancelled() and future.result():
+            caching.bump_version(section)
+
+    def schedule(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        name = getattr(instance, field_name).name
+        if name:
+            transaction.on_commit(lambda: images.schedule_variants(name).add_done_callback(on_done))
+    return schedule
+
+
+def _image_name_recorder(model, field_name):
+    # При замене изображения старый файл может остаться без ссылок
+    def remember(sender, instance, raw=False, **kwargs):
+        if raw or not instance.pk:
+            return
+        instance._old_image = model.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+    return remember
+
+
+def _replaced_image_releaser(field_name):
+    def release(sender, instance, raw=False, **kwargs):
+        old = getattr(instance, '_old_image', None)
+        if raw or not old or old == getattr(instance, field_name).name:
+            return
+        transaction.on_commit(lambda: images.release(old))
+    return release
+
+
+def _deleted_image_releaser(field_name):
+    def release(sender, instance, **kwargs):
+        name = getattr(instance, field_name).name
+        if name:
+            # Файл может быть общим с другими переводами — удаляется только без ссылок
+            transaction.on_commit(lambda: images.release(name))
+    return release
+
+
+for _model_name, _field_name in images.IMAGE_FIELDS.items():
+    _model = apps.get_model('news_app', _model_name)
+    post_save.connect(_image_variants_scheduler(_model_name, _field_name), sender=_model, weak=False,
+                      dispatch_uid=f'image_variants_{_model_name}_save')
+    pre_save.connect(_image_name_recorder(_model, _field_name), sender=_model, weak=False,
+                     dispatch_uid=f'image_files_{_model_name}_old')
+    post_save.connect(_replaced_image_releaser(_field_name), sender=_model, weak=False,
+                      dispatch_uid=f'image_files_{_model_name}_save')
+    post_delete.connect(_deleted_image_releaser(_field_name), sender=_model, weak=False,
+                        dispatch_uid=f'image_files_{_model_name}_delete')
+
+
+# ================== Debt lookup cache ==================
+@receiver(pre_save, sender=Debt)
+def remember_debt_state(sender, instance, **kwargs):
+    # При смене ИНН нужно сбросить кэш и для старого значения; статус, тип и сумма — для итогов
+    instance._old_state = None
+    if instance.pk:
+        instance._old_state = Debt.objects.filter(pk=instance.pk).values_list(
+            'inn', 'status', 'debt_type', 'debt_amount'
+        ).first()
+        instance._old_inn = instance._old_state[0] if instance._old_state else None
+
+
+@receiver([post_save, post_delete], sender=Debt)
+def invalidate_debt_lookup(sender, instance, **kwargs):
+    inns = {instance.inn, getattr(instance, '_old_inn', None)}
+    transaction.on_commit(lambda: debts.invalidate(*inns))
+
+
+# ================== Debt summary ==================
+@receiver(post_save, sender=Debt)
+def update_debt_summary(sender, instance, raw=False, **kwargs):
+    """Переносит долг между группами DebtSummary в той же транзакции"""
+    # loaddata: итоги приходят из той же фикстуры или пересчитываются rebuild_debt_summary
+    if raw:
+        return
+    deltas = {}
+    old = getattr(instance, '_old_state', None)
+    if old is not None:
+        debts.add_delta(deltas, (old[1], old[2]), -1, -old[3])
+    debts.add_delta(deltas, (instance.status, instance.debt_type), 1, instance.debt_amount)
+    debts.apply_summary(deltas)
+
+
+@receiver(post_delete, sender=Debt)
+def remove_from_debt_summary(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    debts.add_delta(deltas, (instance.status, instance.debt_type), -1, -instance.debt_amount)
+    debts.apply_summary(deltas)
+
+
+# ================== Sitemaps and feeds ==================
+@receiver([post_save, post_delete], sender=NewsTranslation)
+def update_news_feeds(sender, instance, raw=False, **kwargs):
+    """Переписывает шард карты сайта и ленты языка перевода"""
+    if raw:
+        return
+    feeds.schedule(feeds.update_news, instance.lang, instance.news_id)
+
+
+@receiver(post_save, sender=News)
+def update_news_feeds_for_news(sender, instance, raw=False, **kwargs):
+    # Публикация и дата меняются на News и копируются в переводы через update() — без их сигналов
+    if raw:
+        return
+    for lang in instance.translations.values_list('lang', flat=True):
+        feeds.schedule(feeds.update_news, lang, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=GuideTranslation)
+def update_guide_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    feeds.schedule(feeds.update_guides, instance.lang)
+
+
+@receiver([post_save, post_delete], sender=Guide)
+def update_guide_feeds_for_guide(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for lang in feeds.LANGS:
+        feeds.schedule(feeds.update_guides, lang)
+
+
+# ================== Static export ==================
+def _export_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    export.schedule(instance, structural=created)
+
+
+def _export_on_delete(sender, instance, **kwargs):
+    # До удаления: после CASCADE не узнать, где перевод был в «похожих»
+    export.schedule(instance, structural=True)
+
+
+for _model_name in export.DEPENDENCIES:
+    _model = apps.get_model('news_app', _model_name)
+    post_save.connect(_export_on_save, sender=_model, weak=False,
+                      dispatch_uid=f'static_export_{_model_name}_save')
+    pre_delete.connect(_export_on_delete, sender=_model, weak=False,
+                       dispatch_uid=f'static_export_{_model_name}_delete')
+
+
+# ================== News API ==================
+@receiver(post_delete, sender=NewsTranslation)
+def record_news_deletion(sender, instance, **kwargs):
+    """Метка удаления для клиентов /api/news?since= (в той же транзакции, что и удаление)"""
+    NewsDeletion.objects.create(translation_id=instance.pk, news_id=instance.news_id, lang=instance.lang)
+    news_api.purge_deletions()
+
+
+# ================== Machine translation ==================
+@receiver(post_save, sender=NewsTranslation)
+@receiver(post_save, sender=GuideTranslation)
+def schedule_machine_translation(sender, instance, raw=False, **kwargs):
+    """Недостающие языки объекта переводятся в фоне; сохранения самого переводчика не учитываются"""
+    if raw or instance.machine_translated:
+        return
+    machine_translation.schedule(sender.__name__, getattr(instance, f'{sender.TRANSLATION_PARENT}_id'))
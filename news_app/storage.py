@@ -0,0 +1,68 @@
+import hashlib
+import os
+import posixpath
+import re
+from contextlib import contextmanager
+
+from django.core.files import File, locks
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 32
+CONTENT_NAME_RE = re.compile(rf'(^|/)[0-9a-f]{{2}}/[0-9a-f]{{{HASH_LENGTH}}}(\.\w+)?$')
+# Файл блокировки в каталоге файла (news/ab/.lock): общий для процессов, один на 256 хешей
+LOCK_NAME = '.lock'
+
+
+def content_name(name, digest):
+    """news/photo.JPG + хеш -> news/ab/abcdef….jpg (каталог upload_to сохраняется)"""
+    directory, filename = posixpath.split(name)
+    extension = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], f'{digest[:HASH_LENGTH]}{extension}')
+
+
+def is_content_name(name):
+    return bool(CONTENT_NAME_RE.search(name))
+
+
+def file_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Имя файла — хеш содержимого: одно фото, загруженное для uz/ru/kaa, хранится один раз,
+    а все переводы ссылаются на один файл. Удаление — только через images.release(),
+    который проверяет, что на файл больше никто не ссылается.
+    """
+
+    @contextmanager
+    def lock(self, name):
+        """Блокировка каталога файла между процессами: сохранение и удаление одного хеша не пересекаются"""
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, LOCK_NAME), 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(self.generate_filename(name), file_digest(content))
+        with self.lock(name):
+            if self.exists(name):
+                # Новая ссылка на существующий файл: release() не удалит его, пока запись не закоммичена
+                os.utime(self.path(name))
+                return name
+            return self._save(name, content)
+
+
+content_storage = ContentAddressedStorage()
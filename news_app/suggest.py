@@ -0,0 +1,231 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import translation
+
+from .models import NewsTranslation, GuideTranslation
+from . import caching
+from .search import APOSTROPHE_RE, TOKEN_RE, normalize
+
+# Подсказки заголовков при наборе: отсортированный массив ключей в памяти воркера, поиск — bisect.
+# Ключи — нормализованный заголовок с начала каждого слова («yangi qonun» -> «yangi qonun», «qonun»);
+# кириллица и латиница приводятся к одной форме (search.normalize), апострофы отбрасываются.
+# Сохранение перевода правит индекс своего воркера и пишет изменение в журнал в кэше,
+# остальные воркеры раз в SUGGEST_CHECK_INTERVAL секунд догоняют журнал или строят индекс заново.
+SECTION = 'suggest'
+NEWS, GUIDE = 'news', 'guide'
+
+MAX_KEY_WORDS = 6
+MAX_KEY_LENGTH = 48
+
+# Гайды выше новостей при равном совпадении
+GUIDE_RANK = float('inf')
+
+# Подставляется вместо аргумента при однократном reverse на язык
+_PLACEHOLDER = '987654321'
+
+
+def query_key(text):
+    return ' '.join(TOKEN_RE.findall(APOSTROPHE_RE.sub('', normalize(text))))[:MAX_KEY_LENGTH]
+
+
+class PrefixIndex:
+    """Индекс одного языка"""
+
+    def __init__(self):
+        self.entries = []  # (ключ, ссылка) по возрастанию; ссылка — (вид, id перевода)
+        self.items = {}    # ссылка -> (заголовок, аргумент URL, ранг, ключи)
+
+    @staticmethod
+    def _keys(title):
+        words = query_key(title).split(' ')
+        return list(dict.fromkeys(
+            ' '.join(words[i:])[:MAX_KEY_LENGTH] for i in range(min(len(words), MAX_KEY_WORDS)) if words[i]
+        ))
+
+    def load(self, rows):
+        """Первичное заполнение: rows — (ссылка, заголовок, аргумент URL, ранг)"""
+        for ref, title, url_arg, rank in rows:
+            keys = self._keys(title)
+            self.items[ref] = (title, url_arg, rank, keys)
+            self.entries.extend((key, ref) for key in keys)
+        self.entries.sort()
+
+    def update(self, removed, rows):
+        """
+        Убирает ссылки removed и добавляет rows. search() идёт без блокировки, поэтому список
+        ключей не правится на месте: изменения вносятся в копию, которая подменяет его целиком.
+        """
+        entries = list(self.entries)
+        for ref in removed:
+            item = self.items.get(ref)
+            if item is None:
+                continue
+            for key in item[3]:
+                position = bisect_left(entries, (key, ref))
+                if position < len(entries) and entries[position] == (key, ref):
+                    del entries[position]
+        added = {}
+        for ref, title, url_arg, rank in rows:
+            keys = self._keys(title)
+            added[ref] = (title, url_arg, rank, keys)
+            for key in keys:
+                insort(entries, (key, ref))
+        # Новые записи видны раньше их ключей, удалённые пропадают после ключей
+        self.items.update(added)
+        self.entries = entries
+        for ref in removed:
+            if ref not in added:
+                self.items.pop(ref, None)
+
+    def search(self, prefix, limit):
+        """Лучшие limit ссылок: сначала совпадение с начала заголовка, затем ранг (гайды, свежесть)"""
+        entries = self.entries
+        start = bisect_left(entries, (prefix,))
+        found = {}
+        for position in range(start, min(start + settings.SUGGEST_SCAN_LIMIT, len(entries))):
+            key, ref = entries[position]
+            if not key.startswith(prefix):
+                break
+            item = self.items.get(ref)
+            if item is not None and ref not in found:
+                found[ref] = (key == item[3][0], item[2])
+        return heapq.nlargest(limit, found, key=found.get)
+
+
+# ================== State ==================
+_indexes = {}
+_lock = threading.Lock()
+_state = {'version': None, 'checked': 0.0}
+
+
+def _news_rows(queryset):
+    for pk, lang, news_id, title, created_at in queryset.values_list(
+        'id', 'lang', 'news_id', 'title', 'created_at'
+    ).iterator(chunk_size=10000):
+        yield lang, ((NEWS, pk), title, news_id, created_at.timestamp() if created_at else 0.0)
+
+
+def _guide_rows(queryset):
+    for pk, lang, title, guide_type in queryset.values_list('id', 'lang', 'title', 'guide__guide_type'):
+        yield lang, ((GUIDE, pk), title, guide_type, GUIDE_RANK)
+
+
+def _querysets(news_ids=None, guide_ids=None):
+    news = NewsTranslation.objects.filter(is_published=True)
+    guides = GuideTranslation.objects.all()
+    if news_ids is not None:
+        news, guides = news.filter(pk__in=news_ids), guides.filter(pk__in=guide_ids)
+    return news, guides
+
+
+def _build():
+    indexes = {}
+    news, guides = _querysets()
+    for rows in (_news_rows(news), _guide_rows(guides)):
+        by_lang = {}
+        for lang, row in rows:
+            by_lang.setdefault(lang, []).append(row)
+        for lang, lang_rows in by_lang.items():
+            indexes.setdefault(lang, PrefixIndex()).load(lang_rows)
+    # Новый словарь целиком, без промежутка, когда индекс пуст
+    global _indexes
+    _indexes = indexes
+
+
+def _reload(refs):
+    """Перечитывает изменённые переводы; снятые с публикации и удалённые убираются"""
+    news_ids = [pk for kind, pk in refs if kind == NEWS]
+    guide_ids = [pk for kind, pk in refs if kind == GUIDE]
+    news, guides = _querysets(news_ids, guide_ids)
+    by_lang = {}
+    for lang, row in [*_news_rows(news), *_guide_rows(guides)]:
+        by_lang.setdefault(lang, []).append(row)
+    for lang in by_lang.keys() - _indexes.keys():
+        _indexes[lang] = PrefixIndex()
+    for lang, index in _indexes.items():
+        index.update(refs, by_lang.get(lang, ()))
+
+
+def _catch_up(known, version):
+    """Применяет журнал изменений known+1..version; False, если журнал неполон"""
+    if version < known or version - known > settings.SUGGEST_MAX_CHANGES:
+        return False
+    keys = [f'suggest:change:{v}' for v in range(known + 1, version + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return False
+    if found:
+        _reload(set(found.values()))
+    return True
+
+
+def _ensure_current():
+    """Первый вызов строит индекс; дальше версия в кэше проверяется раз в SUGGEST_CHECK_INTERVAL"""
+    if _state['version'] is not None and time.monotonic() - _state['checked'] < settings.SUGGEST_CHECK_INTERVAL:
+        return
+    # Пока другой поток догоняет журнал, отвечаем по текущему индексу
+    if not _lock.acquire(blocking=_state['version'] is None):
+        return
+    try:
+        if _state['version'] is not None and time.monotonic() - _state['checked'] < settings.SUGGEST_CHECK_INTERVAL:
+            return
+        # Версия — до чтения данных: изменения во время сборки попадут в следующую проверку
+        version = caching.get_versions([SECTION])[SECTION]
+        known = _state['version']
+        if known is None or not _catch_up(known, version):
+            _build()
+        _state['version'] = version
+        _state['checked'] = time.monotonic()
+    finally:
+        _lock.release()
+
+
+def record(kind, pk):
+    """Правит индекс этого воркера и пишет изменение в журнал для остальных (после коммита)"""
+    version = caching.bump_version(SECTION)
+    cache.set(f'suggest:change:{version}', (kind, pk), settings.SUGGEST_CHANGE_TIMEOUT)
+    with _lock:
+        if _state['version'] is None:
+            return
+        _reload({(kind, pk)})
+        if _state['version'] == version - 1:
+            _state['version'] = version
+
+
+# ================== Lookup ==================
+@lru_cache(maxsize=None)
+def _url_template(lang, kind):
+    with translation.override(lang):
+        if kind == NEWS:
+            path = reverse('news_detail', kwargs={'news_id': int(_PLACEHOLDER)})
+        else:
+            path = reverse('guide', kwargs={'guide_type': _PLACEHOLDER})
+    return path.replace(_PLACEHOLDER, '{}')
+
+
+def suggest(lang, text, limit=None):
+    """Заголовки новостей и гайдов языка, в которых слово начинается с введённого текста"""
+    prefix = query_key(text)
+    if not prefix:
+        return []
+    _ensure_current()
+    index = _indexes.get(lang)
+    if index is None:
+        return []
+    results = []
+    for ref in index.search(prefix, limit or settings.SUGGEST_LIMIT):
+        item = index.items.get(ref)
+        if item is not None:
+            results.append({
+                'type': ref[0],
+                'title': item[0],
+                'url': _url_template(lang, ref[0]).format(item[1]),
+            })
+    return results
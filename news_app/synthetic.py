@@ -0,0 +1,155 @@
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from .models import (
+    Category, CategoryTranslation, News, NewsTranslation, Leaders, Debt,
+    Guide, GuideTranslation, Partners,
+)
+from . import search
+from .debts import add_delta, apply_summary
+
+# Фиксированная точка отсчёта — данные одинаковы при одинаковом seed
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+SYLLABLES = {
+    'uz': ['yan', 'gi', 'lik', 'da', 'vlat', 'o\'z', 'bek', 'ton', 'qish', 'loq', 'xo', 'ja', 'lik', 'ma', 'hal', 'la'],
+    'kaa': ['qa', 'ra', 'qal', 'paq', 'sta', 'nı', 'jań', 'a', 'lıq', 'ha', 'lıq', 'ba', 'ǵı', 'tı', 'ma', 'ǵan'],
+    'ru': ['но', 'во', 'сти', 'го', 'су', 'дар', 'ство', 'про', 'грам', 'ма', 'ре', 'ги', 'он', 'раз', 'ви', 'тие'],
+}
+LANGS = [code for code, _ in NewsTranslation.LANG_CHOICES]
+
+
+def parse_scale(value):
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500"""
+    value = str(value).strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+class Generator:
+    """Воспроизводимый генератор синтетических данных для всех моделей"""
+
+    def __init__(self, seed=42, batch_size=1000, log=None):
+        self.rnd = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.vocabulary = {
+            lang: [
+                ''.join(self.rnd.choice(syllables) for _ in range(self.rnd.randint(2, 4)))
+                for _ in range(3000)
+            ]
+            for lang, syllables in SYLLABLES.items()
+        }
+
+    def words(self, lang, count):
+        return ' '.join(self.rnd.choices(self.vocabulary[lang], k=count))
+
+    # ================== Reference data ==================
+    def categories(self, count=8):
+        created = []
+        for i in range(count):
+            category, _ = Category.objects.get_or_create(slug=f'bench-{i}', defaults={'name': f'Bench {i}'})
+            for lang in LANGS:
+                CategoryTranslation.objects.get_or_create(
+                    category=category, lang=lang, defaults={'name': self.words(lang, 1)[:50]},
+                )
+            created.append(category)
+        return created
+
+    def leaders(self, per_region=3):
+        Leaders.objects.bulk_create([
+            Leaders(
+                leader_name=self.words('uz', 2)[:50],
+                leader_position=self.words('uz', 2)[:50],
+                leader_image='leaders/bench.jpg',
+                leader_phone=f'+998 71 {self.rnd.randint(100, 999)} {self.rnd.randint(10, 99)} {self.rnd.randint(10, 99)}',
+                region=region,
+                region_link=f'https://yandex.uz/maps/-/BENCH{i}{n}',
+            )
+            for i, (region, _) in enumerate(Leaders.REGION_CHOICES)
+            for n in range(per_region)
+        ])
+
+    def guides(self):
+        for guide_type, _ in Guide.GUIDE_TYPE_CHOICES:
+            guide = Guide.objects.create(guide_type=guide_type, link='https://youtu.be/dQw4w9WgXcQ')
+            GuideTranslation.objects.bulk_create([
+                GuideTranslation(
+                    guide=guide, lang=lang,
+                    title=self.words(lang, 5)[:255], short_title=self.words(lang, 2)[:100],
+                    description=self.words(lang, 120), short_description=self.words(lang, 20),
+                )
+                for lang in LANGS
+            ])
+
+    def partners(self, count=10):
+        Partners.objects.bulk_create([
+            Partners(name=f'Partner {i}', image='partners/bench.png', link=f'https://partner{i}.uz')
+            for i in range(count)
+        ])
+
+    # ================== Bulk data ==================
+    def news(self, count, categories, days=365 * 3, index=True):
+        """count новостей × 3 языка, даты равномерно за последние days дней от BASE_DATE"""
+        step = timedelta(days=days) / max(count, 1)
+        made = 0
+        while made < count:
+            size = min(self.batch_size, count - made)
+            items = News.objects.bulk_create([News() for _ in range(size)])
+            # auto_now_add перезаписывает дату при вставке — выставляем её отдельным bulk_update
+            for i, item in enumerate(items):
+                item.created_at = BASE_DATE - step * (count - made - i)
+            News.objects.bulk_update(items, ['created_at'])
+
+            translations = NewsTranslation.objects.bulk_create([
+                NewsTranslation(
+                    news=item, lang=lang, created_at=item.created_at, is_published=True,
+                    image='news/bench.jpg',
+                    title=self.words(lang, 8)[:255],
+                    short_title=self.words(lang, 3)[:100],
+                    description=self.words(lang, 150),
+                    short_description=self.words(lang, 20),
+                    category=self.rnd.choice(categories),
+                )
+                for item in items
+                for lang in LANGS
+            ])
+            if index:
+                search.rebuild_index(NewsTranslation.objects.filter(pk__in=[t.pk for t in translations]))
+            made += size
+            self.log(f"новости: {made}/{count}")
+
+    def debts(self, count):
+        statuses = [code for code, _ in Debt.STATUS_CHOICES]
+        made = 0
+        while made < count:
+            size = min(self.batch_size, count - made)
+            batch = Debt.objects.bulk_create([
+                Debt(
+                    inn=f'{300000000 + made + i}',
+                    full_name=self.words('uz', 2)[:50],
+                    debt_amount=Decimal(self.rnd.randint(10000, 100000000)) / 100,
+                    debt_type=self.rnd.choice(['kredit', 'soliq', 'subsidiya', 'grant']),
+                    status=self.rnd.choice(statuses),
+                    description=self.words('uz', 10),
+                )
+                for i in range(size)
+            ])
+            # bulk_create не вызывает сигналы — итоги DebtSummary переносим сами
+            deltas = {}
+            for debt in batch:
+                add_delta(deltas, (debt.status, debt.debt_type), 1, debt.debt_amount)
+            apply_summary(deltas)
+            made += size
+            self.log(f"долги: {made}/{count}")
+
+    def seed(self, news, debts=None, index=True):
+        categories = self.categories()
+        self.leaders()
+        self.guides()
+        self.partners()
+        self.news(news, categories, index=index)
+        self.debts(news if debts is None else debts)
@@ -0,0 +1,51 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from news_app.images import existing_variants
+
+register = template.Library()
+
+DEFAULT_SIZES = "(max-width: 768px) 100vw, 400px"
+
+
+def _srcset(name, fmt):
+    return format_html_join(
+        ', ', '{} {}w',
+        ((default_storage.url(variant), width) for width, variant in existing_variants(name, fmt)),
+    )
+
+
+@register.simple_tag
+def responsive_image(image, alt='', css_class='', sizes=DEFAULT_SIZES, loading='lazy'):
+    """
+    <picture> с WebP/JPEG копиями разной ширины.
+    Пока копии не созданы — обычный <img> с оригиналом.
+    """
+    if not image:
+        return ''
+    class_attr = format_html(' class="{}"', css_class) if css_class else ''
+
+    webp = _srcset(image.name, 'webp')
+    jpeg = _srcset(image.name, 'jpeg')
+    if not webp and not jpeg:
+        return format_html('<img src="{}" alt="{}"{} loading="{}">', image.url, alt, class_attr, loading)
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="{}">'
+        '</picture>',
+        webp, sizes, image.url, jpeg, sizes, alt, class_attr, loading,
+    )
+
+
+@register.filter
+def variant_url(image, width):
+    """URL JPEG-копии не шире width (для data-атрибутов), иначе оригинал"""
+    if not image:
+        return ''
+    suitable = [item for item in existing_variants(image.name, 'jpeg') if item[0] <= int(width)]
+    if suitable:
+        return default_storage.url(suitable[-1][1])
+    return image.url
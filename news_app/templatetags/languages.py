@@ -0,0 +1,18 @@
+from django import template
+from django.urls import translate_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def language_url(context, lang):
+    """
+    Адрес текущей страницы с префиксом другого языка.
+    Обычная ссылка вместо POST на set_language — работает и на страницах статической выгрузки.
+    Только путь, без параметров: главная кэшируется одной копией на язык, а параметры
+    первого посетителя попали бы в ссылки всех остальных.
+    """
+    request = context.get('request')
+    if request is None:
+        return f'/{lang}/'
+    return translate_url(request.path, lang)
@@ -1,3 +1,600 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import caching, debt_import, debts, images, machine_translation, search, suggest
+from .debt_import import RejectedWriter, import_debts, iter_csv_rows
+from .pagination import encode_cursor, paginate_by_cursor
+from .storage import content_storage, is_content_name
+from .models import (
+    Debt, DebtSummary, Guide, GuideTranslation, News, NewsSearchTerm, NewsTranslation, TranslationJob,
+    TranslationMemory,
+)
+
+# Манифест статики появляется только после collectstatic — в тестах страницы рендерятся без него
+PLAIN_STATIC_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+# ================== Machine translation ==================
+@override_settings(MACHINE_TRANSLATION_BACKEND='news_app.machine_translation.StubBackend')
+class MachineTranslationTests(TestCase):
+    def setUp(self):
+        # Переводчик кэшируется на процесс — берём его из настроек теста
+        machine_translation.get_backend.cache_clear()
+        self.addCleanup(machine_translation.get_backend.cache_clear)
+
+    def _guide(self, title, description):
+        guide = Guide.objects.create(guide_type='loan', link='https://youtu.be/abc')
+        GuideTranslation.objects.create(guide=guide, lang='uz', title=title, description=description)
+        return guide
+
+    def _translate(self, guide, refresh=True):
+        machine_translation.enqueue('GuideTranslation', [guide.pk], refresh=refresh)
+        return machine_translation.process_pending()
+
+    def _translation(self, guide, lang):
+        return GuideTranslation.objects.get(guide=guide, lang=lang)
+
+    def test_missing_languages_are_translated_from_editor_text(self):
+        guide = self._guide("Ssuda", "<p>Birinchi abzats</p><p>Ikkinchi abzats</p>")
+
+        stats = self._translate(guide)
+
+        self.assertEqual(stats['translated'], 2)
+        ru = self._translation(guide, 'ru')
+        self.assertTrue(ru.machine_translated)
+        self.assertEqual(ru.title, "[ru] Ssuda")
+        # Разметка не уходит переводчику и остаётся на месте
+        self.assertEqual(ru.description, "<p>[ru] Birinchi abzats</p><p>[ru] Ikkinchi abzats</p>")
+        self.assertEqual(
+            set(TranslationJob.objects.values_list('target_lang', 'status')),
+            {('ru', TranslationJob.DONE), ('kaa', TranslationJob.DONE)},
+        )
+
+    def test_translation_memory_reuses_repeated_segments(self):
+        first = self._guide("Ssuda", "<p>Umumiy abzats</p><p>Birinchi</p>")
+        stats = self._translate(first)
+        self.assertEqual(stats['backend_segments'], 6)
+        self.assertEqual(stats['memory_hits'], 0)
+
+        # Заголовок и общий абзац уже переведены — переводчику уходит только новый абзац
+        second = self._guide("Ssuda", "<p>Umumiy abzats</p><p>Ikkinchi</p>")
+        stats = self._translate(second)
+        self.assertEqual(stats['backend_segments'], 2)
+        self.assertEqual(stats['memory_hits'], 4)
+        self.assertEqual(TranslationMemory.objects.count(), 8)
+        self.assertEqual(self._translation(second, 'kaa').description, "<p>[kaa] Umumiy abzats</p><p>[kaa] Ikkinchi</p>")
+
+    def test_editor_translation_added_while_queued_is_kept(self):
+        guide = self._guide("Ssuda", "<p>Matn</p>")
+        machine_translation.enqueue('GuideTranslation', [guide.pk])
+        GuideTranslation.objects.create(guide=guide, lang='ru', title="Ссуда", description="<p>Текст</p>")
+
+        stats = machine_translation.process_pending()
+
+        self.assertEqual(stats['translated'], 1)
+        ru = self._translation(guide, 'ru')
+        self.assertFalse(ru.machine_translated)
+        self.assertEqual(ru.title, "Ссуда")
+        self.assertEqual(TranslationJob.objects.get(target_lang='ru').status, TranslationJob.DONE)
+
+    def test_admin_edit_protects_machine_translation_from_refresh(self):
+        guide = self._guide("Ssuda", "<p>Matn</p>")
+        self._translate(guide)
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        data = {
+            'guide_type': guide.guide_type,
+            'link': guide.link,
+            'translations-TOTAL_FORMS': 3,
+            'translations-INITIAL_FORMS': 3,
+            'translations-MIN_NUM_FORMS': 0,
+            'translations-MAX_NUM_FORMS': 1000,
+        }
+        for index, translation in enumerate(guide.translations.order_by('pk')):
+            prefix = f'translations-{index}-'
+            data.update({
+                prefix + 'id': translation.pk,
+                prefix + 'guide': guide.pk,
+                prefix + 'lang': translation.lang,
+                prefix + 'title': "Ссуда (правка)" if translation.lang == 'ru' else translation.title,
+                prefix + 'description': translation.description,
+            })
+            if translation.machine_translated:
+                data[prefix + 'machine_translated'] = 'on'
+        response = self.client.post(f'/uz/admin/news_app/guide/{guide.pk}/change/', data)
+        self.assertEqual(response.status_code, 302)
+
+        ru = self._translation(guide, 'ru')
+        self.assertFalse(ru.machine_translated)
+
+        # Исходный текст изменился: машинный kaa переводится заново, правка редактора остаётся
+        GuideTranslation.objects.filter(guide=guide, lang='uz').update(title="Yangi ssuda")
+        self._translate(guide, refresh=True)
+        self.assertEqual(self._translation(guide, 'ru').title, "Ссуда (правка)")
+        self.assertEqual(self._translation(guide, 'kaa').title, "[kaa] Yangi ssuda")
+
+
+# ================== Search ==================
+class SearchTests(TestCase):
+    def _news(self, title, description='', lang='uz'):
+        news = News.objects.create()
+        return NewsTranslation.objects.create(
+            news=news, lang=lang, title=title, short_title=title[:100], description=description,
+            short_description='',
+        )
+
+    def _search(self, query, lang='uz'):
+        return [t.title for t in search.search(NewsTranslation.objects.all(), lang, query)]
+
+    def test_title_match_ranks_above_description_match(self):
+        self._news("Soliq hisoboti", "<p>Kredit bo'yicha yangiliklar</p>")
+        self._news("Kredit stavkalari", "<p>Bank xabari</p>")
+
+        self.assertEqual(self._search("kredit"), ["Kredit stavkalari", "Soliq hisoboti"])
+
+    def test_query_in_either_script_matches_both(self):
+        self._news("O'zbekiston yangiliklari")
+        self._news("Ўзбекистон банклари")
+
+        self.assertEqual(set(self._search("ozbekiston")), {"O'zbekiston yangiliklari", "Ўзбекистон банклари"})
+        self.assertEqual(self._search("Янгилик"), ["O'zbekiston yangiliklari"])
+        self.assertEqual(self._search("g'alla"), [])
+
+    def test_save_reindexes_translation(self):
+        translation = self._news("Yangi grant dasturi")
+        self.assertEqual(self._search("grant"), ["Yangi grant dasturi"])
+
+        translation.title = translation.short_title = "Subsidiya tartibi"
+        translation.save()
+
+        self.assertEqual(self._search("grant"), [])
+        self.assertEqual(self._search("subsidiya"), ["Subsidiya tartibi"])
+        self.assertFalse(NewsSearchTerm.objects.filter(term='grant').exists())
+
+
+# ================== Cursor pagination ==================
+class CursorPaginationTests(TestCase):
+    KEYS = ['created_at', 'pk']
+
+    def setUp(self):
+        now = timezone.now()
+        for n in range(7):
+            news = News.objects.create()
+            NewsTranslation.objects.create(
+                news=news, lang='uz', title=f"Xabar {n}", short_title=f"Xabar {n}", description='',
+                short_description='',
+            )
+            # Пары новостей с одинаковой датой: порядок внутри пары решает pk
+            NewsTranslation.objects.filter(news=news).update(created_at=now - timedelta(hours=n // 2))
+        self.queryset = NewsTranslation.objects.all()
+        self.expected = list(self.queryset.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+    def _page(self, **cursors):
+        return paginate_by_cursor(self.queryset, self.KEYS, per_page=3, **cursors)
+
+    def test_forward_and_back_round_trip(self):
+        pages = [self._page()]
+        while pages[-1].has_next:
+            pages.append(self._page(after=pages[-1].next_cursor))
+        self.assertEqual([[t.pk for t in page] for page in pages],
+                         [self.expected[0:3], self.expected[3:6], self.expected[6:]])
+        self.assertFalse(pages[0].has_previous)
+
+        back = self._page(before=pages[-1].previous_cursor)
+        self.assertEqual([t.pk for t in back], self.expected[3:6])
+        back = self._page(before=back.previous_cursor)
+        self.assertEqual([t.pk for t in back], self.expected[0:3])
+        self.assertFalse(back.has_previous)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        for cursor in ['!!!', 'bm90IGpzb24', encode_cursor([1]), encode_cursor(['x', 1]), encode_cursor([True, 1])]:
+            with self.subTest(cursor=cursor):
+                page = self._page(after=cursor)
+                self.assertEqual([t.pk for t in page], self.expected[0:3])
+                self.assertFalse(page.has_previous)
+
+    @override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+    def test_view_ignores_invalid_cursor(self):
+        for params in [{'after': '%%%'}, {'before': encode_cursor(['2024-13-45', 1])}, {'after': ''}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/uz/news', params).status_code, 200)
+
+
+# ================== Content-addressed storage ==================
+class ContentStorageTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        override = override_settings(MEDIA_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _save(self, content, name='news/photo.JPG'):
+        return content_storage.save(name, ContentFile(content))
+
+    def test_identical_uploads_share_one_file(self):
+        first = self._save(b'photo', 'news/uz.JPG')
+        second = self._save(b'photo', 'news/ru.jpg')
+        other = self._save(b'other photo')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.startswith('news/') and first.endswith('.jpg'))
+        self.assertTrue(is_content_name(first))
+        with content_storage.open(first) as f:
+            self.assertEqual(f.read(), b'photo')
+
+    @override_settings(IMAGE_RELEASE_GRACE=0)
+    def test_release_keeps_referenced_file(self):
+        name = self._save(b'photo')
+        news = News.objects.create()
+        for lang in ('uz', 'ru'):
+            NewsTranslation.objects.create(
+                news=news, lang=lang, image=name, title="Xabar", short_title="Xabar", description='',
+                short_description='',
+            )
+
+        news.translations.get(lang='uz').delete()
+        self.assertFalse(images.release(name))
+        self.assertTrue(content_storage.exists(name))
+
+        news.translations.get(lang='ru').delete()
+        self.assertTrue(images.release(name))
+        self.assertFalse(content_storage.exists(name))
+
+    @override_settings(IMAGE_RELEASE_GRACE=3600)
+    def test_recently_saved_file_survives_release(self):
+        # Запись другой транзакции может сослаться на файл, но ещё не закоммититься
+        name = self._save(b'photo')
+
+        self.assertFalse(images.release(name))
+        self.assertTrue(content_storage.exists(name))
+
+
+# ================== Debt summary ==================
+class DebtSummaryTests(TestCase):
+    def _summary(self):
+        return {
+            (row.status, row.debt_type): (row.count, row.total_amount)
+            for row in DebtSummary.objects.all()
+        }
+
+    def _debt(self, inn, amount, debt_type='kredit', status='active'):
+        return Debt.objects.create(
+            inn=inn, full_name="Test", debt_amount=Decimal(amount), debt_type=debt_type, status=status,
+            description='',
+        )
+
+    def test_save_updates_totals(self):
+        self._debt('100', '10.50')
+        debt = self._debt('101', '4.25')
+        self.assertEqual(self._summary(), {('active', 'kredit'): (2, Decimal('14.75'))})
+
+        debt.status = 'closed'
+        debt.debt_amount = Decimal('5.00')
+        debt.save()
+        self.assertEqual(self._summary(), {
+            ('active', 'kredit'): (1, Decimal('10.50')),
+            ('closed', 'kredit'): (1, Decimal('5.00')),
+        })
+
+    def test_delete_removes_empty_group(self):
+        self._debt('100', '10.00')
+        debt = self._debt('101', '3.00', status='pending')
+
+        debt.delete()
+
+        self.assertEqual(self._summary(), {('active', 'kredit'): (1, Decimal('10.00'))})
+
+    def test_loaddata_keeps_fixture_totals(self):
+        self._debt('100', '10.00')
+        fixture = serializers.serialize('json', [*Debt.objects.all(), *DebtSummary.objects.all()])
+        Debt.objects.all().delete()
+        DebtSummary.objects.all().delete()
+
+        # loaddata сохраняет объекты с raw=True; итоги приходят из самой фикстуры
+        for obj in serializers.deserialize('json', fixture):
+            obj.save()
+
+        self.assertEqual(self._summary(), {('active', 'kredit'): (1, Decimal('10.00'))})
+
+    def test_import_applies_deltas(self):
+        rows = [
+            {'inn': '200', 'full_name': "A", 'debt_amount': '100', 'debt_type': 'kredit', 'status': 'active'},
+            {'inn': '200', 'full_name': "A", 'debt_amount': '7,5', 'debt_type': 'soliq', 'status': 'active'},
+            {'inn': '201', 'full_name': "B", 'debt_amount': '50', 'debt_type': 'kredit', 'status': 'closed'},
+        ]
+        import_debts(iter(rows))
+        expected = {
+            ('active', 'kredit'): (1, Decimal('100.00')),
+            ('active', 'soliq'): (1, Decimal('7.50')),
+            ('closed', 'kredit'): (1, Decimal('50.00')),
+        }
+        self.assertEqual(self._summary(), expected)
+
+        # Повторный импорт ничего не меняет, изменённая строка переносит сумму между группами
+        import_debts(iter(rows))
+        self.assertEqual(self._summary(), expected)
+        rows[0] = {**rows[0], 'status': 'closed', 'debt_amount': '80'}
+        stats = import_debts(iter(rows))
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual(self._summary(), {
+            ('active', 'soliq'): (1, Decimal('7.50')),
+            ('closed', 'kredit'): (2, Decimal('130.00')),
+        })
+        self.assertEqual(debts.rebuild_summary(dry_run=True), {})
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        self._debt('100', '10.00')
+        self._debt('101', '2.00', debt_type='soliq')
+        DebtSummary.objects.filter(debt_type='kredit').update(count=5)
+        DebtSummary.objects.filter(debt_type='soliq').delete()
+
+        drift = debts.rebuild_summary(batch_size=1, dry_run=True)
+        self.assertEqual(drift, {
+            ('active', 'kredit'): ((5, Decimal('10.00')), (1, Decimal('10.00'))),
+            ('active', 'soliq'): (None, (1, Decimal('2.00'))),
+        })
+        self.assertEqual(DebtSummary.objects.get(debt_type='kredit').count, 5)
+
+        debts.rebuild_summary(batch_size=1)
+        self.assertEqual(self._summary(), {
+            ('active', 'kredit'): (1, Decimal('10.00')),
+            ('active', 'soliq'): (1, Decimal('2.00')),
+        })
+        self.assertEqual(debts.rebuild_summary(), {})
+
+
+# ================== Debt import ==================
+class PrivateImportDirMixin:
+    """Отклонённые строки и фоновые импорты пишутся во временный каталог, а не в private/ проекта"""
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        override = override_settings(DEBT_IMPORT_REJECTED_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.root = root
+
+    def _login(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def _upload(self, content, name='debts.csv'):
+        return self.client.post('/uz/admin/news_app/debt/import/', {'file': SimpleUploadedFile(name, content)})
+
+
+class DebtImportTests(PrivateImportDirMixin, TestCase):
+    CSV = (
+        "INN;Full_Name;Debt_Amount;Debt_Type;Status\n"
+        "123456789;Aliyev;1 200,50;kredit;active\n"
+        "12-345;Karimov;10;kredit;active\n"
+        "123456789;Aliyev;5;kredit;active\n"
+        "987654321;Olimova;-3;soliq;active\n"
+        "987654321;Olimova;3;soliq;unknown\n"
+        "987654321;Olimova;3;soliq;closed\n"
+    )
+
+    def _import(self, text, **kwargs):
+        rejected = io.StringIO()
+        stats = import_debts(iter_csv_rows(io.BytesIO(text.encode())), rejected=RejectedWriter(rejected), **kwargs)
+        return stats, list(csv.DictReader(io.StringIO(rejected.getvalue())))
+
+    def test_rows_are_validated_and_rejects_reported_by_line(self):
+        stats, rejected = self._import(self.CSV)
+
+        self.assertEqual((stats.processed, stats.created, stats.rejected), (6, 2, 4))
+        self.assertEqual(Debt.objects.get(inn='123456789').debt_amount, Decimal('1200.50'))
+        self.assertEqual(Debt.objects.get(inn='987654321').status, 'closed')
+        self.assertEqual(
+            [(row['line'], row['error']) for row in rejected],
+            [('3', "некорректный ИНН"), ('4', "повтор ИНН и типа долга в файле"),
+             ('5', "некорректная сумма"), ('6', "неизвестный статус unknown")],
+        )
+
+    def test_dry_run_writes_nothing(self):
+        stats, _ = self._import(self.CSV, dry_run=True)
+
+        self.assertEqual(stats.rejected, 4)
+        self.assertFalse(Debt.objects.exists())
+
+    def test_unreadable_files_are_reported_not_crashed(self):
+        self._login()
+        header = b"inn,full_name,debt_amount,debt_type,status\n"
+        files = {
+            "кодировке": header + "123456789,Алиев,10,kredit,active\n".encode('cp1251'),
+            "формата CSV в строке 2": header + b'123456789,"' + b'x' * (csv.field_size_limit() + 1) + b'",1,k,active\n',
+        }
+        for error, content in files.items():
+            with self.subTest(error=error):
+                response = self._upload(content)
+                self.assertRedirects(response, '/uz/admin/news_app/debt/import/', fetch_redirect_response=False)
+                self.assertIn(error, str(list(response.wsgi_request._messages)[-1]))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_admin_import_links_rejected_rows(self):
+        self._login()
+
+        response = self._upload(self.CSV.encode())
+
+        self.assertRedirects(response, '/uz/admin/news_app/debt/', fetch_redirect_response=False)
+        self.assertEqual(Debt.objects.count(), 2)
+        [name] = os.listdir(self.root)
+        download = self.client.get(f'/uz/admin/news_app/debt/import/rejected/{name}')
+        self.assertIn(b"12-345,Karimov", b''.join(download.streaming_content))
+
+
+@override_settings(DEBT_IMPORT_BACKGROUND_SIZE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class BackgroundDebtImportTests(PrivateImportDirMixin, TransactionTestCase):
+    def _wait(self):
+        # Импорты идут в одном потоке по очереди — пустая задача выполнится после них
+        debt_import._get_executor().submit(lambda: None).result()
+
+    def test_large_file_is_imported_in_background(self):
+        self._login()
+
+        response = self._upload(b"inn,full_name,debt_amount,debt_type,status\n123456789,A,10,kredit,active\n1-2,B,1,k,active\n")
+        self.assertRedirects(response, '/uz/admin/news_app/debt/import/', fetch_redirect_response=False)
+        self._wait()
+
+        self.assertTrue(Debt.objects.filter(inn='123456789').exists())
+        [job] = debt_import.recent_jobs()
+        self.assertEqual((job['state'], job['stats'].created, job['stats'].rejected), (debt_import.DONE, 1, 1))
+        page = self.client.get('/uz/admin/news_app/debt/import/')
+        self.assertContains(page, f"/uz/admin/news_app/debt/import/rejected/{job['rejected_name']}")
+        self.assertFalse(any(name.startswith('upload-') for name in os.listdir(self.root)))
+
+    def test_background_read_error_is_recorded(self):
+        self._login()
+
+        self._upload(b"not a workbook", name='debts.xlsx')
+        self._wait()
+
+        [job] = debt_import.recent_jobs()
+        self.assertEqual(job['state'], debt_import.FAILED)
+        self.assertIn("XLSX", job['error'])
+
+
+# ================== Conditional GET ==================
+class ConditionalGetTests(TestCase):
+    URL = '/uz/api/debts/summary'
+
+    def setUp(self):
+        cache.clear()
+        caching.release.cache_clear()
+        self.addCleanup(caching.release.cache_clear)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.URL)['ETag']
+
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_section_bump_changes_etag(self):
+        etag = self.client.get(self.URL)['ETag']
+
+        caching.bump_version(debts.SUMMARY_SECTION)
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_release_changes_validators(self):
+        with override_settings(RELEASE='r1'):
+            first = self.client.get(self.URL)
+
+        caching.release.cache_clear()
+        with override_settings(RELEASE='r2'):
+            response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+
+# ================== Debt lookup ==================
+@override_settings(TRUSTED_PROXY_COUNT=1, DEBT_LOOKUP_RATE_LIMIT=2)
+class DebtLookupRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _lookup(self, forwarded_for):
+        # За nginx REMOTE_ADDR у всех запросов один и тот же
+        return self.client.get('/uz/debts/lookup', {'inn': '123'}, REMOTE_ADDR='127.0.0.1',
+                               HTTP_X_FORWARDED_FOR=forwarded_for).status_code
+
+    def test_limit_is_per_client_behind_proxy(self):
+        self.assertEqual([self._lookup('10.0.0.1') for _ in range(3)], [200, 200, 429])
+        self.assertEqual(self._lookup('10.0.0.2'), 200)
+
+    def test_client_supplied_addresses_are_ignored(self):
+        # Начало заголовка присылает клиент; доверяем только адресу, дописанному прокси
+        statuses = [self._lookup(f'192.168.0.{n}, 10.0.0.1') for n in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+# ================== Metrics ==================
+@override_settings(TRUSTED_PROXY_COUNT=1)
+class MetricsAccessTests(TestCase):
+    def test_requests_through_proxy_are_not_local(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.5')
+        self.assertEqual(response.status_code, 403)
+
+    def test_direct_scrape_is_allowed(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 200)
+
+
+# ================== Suggestions ==================
+class SuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Индекс живёт в памяти процесса — каждый тест строит его заново
+        suggest._state['version'] = None
+        self.addCleanup(suggest._state.update, version=None)
+
+    def _guide(self, title):
+        guide = Guide.objects.create(guide_type='grant', link='https://youtu.be/abc')
+        return GuideTranslation.objects.create(guide=guide, lang='uz', title=title, description='')
+
+    def _titles(self, text):
+        return [result['title'] for result in suggest.suggest('uz', text)]
+
+    def test_prefix_of_any_word_matches(self):
+        self._guide("Yangi grant dasturi")
+        self.assertEqual(self._titles("gra"), ["Yangi grant dasturi"])
+        self.assertEqual(self._titles("Янги"), ["Yangi grant dasturi"])
+
+    def test_record_updates_index_in_place(self):
+        translation = self._guide("Yangi grant dasturi")
+        self.assertEqual(self._titles("dast"), ["Yangi grant dasturi"])
+
+        GuideTranslation.objects.filter(pk=translation.pk).update(title="Subsidiya tartibi")
+        suggest.record(suggest.GUIDE, translation.pk)
+        self.assertEqual(self._titles("dast"), [])
+        self.assertEqual(self._titles("subs"), ["Subsidiya tartibi"])
+
+        pk = translation.pk
+        translation.delete()
+        suggest.record(suggest.GUIDE, pk)
+        self.assertEqual(self._titles("subs"), [])
+
+    def test_search_during_updates_sees_a_consistent_list(self):
+        index = suggest.PrefixIndex()
+        index.load([((suggest.NEWS, pk), f"Xabar {pk}", pk, pk) for pk in range(200)])
+        errors = []
+
+        def search():
+            try:
+                for _ in range(300):
+                    index.search('xabar', 5)
+            except Exception as e:
+                errors.append(e)
+
+        reader = threading.Thread(target=search)
+        reader.start()
+        for pk in range(200):
+            index.update({(suggest.NEWS, pk)}, [] if pk % 2 else [((suggest.NEWS, pk), f"Xabar {pk}", pk, pk)])
+        reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(index.entries), 100 * 2)
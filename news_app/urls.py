@@ -5,6 +5,12 @@ urlpatterns = [
     path('', views.index, name='home'),
     path('guide/<str:guide_type>', views.guide, name='guide'),
     path('leaders', views.leaders, name='leaders'),
+    path('api/leaders', views.leaders_api, name='leaders_api'),
     path('news/<int:news_id>', views.news_detail, name='news_detail'),
     path('news', views.all_news, name='all_news'),
+    path('news/suggest', views.suggest, name='suggest'),
+    path('api/news', views.news_list_api, name='news_api'),
+    path('debts/lookup', views.debt_lookup, name='debt_lookup'),
+    path('api/debts/summary', views.debt_summary_api, name='debt_summary_api'),
+    path('cache-stats', views.cache_stats, name='cache_stats'),
 ]
\ No newline at end of file
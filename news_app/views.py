@@ -1,12 +1,45 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.db.models import QuerySet
 from django.utils.translation import get_language
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from .models import News, NewsTranslation, CategoryTranslation, Leaders, Debt, GuideTranslation, Guide, Partners
+from django.template.loader import render_to_string
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.utils.cache import patch_cache_control
+from .models import NewsTranslation, Debt, GuideTranslation, Leaders
+from . import caching
+from . import metrics as request_metrics
+from . import debts
+from . import news_api
+from . import reference
+from . import regions
+from . import search
+from . import suggest as suggestions
+from . import related
+from .conditional import conditional_page
+from .pagination import CachedCountPaginator, cached_count, paginate_by_cursor
+from .proxies import client_ip
+
+NEWS_PER_PAGE = 12
+
+logger = logging.getLogger(__name__)
 
 def get_news_data(lang):
     """Получение данных о новостях и категориях"""
-    news = NewsTranslation.objects.select_related("news", "category").filter(lang=lang).order_by('-news__created_at')[:3]
-    categories = CategoryTranslation.objects.filter(lang=lang)
+    # Без перевода на язык — перевод по цепочке TRANSLATION_FALLBACKS
+    news = (
+        NewsTranslation.objects.in_language(lang).select_related("category")
+        .filter(is_published=True).order_by('-created_at')[:3]
+    )
+    categories = reference.categories(lang)
     
     return {
         'news': news,
@@ -15,26 +48,8 @@ def get_news_data(lang):
 
 def get_leaders_data(lang):
     """Получение данных о лидерах по регионам"""
-    # Все лидеры с region_link и не пустым регионом
-    valid_leaders = Leaders.objects.exclude(region='').filter(
-        region_link__isnull=False
-    ).distinct()
-
-    # Создаём словарь для уникальности и сохранения порядка
-    region_map = {}
-    for leader in valid_leaders:
-        if leader.region not in region_map:
-            region_map[leader.region] = leader
-
-    # Порядок из модели Leaders.REGION_CHOICES
-    region_order = [region[0] for region in Leaders.REGION_CHOICES]
-
-    # Сортируем регионы по порядку из REGION_CHOICES
-    sorted_leaders = [
-        region_map[region] for region in region_order if region in region_map
-    ]
-
-    leaders_list = sorted_leaders
+    # Один лидер на регион в порядке REGION_CHOICES, список материализован в regions
+    leaders_list = regions.get_region_leaders()
     current_leader = leaders_list[0] if leaders_list else None
     
     return {
@@ -49,10 +64,9 @@ def get_debts_data():
 
 def get_guides_data(lang):
     """Получение данных о руководствах"""
-    guides_with_choices = Guide.objects.prefetch_related('translations').filter(
-        translations__lang=lang
-    ).distinct()
-    guide_choices = GuideTranslation.objects.filter(lang=lang).select_related('guide')
+    # Справочные данные — из двухуровневого кэша reference
+    guides_with_choices = reference.guides(lang)
+    guide_choices = reference.guide_translations(lang)
     
     return {
         'guides_list': guides_with_choices,
@@ -61,40 +75,177 @@ def get_guides_data(lang):
     
 def get_partners_data():
     """Получение данных о партнерах"""
-    partners = Partners.objects.all()
+    partners = reference.partners()
     return {'partners': partners}
 
-def index(request):
-    """Главная страница - объединяет данные из всех функций"""
-    lang = get_language()
-    
-    # Получаем данные из каждой функции
-    news_data = get_news_data(lang)
-    leaders_data = get_leaders_data(lang)
-    debts_data = get_debts_data()
-    guides_data = get_guides_data(lang)
-    partners_data = get_partners_data()
-    
+# ================== Async homepage ==================
+# Пустые значения секций на случай таймаута без сохранённой копии
+HOMEPAGE_FALLBACKS = {
+    'news': {'news': [], 'categories': []},
+    'leaders': {'leaders_list': [], 'current_leader': None},
+    'guides': {'guides_list': [], 'guide_choices': []},
+    'partners': {'partners': []},
+}
+
+
+def _load_section(provider, *args):
+    """Выполняет провайдер в потоке пула со своим подключением к БД и вычисляет querysets"""
+    close_old_connections()
+    try:
+        # SQL этого потока попадает в замеры запроса: sync_to_async копирует контекст (profiling)
+        data = provider(*args)
+        return {key: list(value) if isinstance(value, QuerySet) else value for key, value in data.items()}
+    finally:
+        close_old_connections()
+
+
+async def _section(name, lang, provider, *args):
+    """Секция главной с таймаутом; при ошибке — последняя удачная копия или пустое значение"""
+    stale_key = f'homepage_section:{name}:{lang}'
+    try:
+        data = await asyncio.wait_for(
+            sync_to_async(_load_section, thread_sensitive=False)(provider, *args),
+            settings.HOMEPAGE_SECTION_TIMEOUT,
+        )
+    except Exception as e:
+        logger.warning("Homepage section %s (%s) failed: %r", name, lang, e)
+        data = await cache.aget(stale_key)
+        return (data if data is not None else HOMEPAGE_FALLBACKS[name]), False
+    await cache.aset(stale_key, data, None)
+    return data, True
+
+
+async def aget_news_data(lang):
+    return await _section('news', lang, get_news_data, lang)
+
+
+async def aget_leaders_data(lang):
+    return await _section('leaders', lang, get_leaders_data, lang)
+
+
+async def aget_debts_data():
+    # Главная долги не выводит: queryset остаётся ленивым и не выполняется
+    return get_debts_data(), True
+
+
+async def aget_guides_data(lang):
+    return await _section('guides', lang, get_guides_data, lang)
+
+
+async def aget_partners_data():
+    return await _section('partners', '', get_partners_data)
+
+
+async def _render_index(request, lang):
+    """Рендер главной без пользовательских данных (для кэша): секции собираются параллельно"""
+    sections = await asyncio.gather(
+        aget_news_data(lang),
+        aget_leaders_data(lang),
+        aget_debts_data(),
+        aget_guides_data(lang),
+        aget_partners_data(),
+    )
+
     # Объединяем все данные в один контекст
-    context = {
-        **news_data,
-        **leaders_data,
-        **debts_data,
-        **guides_data,
-        **partners_data
-    }
+    context = {}
+    for data, _ in sections:
+        context.update(data)
+
+    html = await sync_to_async(render_to_string)('index.html', context, request=request)
+    return html, all(complete for _, complete in sections)
+
+
+@conditional_page(list(caching.HOMEPAGE_SECTIONS))
+async def index(request):
+    """Главная страница - объединяет данные из всех секций (HTML кэшируется по языку)"""
+    lang = get_language()
+    html = await caching.aget_homepage(lang, lambda: _render_index(request, lang))
+    return HttpResponse(html)
+
+
+def debt_lookup(request):
+    """Поиск долгов по ИНН (или нескольким ИНН): JSON или HTML-фрагмент (?format=html)"""
+    client = client_ip(request)
+    if caching.rate_limited('debt_lookup', client, settings.DEBT_LOOKUP_RATE_LIMIT, 60):
+        return JsonResponse({'error': 'too_many_requests'}, status=429)
+
+    inns, invalid = debts.parse_inns(request.GET.getlist('inn'))
+    if invalid or not inns:
+        return JsonResponse({'error': 'invalid_inn', 'invalid': invalid}, status=400)
+    if len(inns) > debts.MAX_BATCH:
+        return JsonResponse({'error': 'too_many_inns', 'max': debts.MAX_BATCH}, status=400)
+
+    result = debts.lookup(inns)
+    if request.GET.get('format') == 'html':
+        return render(request, 'debt_lookup.html', {'results': result})
+    return JsonResponse({'results': result})
+
+
+@conditional_page([debts.SUMMARY_SECTION], max_age=settings.DEBT_SUMMARY_MAX_AGE)
+def debt_summary_api(request):
+    """Итоги реестра долгов для виджетов: всего, по статусам и по типам (из DebtSummary)"""
+    return JsonResponse(debts.summary())
+
+
+@staff_member_required
+def cache_stats(request):
+    """Счётчики попаданий/промахов кэша главной страницы"""
+    return JsonResponse(caching.stats(['homepage']))
+
+
+def metrics(request):
+    """Гистограммы запросов в формате Prometheus (доступ с METRICS_ALLOWED_IPS или для персонала)"""
+    allowed = client_ip(request) in settings.METRICS_ALLOWED_IPS
+    if not allowed and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse(status=403)
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@conditional_page(['news'])
+def news_list_api(request):
+    """
+    Переводы новостей потоком: NDJSON (по умолчанию) или JSON (?format=json).
+    ?lang= (язык префикса, несколько через запятую или all), ?category=, ?since=, ?fields=
+    Значение since для следующей синхронизации — в заголовке X-Next-Since (и next_since в JSON).
+    """
+    try:
+        langs, category, since, fields, output = news_api.parse_params(
+            request.GET, request.LANGUAGE_CODE or get_language()
+        )
+    except news_api.InvalidParameter as e:
+        return JsonResponse({'error': e.error, **e.details}, status=400)
+
+    # До чтения строк: всё изменённое раньше next_since уже закоммичено и попадёт в этот ответ
+    next_since = news_api.next_since()
+    rows = news_api.queryset(langs, category, since, fields)
+    removed = news_api.deletions(langs, since)
+    content_type = 'application/x-ndjson; charset=utf-8' if output == 'ndjson' else 'application/json'
+    chunks = news_api.stream(rows, fields, langs, output, removed, next_since)
+    if isinstance(request, ASGIRequest):
+        chunks = news_api.aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['X-Next-Since'] = next_since.isoformat()
+    return response
+
 
-    return render(request, 'index.html', context)
+def suggest(request):
+    """Подсказки заголовков по началу слова (?q=) из индекса в памяти, без запросов к БД"""
+    lang = request.LANGUAGE_CODE or get_language()
+    response = JsonResponse({'results': suggestions.suggest(lang, request.GET.get('q', ''))})
+    patch_cache_control(response, public=True, max_age=settings.SUGGEST_MAX_AGE)
+    return response
 
 
 # Альтернативный вариант - показать промежуточную страницу
 def guide(request, guide_type):
     current_lang = request.LANGUAGE_CODE or get_language()
     try:
-        guide_choice = GuideTranslation.objects.select_related('guide').get(
-            guide__guide_type=guide_type,  # ← связь через guide
-            lang=current_lang               # ← поле называется lang, не language
+        guide_choice = next(
+            (g for g in reference.guide_translations(current_lang) if g.guide.guide_type == guide_type),
+            None,
         )
+        if guide_choice is None:
+            raise GuideTranslation.DoesNotExist
 
         context = {
             'guide': guide_choice,
@@ -110,23 +261,69 @@ def guide(request, guide_type):
         return redirect('home')
 
 
+def _leaders_page(request):
+    """(регион, лидеры страницы, смещение следующей страницы или None); регион вне REGION_CHOICES -> ValueError"""
+    region = request.GET.get('region') or None
+    if region is not None and region not in regions.REGION_ORDER:
+        raise ValueError(region)
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', settings.LEADERS_PER_PAGE)), 1), settings.LEADERS_PER_PAGE)
+    except ValueError:
+        offset, limit = 0, settings.LEADERS_PER_PAGE
+    leaders = regions.region_leaders(region)
+    next_offset = offset + limit if offset + limit < len(leaders) else None
+    return region, leaders[offset:offset + limit], next_offset
+
+
+@conditional_page(['leaders'])
 def leaders(request):
-    leaders = Leaders.objects.all()
-    return render(request, 'leaders.html', {'leaders': leaders})
+    try:
+        region, leaders, next_offset = _leaders_page(request)
+    except ValueError:
+        return redirect('leaders')
+    context = {
+        'leaders': leaders,
+        'region': region,
+        'region_choices': Leaders.REGION_CHOICES,
+        'next_offset': next_offset,
+    }
+    return render(request, 'leaders.html', context)
+
+
+@conditional_page(['leaders'], max_age=settings.LEADERS_API_MAX_AGE)
+def leaders_api(request):
+    """Лидеры региона (?region=) в JSON, по страницам (?offset=, ?limit=)"""
+    try:
+        region, leaders, next_offset = _leaders_page(request)
+    except ValueError:
+        return JsonResponse({'error': 'invalid_region', 'regions': list(regions.REGION_ORDER)}, status=400)
+    return JsonResponse({
+        'region': region,
+        'results': [regions.serialize(leader) for leader in leaders],
+        'next_offset': next_offset,
+    })
 
 
+@conditional_page(['news'])
 def news_detail(request, news_id: int):
     current_lang = request.LANGUAGE_CODE or get_language()
-    base_news = get_object_or_404(News, id=news_id)
-    news_tr = get_object_or_404(NewsTranslation.objects.select_related('category'), news=base_news, lang=current_lang)
-
-    related_news = (
-        NewsTranslation.objects.select_related('news', 'category')
-        .filter(lang=current_lang)
-        .exclude(news=base_news)
-        .order_by('-news__created_at')
+    # Перевод на язык страницы или, если его нет, по цепочке TRANSLATION_FALLBACKS — одним запросом
+    news_tr = get_object_or_404(
+        NewsTranslation.objects.in_language(current_lang).select_related('category'),
+        news_id=news_id, is_published=True,
     )
 
+    # Предрассчитанные похожие новости (RelatedNews), пока таблица не заполнена — последние K
+    related_news = related.get_related(news_tr)
+    if not related_news:
+        related_news = (
+            NewsTranslation.objects.in_language(current_lang).select_related('category')
+            .filter(is_published=True)
+            .exclude(news_id=news_id)
+            .order_by('-created_at')[:settings.RELATED_NEWS_COUNT]
+        )
+
     context = {
         'news': news_tr,
         'related_news': related_news,
@@ -134,45 +331,65 @@ def news_detail(request, news_id: int):
     return render(request, 'news_detail.html', context)
 
 
+@conditional_page(['news'])
 def all_news(request):
     """Страница со всеми новостями"""
     current_lang = request.LANGUAGE_CODE or get_language()
     
     # Получаем все новости
-    news_list = NewsTranslation.objects.select_related('news', 'category').filter(
-        lang=current_lang
-    ).order_by('-news__created_at')
+    news_list = NewsTranslation.objects.in_language(current_lang).select_related('category').filter(
+        is_published=True
+    ).order_by('-created_at')
     
     # Получаем все категории для фильтрации
-    categories = CategoryTranslation.objects.filter(lang=current_lang)
+    categories = reference.categories(current_lang)
     
     # Фильтрация по категории
     category_filter = request.GET.get('category')
     if category_filter:
-        news_list = news_list.filter(category__slug=category_filter)
+        # По category_id, чтобы работал индекс (lang, category, -created_at)
+        category_id = reference.category_ids().get(category_filter)
+        news_list = news_list.filter(category_id=category_id) if category_id else news_list.none()
     
-    # Поиск по заголовку
+    # Полнотекстовый поиск по индексу (заголовок, описание, обе письменности)
     search_query = request.GET.get('search')
     if search_query:
-        news_list = news_list.filter(title__icontains=search_query)
+        news_list = search.search(news_list, current_lang, search_query)
     
-    # Пагинация
-    paginator = Paginator(news_list, 12)  # 12 новостей на страницу
+    # Общее число берём из кэша, чтобы не делать COUNT(*) на каждый запрос
+    count_key = ('all_news', current_lang, category_filter, search_query)
+    total_count = cached_count(news_list, count_key)
+
+    # Пагинация: по ?page=N — классическая (OFFSET), иначе курсорная по (дата, id)
     page = request.GET.get('page')
-    
-    try:
-        news_list = paginator.page(page)
-    except PageNotAnInteger:
-        news_list = paginator.page(1)
-    except EmptyPage:
-        news_list = paginator.page(paginator.num_pages)
-    
+    if page is None:
+        keys = ['created_at', 'pk']
+        if search_query:
+            keys.insert(0, 'score')
+        news_list = paginate_by_cursor(
+            news_list, keys,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            per_page=NEWS_PER_PAGE,
+        )
+        paginator = None
+    else:
+        paginator = CachedCountPaginator(news_list, NEWS_PER_PAGE, count_key=count_key)
+        try:
+            news_list = paginator.page(page)
+        except PageNotAnInteger:
+            news_list = paginator.page(1)
+        except EmptyPage:
+            news_list = paginator.page(paginator.num_pages)
+
     context = {
         'news_list': news_list,
         'categories': categories,
         'current_category': category_filter,
         'search_query': search_query,
         'paginator': paginator,
+        'total_count': total_count,
+        'cursor_mode': paginator is None,
     }
     return render(request, 'all_news.html', context)
 